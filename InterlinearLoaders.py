@@ -1,5 +1,10 @@
 from abc import ABC, abstractmethod
-import openpyxl
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter
+
+from cancellation import CancelToken, OperationCancelled
+from cell_text import clean_cell_value
+from resource_limits import ResourceLimits
+from row_sources import DelimitedRows, EXCEL_ROW_SOURCES, DEFAULT_EXCEL_ROW_SOURCE
 from xml.etree.ElementTree import Element, SubElement, tostring
 from xml.dom import minidom 
 
@@ -10,16 +15,25 @@ class InterlinearLoader(ABC):
 
     Includes the following:
     - issuccess (attribute)
+    - iscancelled (attribute)
+    - cancel_token (attribute)
     - isdone (property)
     - progress (property)
+    - describe_progress (method)
+    - progress_counts (method)
+    - cancel (method)
+    - step (method)
+    - close_rows (method)
     - run (method)
 
     Concrete child classes must have:
     -a next_step attribute which defines a processing function
     """
 
-    def __init__(self):
+    def __init__(self, cancel_token=None):
         self.issuccess = False
+        self.iscancelled = False
+        self.cancel_token = cancel_token if cancel_token is not None else CancelToken()
         super().__init__()  # for multiple inheritance...
 
         self._progress = 0
@@ -42,13 +56,73 @@ class InterlinearLoader(ABC):
 
         return self._progress
 
-    def run(self):
+    def describe_progress(self):
         """
-        Run all steps directly (no breaks)
+        Returns a short description of how far processing has got, e.g. for a cancellation message.
         """
 
-        while not self.isdone:
+        return f"{self.progress:.0%} done"
+
+    def progress_counts(self):
+        """
+        Returns (done, total) for a progress reporter (see progress.py); total is None if unknown.
+        """
+
+        return self.progress, 1.0
+
+    def cancel(self):
+        """
+        Request cancellation. Processing stops at the next check, raising OperationCancelled.
+
+        Safe to call from another thread or a signal handler.
+        """
+
+        self.cancel_token.cancel()
+
+    def check_cancelled(self):
+        """
+        Raise OperationCancelled (describing progress so far) if cancellation was requested.
+        """
+
+        if self.cancel_token.is_cancelled:
+            self.iscancelled = True
+            raise OperationCancelled(self.describe_progress())
+
+    def step(self):
+        """
+        Run the next processing step, unless cancellation was requested.
+
+        If the step fails or is cancelled, any open file is closed (see close_rows) before the
+        exception is passed on, so that the input file is not left locked.
+        """
+
+        try:
+            self.check_cancelled()
             self.next_step()
+        except BaseException:
+            self.close_rows()
+            raise
+
+    def close_rows(self):
+        """
+        Release any file the loader has open. Safe to call more than once.
+        """
+
+    def run(self, progress=None):
+        """
+        Run all steps directly (no breaks).
+
+        progress: Optional. A progress callback, progress(done, total), called after each step
+            with progress_counts(); use a reporter from progress.py to limit how often it is shown.
+        """
+
+        if progress is None:
+            while not self.isdone:
+                self.step()
+            return
+        while not self.isdone:
+            self.step()
+            progress(*self.progress_counts())
 
 
 class InterlinearXML:
@@ -69,6 +143,7 @@ class InterlinearXML:
         new_xml_il_lines()
         new_xml_vernacular_line()
         new_xml_gloss_line()
+        paragraph_has_lines()
       (add_xml_* take text argument)
         add_xml_vernacular_word(text)
         add_xml_gloss_word(text)
@@ -78,6 +153,8 @@ class InterlinearXML:
         write(filename)
     """
 
+    line_rows = None    # sheet row of each line, in order, if collected (see ExcelInterlinearLoader)
+
     def __init__(self):
         self.xml_root = Element('text')
         self.xml_metadata = SubElement(self.xml_root, 'text_metadata')
@@ -89,6 +166,9 @@ class InterlinearXML:
     def new_xml_paragraph(self):
         self.xml_paragraph = SubElement(self.xml_body, 'paragraph')
 
+    def paragraph_has_lines(self):
+        return len(self.xml_paragraph) > 0
+
     def new_xml_line(self):
         self.xml_line = SubElement(self.xml_paragraph, 'line')
 
@@ -132,25 +212,103 @@ class InterlinearXML:
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(pretty)
 
+    def to_snapshot(self):
+        """
+        Return the XML content as plain tuples, e.g. for caching with pickle.
+
+        (metadata, paragraphs, line_rows) where:
+          metadata: tuple of (tag, text) pairs
+          paragraphs: tuple of paragraphs, each a tuple of lines,
+            each line a tuple of (vernacular words, gloss words, free translation)
+          line_rows: tuple of the sheet row of each line, or None if they were not collected
+        """
+
+        metadata = tuple((element.tag, element.text or "") for element in self.xml_metadata)
+        paragraphs = []
+        for paragraph in self.xml_body:
+            lines = []
+            for line in paragraph:
+                vern_words = tuple(wrd.text or "" for wrd in line.iterfind('il-lines/vernacular-line/wrd'))
+                gloss_words = tuple(gls.text or "" for gls in line.iterfind('il-lines/gloss-line/gls'))
+                free = line.find('free')
+                lines.append((vern_words, gloss_words, (free.text or "") if free is not None else ""))
+            paragraphs.append(tuple(lines))
+        line_rows = tuple(self.line_rows) if self.line_rows is not None else None
+        return metadata, tuple(paragraphs), line_rows
+
+    def from_snapshot(self, snapshot):
+        """
+        Rebuild the XML content from the result of to_snapshot().
+
+        Any existing body content is replaced.
+        """
+
+        metadata, paragraphs, line_rows = snapshot
+        self.line_rows = list(line_rows) if line_rows is not None else None
+        self.xml_metadata.clear()
+        for tag, text in metadata:
+            SubElement(self.xml_metadata, tag).text = text
+        self.xml_body.clear()
+        for lines in paragraphs:
+            self.new_xml_paragraph()
+            for vern_words, gloss_words, free in lines:
+                self.new_xml_line()
+                self.new_xml_il_lines()
+                self.new_xml_vernacular_line()
+                for word in vern_words:
+                    self.add_xml_vernacular_word(word)
+                self.new_xml_gloss_line()
+                for word in gloss_words:
+                    self.add_xml_gloss_word(word)
+                self.add_xml_free(free)
+
 
 class ExcelInterlinearLoader(InterlinearLoader, InterlinearXML):
     """
     Handles loading of an Excel interlinear from template.
 
+    This is the one parsing engine for the template, used by both the GUI and excel_to_xml.py.
+    Sheet rows are streamed from a row source (see row_sources) as they are needed,
+    so parsing starts on the first blocks before the rest of the sheet is read,
+    and only a few rows are held in memory at a time.
+
+    backend: name of the row source for Excel files, one of row_sources.EXCEL_ROW_SOURCES:
+        'read-only' (default, openpyxl read-only mode), 'full' (openpyxl normal mode)
+        or 'raw' (standard library zip/XML reader).
+        All backends give the same output (see scripts/parity_check.py).
+
     Direct usage:
         e = ExcelInterlinearLoader(name_and_path_of_excel_file_to_load)
         e.run()
         txt = e.get_pretty_xml()
 
-    To use tqdm for displaying progress:
+    To display progress (a tqdm bar, updated at most 20 times a second; see progress.py):
         e = ExcelInterlinearLoader(name_and_path_of_excel_file_to_load)
-        with tqdm(total=1.0, desc="Processing Excel File") as pbar:
-            while not e.isdone:
-                e.next_step()
-                pbar.update(e.progress)
+        with make_progress('tqdm', desc="Processing Blocks", unit="block") as progress:
+            e.run(progress)
+
+    To allow cancelling (e.g. from a GUI button or another thread), call e.cancel()
+    or pass a shared cancellation.CancelToken as cancel_token. The next step() then raises
+    cancellation.OperationCancelled, whose message says how far loading got.
+
+    Other sources of template-shaped rows are used by passing a row_source object
+    (see DelimitedInterlinearLoader).
+
+    For a quick look at a file (its metadata and first lines), set e.max_blocks before running:
+    reading stops after that many blocks, without reading the rest of the sheet.
+
+    Files that would use too many rows, cells, decompressed bytes or time (e.g. a zip bomb,
+    or a sheet of a million formatted empty cells) are refused with
+    resource_limits.ResourceLimitExceeded, before or while loading. Set e.limits to other
+    resource_limits.ResourceLimits before running to change the limits, or to None for none.
+
+    Merged cells are not filled in: a merged range's value is only in its first cell,
+    as stored in the file (the free translation is read from column C).
     """
 
-    def __init__(self, loadname):
+    CANCEL_CHECK_ROWS = 1000
+
+    def __init__(self, loadname, cancel_token=None, backend=DEFAULT_EXCEL_ROW_SOURCE, row_source=None):
         """
         Construct ExcelInterlinearLoader object with definitions and initialization
         """
@@ -165,67 +323,164 @@ class ExcelInterlinearLoader(InterlinearLoader, InterlinearXML):
         }
         self.DATA_START_ROW = 6
         self.DATA_START_COLUMN = 3 # Column C
-        self.DATA_END_COLUMN = 26 # Column Z (where the free translation merge ends)
+        self.DATA_END_COLUMN = None # None: up to the rightmost used column of each block (Z in the template)
         self.ROWS_PER_LINE_BLOCK = 4
+        self.MIN_BLOCK_ROWS = 2     # a last block needs its vernacular and gloss rows; the others may be trimmed
         self.BLANK_BLOCK_EXIT_THRESHOLD = 5 # Exit after 5 consecutive empty 4-row blocks (20 blank rows)
-        self.FILE_LOAD_PROGRESS_WEIGHT = 0.5
 
         self.warning_list = []  # fatal errors are raised as exceptions to be handled elsewhere
         self.consecutive_empty_blocks = 0
+        self.exited_early = False  # True if loading stopped at BLANK_BLOCK_EXIT_THRESHOLD empty blocks
+        self.word_occurrences = None    # set to a list to collect (word, gloss, row, col) of each word (see concordance.py)
+        self.line_rows = None   # set to a list to collect the vernacular row of each line (e.g. for the GUI preview)
+        self.clean_cell_value = clean_cell_value    # cell value -> text (or None for an empty cell)
+        self.limits = ResourceLimits()  # checked while loading; None for no limits
+        self.max_blocks = None  # set to a number to read only the metadata and the first blocks (a quick look)
 
         self.loadname = loadname
+        self.row_source = row_source if row_source is not None else EXCEL_ROW_SOURCES[backend](loadname)
+        self.FILE_LOAD_PROGRESS_WEIGHT = self.row_source.OPEN_PROGRESS_WEIGHT
+        self.max_row = None     # total rows in the sheet, if known before reading them all
+        self.is_block_count_known = True  # False if n_blocks is only found by reading ahead
+        self.rows = {}          # row number (1-based) -> tuple of cell values, for rows in use
+        self.n_rows_read = 0
+        self.n_cells_read = 0
+        self.is_eof = False
+        self._row_iter = None
         self.n_blocks = None
         self.current_block = None
         self.next_step = self.load_sheet
-        super().__init__()
+        super().__init__(cancel_token)
 
         self.debug = False  # for printing to console
 
     def update_progress(self, value=None):
         """
-        Update the progress attribute, either from current_block or with a set value.
+        Update the progress attribute, either from the rows read so far or with a set value.
 
         load_sheet is assigned self.FILE_LOAD_PROGRESS_WEIGHT of the progress.
-        The rest of the progressbar is evenly divided among:
-            read_metadata: 1 unit 
-            read_one_block: 1 unit per block
-            cleanup: 1 unit
+        The rest of the progressbar follows the fraction of the sheet read (see read_fraction).
         """
 
         w = self.FILE_LOAD_PROGRESS_WEIGHT
 
-        if value is None:
-            self._progress = w + (1 - w) * self.current_block / (self.n_blocks + 2)
-        elif value == -1:
-            self._progress = w + (1 - w) * (self.n_blocks + 1) / (self.n_blocks + 2)
+        if value is None or value == -1:
+            self._progress = w + (1 - w) * min(self.read_fraction(), 1.0)
         else:
             self._progress = float(value)
 
-    def load_sheet(self):
+    def read_fraction(self):
         """
-        Load the Excel sheet as an openpyxl object and count the rows.
+        Returns the fraction (0.0 - 1.0) of the sheet read so far.
         """
 
-        try:
-            workbook = openpyxl.load_workbook(self.loadname, data_only=True)
-        except Exception as e:
-            raise Exception(f"Error loading Excel file '{self.loadname}'") from e
+        return self.row_source.read_fraction(self.n_rows_read)
 
-        try:
-            self.sheet = workbook.worksheets[0]
-        except Exception as e:
-            raise Exception(f"Error loading first sheet of Excel file '{self.loadname}'") from e
+    def describe_progress(self):
+        """
+        Returns a short description of how far processing has got, e.g. for a cancellation message.
+        """
 
-        n_data_rows = self.sheet.max_row - self.DATA_START_ROW + 1
-        if self.debug:
-            print(f'  Total rows: {self.sheet.max_row}')
-            print(f'  Data rows: {n_data_rows}')
-        if n_data_rows % self.ROWS_PER_LINE_BLOCK:
-            # extra row or part of an interlinear line
-            n_extra = n_data_rows % self.ROWS_PER_LINE_BLOCK
-            self.warning_list.append('Partial interlinear block of data will be ignored ' +
-                                     f'({n_extra} extra data rows found)')
-        self.n_blocks = (n_data_rows // self.ROWS_PER_LINE_BLOCK)
+        if self.current_block is None:
+            return "while opening the file"
+        n_lines = self.count_lines()
+        of_n_blocks = f" of {self.n_blocks}" if self.is_block_count_known else ""
+        return (f"at block {self.current_block}{of_n_blocks} "
+                f"(row {self.DATA_START_ROW + (self.current_block - 1) * self.ROWS_PER_LINE_BLOCK}); "
+                f"{n_lines} line(s) and {len(self.warning_list)} warning(s) so far")
+
+    def count_lines(self):
+        """
+        Returns the number of interlinear lines read so far.
+        """
+
+        return len(self.xml_body.findall('paragraph/line'))
+
+    def progress_counts(self):
+        """
+        Returns (blocks read, total blocks) for a progress reporter.
+
+        If the block count is only found by reading ahead, the total is estimated from the
+        sheet's row count (None if there is none).
+        """
+
+        if self.current_block is None:
+            return 0, None
+        done = self.current_block - 1   # current_block is the next block to read
+        if self.is_block_count_known:
+            return done, self.n_blocks
+        if self.isdone:
+            return done, done
+        if self.max_row is None:
+            return done, None
+        # estimate from the sheet's (inexact) row count, at least the blocks found so far
+        return done, max(self.count_blocks(self.max_row)[0], self.n_blocks)
+
+    def count_blocks(self, n_rows):
+        """
+        Returns (number of blocks, number of rows of a partial last block) in a sheet of n_rows rows.
+
+        A last block with at least MIN_BLOCK_ROWS rows is counted; with max_blocks, at most max_blocks are.
+        """
+
+        n_data_rows = max(n_rows - self.DATA_START_ROW + 1, 0)
+        n_blocks, n_extra = divmod(n_data_rows, self.ROWS_PER_LINE_BLOCK)
+        if n_extra >= self.MIN_BLOCK_ROWS:
+            # a last block without its free translation and/or blank row, which count as empty
+            n_blocks += 1
+            n_extra = 0
+        if self.max_blocks is not None:
+            n_blocks = min(n_blocks, self.max_blocks)
+        return n_blocks, n_extra
+
+    def open_rows(self):
+        """
+        Open the row source, setting self.max_row (None if unknown) and starting to stream rows.
+        """
+
+        if self.limits is not None:
+            self.limits.start()
+            self.row_source.check_limits(self.limits)
+        self.row_source.open()
+        self.max_row = self.row_source.max_row
+        self._row_iter = self.row_source.iter_rows()
+
+    def close_rows(self):
+        """
+        Release the file opened by open_rows. Safe to call more than once, and before open_rows.
+        """
+
+        if self._row_iter is not None and hasattr(self._row_iter, 'close'):
+            self._row_iter.close()  # (a row generator stopped early can hold the sheet part open)
+        self.row_source.close()
+
+    def load_sheet(self):
+        """
+        Open the file and find the number of blocks from the number of rows, if the backend knows it
+        exactly; otherwise the blocks are counted by reading ahead.
+
+        Rows themselves are read later, as each block needs them (see read_rows).
+        """
+
+        self.open_rows()
+        # opening cannot be interrupted, so check as soon as it is done
+        self.check_cancelled()
+        if self.limits is not None:
+            self.limits.check_time()
+
+        if self.max_row is None or not self.row_source.max_row_is_exact:
+            # no exact row count (a sheet's <dimension> tag may be wrong, and is only used for progress):
+            # find the end of the data by reading one block ahead
+            self.is_block_count_known = False
+            self.n_blocks = 1 if self.has_block(1) else 0
+        else:
+            if self.debug:
+                print(f'  Total rows: {self.max_row}')
+                print(f'  Data rows: {max(self.max_row - self.DATA_START_ROW + 1, 0)}')
+            self.n_blocks, n_extra = self.count_blocks(self.max_row)
+            if n_extra and self.max_blocks is None:
+                # (with max_blocks, the rest of the sheet is not read, so is not checked for a partial block)
+                self.warning_list.append(self.partial_block_warning(n_extra))
         self.update_progress(self.FILE_LOAD_PROGRESS_WEIGHT)
         self.next_step = self.read_metadata
         # need approach for if a step fails, how to let GUI know?
@@ -235,14 +490,51 @@ class ExcelInterlinearLoader(InterlinearLoader, InterlinearXML):
         if self.debug:
             print(f'load_sheet: n_blocks = {self.n_blocks}')
 
+    def read_rows(self, last_row):
+        """
+        Read rows from the sheet into self.rows, up to and including last_row (or the end of the sheet).
+        """
+
+        while self.n_rows_read < last_row and not self.is_eof:
+            try:
+                row_values = next(self._row_iter)
+            except StopIteration:
+                self.is_eof = True
+                self.close_rows()
+            else:
+                self.n_rows_read += 1
+                self.n_cells_read += len(row_values)
+                self.rows[self.n_rows_read] = row_values
+                if self.limits is not None:
+                    self.limits.check_rows(self.n_rows_read)
+                    self.limits.check_cells(self.n_cells_read)
+                if not self.n_rows_read % self.CANCEL_CHECK_ROWS:
+                    self.check_cancelled()
+                    if self.limits is not None:
+                        self.limits.check_time()
+
+    def has_block(self, block):
+        """
+        Read ahead to the end of a block, returning True if its vernacular and gloss rows are present
+        (the free translation and blank rows of the last block may be missing, and count as empty).
+        """
+
+        first_row = self.DATA_START_ROW + (block - 1) * self.ROWS_PER_LINE_BLOCK
+        self.read_rows(first_row + self.ROWS_PER_LINE_BLOCK - 1)
+        return self.n_rows_read >= first_row + self.MIN_BLOCK_ROWS - 1
+
+    def partial_block_warning(self, n_extra):
+        return f'Partial interlinear block of data will be ignored ({n_extra} extra data rows found)'
+
     def read_metadata(self):
         """
         Read the metadata cells of the spreadsheet
         """
         
+        self.read_rows(self.DATA_START_ROW - 1)
         for tag, cell_coord in self.METADATA_CELLS.items():
-            cell = self.sheet[cell_coord]
-            cell_value = self.get_cell_value(cell.row, cell.column)
+            row, col = coordinate_to_tuple(cell_coord)
+            cell_value = self.get_cell_value(row, col)
             element = SubElement(self.xml_metadata, tag)
             element.text = cell_value if cell_value else ""
         self.current_block = 1
@@ -257,12 +549,24 @@ class ExcelInterlinearLoader(InterlinearLoader, InterlinearXML):
         vernacular_row = self.DATA_START_ROW + (self.current_block - 1) * self.ROWS_PER_LINE_BLOCK
         gloss_row =      vernacular_row + 1
         free_row =       vernacular_row + 2
-        # blank_row =      vernacular_row + 3 # worth checking for blankness or no?
+        blank_row =      vernacular_row + 3
+
+        if (not self.is_block_count_known and (self.max_blocks is None or self.current_block < self.max_blocks)
+                and self.has_block(self.current_block + 1)):
+            self.n_blocks = self.current_block + 1
+        # drop rows of blocks already read (metadata rows are kept), and read this block's rows
+        for row in [r for r in self.rows if self.DATA_START_ROW <= r < vernacular_row]:
+            del self.rows[row]
+        self.read_rows(vernacular_row + self.ROWS_PER_LINE_BLOCK - 1)
+
+        # only scan the columns in use; most lines are much shorter than C:Z
+        end_column = self.DATA_END_COLUMN or max(
+            self.last_used_column(vernacular_row), self.last_used_column(gloss_row))
 
         vern_words = []
         gloss_words = []
 
-        for col in range(self.DATA_START_COLUMN, self.DATA_END_COLUMN+1):
+        for col in range(self.DATA_START_COLUMN, end_column+1):
             vern_val = self.get_cell_value(vernacular_row, col)
             gloss_val = self.get_cell_value(gloss_row, col)
 
@@ -271,14 +575,17 @@ class ExcelInterlinearLoader(InterlinearLoader, InterlinearXML):
 
             # Check alignment
             if vern_is_present != gloss_is_present:
-                problem_cell = f"{chr(col + 64)}{vernacular_row}" if vern_is_present else f"{chr(col + 64)}{gloss_row}"
+                col_letter = get_column_letter(col)
+                problem_cell = f"{col_letter}{vernacular_row}" if vern_is_present else f"{col_letter}{gloss_row}"
                 self.warning_list.append(
-                    f"Alignment Error: Mismatched word/gloss at column {chr(col + 64)}. "
+                    f"Alignment Error: Mismatched word/gloss at column {col_letter}. "
                     f"Non-empty cell: {problem_cell} (Rows {vernacular_row} and {gloss_row})."
                 )
             if vern_is_present:
                 vern_words.append(vern_val)
                 gloss_words.append(gloss_val if gloss_val else "")
+                if self.word_occurrences is not None:
+                    self.word_occurrences.append((vern_val, gloss_val if gloss_val else "", vernacular_row, col))
             elif gloss_is_present:
                 pass # Ignore if only a gloss exists, but error is logged above
         free_translation = self.get_cell_value(free_row, self.DATA_START_COLUMN)
@@ -297,18 +604,26 @@ class ExcelInterlinearLoader(InterlinearLoader, InterlinearXML):
             for word in gloss_words:
                 self.add_xml_gloss_word(word)
             self.add_xml_free(free_translation)
+            if self.line_rows is not None:
+                self.line_rows.append(vernacular_row)
+
+            # Warning about the blank separator row
+            if not self.is_row_empty(blank_row):
+                self.warning_list.append(f"Warning: Expected blank separator row at Row {blank_row} is not empty.")
         # elif is_block_empty and self.current_row > self.DATA_START_ROW:
         # ^^^ why the 2nd condition? why ignore the first blank line?
+        # (A leading empty block counts towards BLANK_BLOCK_EXIT_THRESHOLD here.)
         else:
             # Paragraph break / Early Exit Logic
             self.consecutive_empty_blocks += 1
             if self.consecutive_empty_blocks >= self.BLANK_BLOCK_EXIT_THRESHOLD:
                 # self.warning_list.append(
                 #     f"Finishing early due to {self.consecutive_empty_blocks} consecutive empty interlinear lines")
+                self.exited_early = True
                 self.update_progress(-1)
                 self.next_step = self.cleanup
                 return None
-            elif list(self.xml_paragraph):
+            elif self.paragraph_has_lines():
                 self.new_xml_paragraph()    
 
         self.current_block += 1
@@ -321,9 +636,24 @@ class ExcelInterlinearLoader(InterlinearLoader, InterlinearXML):
         """
         Post-processing: Remove the last paragraph element if it ended up empty.
 
-        Then indicate that the processing is completed.
+        If the number of rows was not known in advance, count any remaining rows
+        to warn about a partial block. Then indicate that the processing is completed.
         """
 
+        if not self.is_block_count_known and self.max_blocks is None:
+            while not self.is_eof:
+                self.read_rows(self.n_rows_read + 1)
+                self.rows.pop(self.n_rows_read, None)
+            n_data_rows = self.n_rows_read - self.DATA_START_ROW + 1
+            n_extra = n_data_rows % self.ROWS_PER_LINE_BLOCK if n_data_rows > 0 else 0
+            if n_extra and n_extra < self.MIN_BLOCK_ROWS:
+                # same position in the list as when the row count is known before reading blocks
+                self.warning_list.insert(0, self.partial_block_warning(n_extra))
+        elif not self.is_eof:
+            self.is_eof = True
+            self.close_rows()
+        self.rows = {}
+
         if not list(self.xml_body) or not list(self.xml_paragraph):
             for p in list(self.xml_body):
                 if not list(p):
@@ -332,16 +662,209 @@ class ExcelInterlinearLoader(InterlinearLoader, InterlinearXML):
         self.update_progress(1.0)
         self.issuccess = True
 
+    def last_used_column(self, row):
+        """
+        Get the number of the rightmost non-empty cell of a row read so far (0 if none)
+        """
+
+        row_values = self.rows.get(row)
+        if row_values:
+            for col in range(len(row_values), 0, -1):
+                value = row_values[col - 1]
+                if value is not None and value != '':
+                    return col
+        return 0
+
+    def is_row_empty(self, row):
+        """
+        Check if all cells of a row from DATA_START_COLUMN on are empty
+        """
+
+        for col in range(self.DATA_START_COLUMN, (self.DATA_END_COLUMN or self.last_used_column(row)) + 1):
+            if self.get_cell_value(row, col):
+                return False
+        return True
+
     def get_cell_value(self, row, col):
         """
-        Get value of one cell of self.sheet, cleanly
+        Get value of one cell from the rows read so far, cleanly (stripped, NFC-normalized
+        and interned; see cell_text.py)
         """
 
-        cell = self.sheet.cell(row=row, column=col)
-        if cell.value is None:
+        row_values = self.rows.get(row)
+        if row_values is None or col > len(row_values):
             return None
-        else:
-            return str(cell.value).strip()
+        return self.clean_cell_value(row_values[col - 1])
+
+
+class DelimitedInterlinearLoader(ExcelInterlinearLoader):
+    """
+    Handles loading of a CSV/TSV export of the Excel interlinear template.
+
+    The file must keep the template layout: metadata in the same cells (C2, N2, ...)
+    and 4-row blocks (vernacular, gloss, free, blank) starting at row 6.
+    Rows are streamed with csv.reader (see row_sources.DelimitedRows). The number of
+    rows is not known until the end of the file, so the end of the data is found
+    by reading one block ahead.
+
+    Direct usage:
+        d = DelimitedInterlinearLoader(name_and_path_of_csv_file_to_load)
+        d.run()
+        txt = d.get_pretty_xml()
+
+    delimiter: None to guess from the file extension (.tsv/.tab) or contents,
+        or a single character such as ',', ';' or '\\t'.
+    """
+
+    def __init__(self, loadname, delimiter=None, cancel_token=None):
+        """
+        Construct DelimitedInterlinearLoader object with definitions and initialization
+        """
+
+        super().__init__(loadname, cancel_token, row_source=DelimitedRows(loadname, delimiter))
+
+
+class ValidatingInterlinearLoader(ExcelInterlinearLoader):
+    """
+    Reads a template-shaped sheet for its diagnostics only (see validator.py).
+
+    The rows are read and checked exactly as by ExcelInterlinearLoader, so the warning_list
+    is the same, but no interlinear XML is built: only the metadata, and a count of the lines.
+
+    Direct usage:
+        v = ValidatingInterlinearLoader(name_and_path_of_excel_file, backend='raw')
+        v.run()
+        print(v.warning_list, v.n_lines)
+    """
+
+    def __init__(self, loadname, cancel_token=None, backend=DEFAULT_EXCEL_ROW_SOURCE, row_source=None):
+        self.n_lines = 0
+        super().__init__(loadname, cancel_token, backend, row_source)
+
+    def count_lines(self):
+        return self.n_lines
+
+    def new_xml_line(self):
+        self.n_lines += 1
+
+    def new_xml_il_lines(self):
+        pass
+
+    def new_xml_vernacular_line(self):
+        pass
+
+    def new_xml_gloss_line(self):
+        pass
+
+    def add_xml_vernacular_word(self, text):
+        pass
+
+    def add_xml_gloss_word(self, text):
+        pass
+
+    def add_xml_free(self, text):
+        pass
+
+
+class LineStreamingInterlinearLoader(ExcelInterlinearLoader):
+    """
+    Reads a template-shaped sheet exactly as ExcelInterlinearLoader does, but passes each
+    interlinear line on as it is read instead of building the interlinear XML
+    (used by the pipelined conversion, excel_to_flextext.py).
+
+    emit(record) is called with:
+        ('metadata', {tag: text})    after the metadata cells are read
+        ('line', paragraph number, vernacular words, gloss words, free translation)    for each line
+    Paragraph numbers start at 1 and may skip numbers; a line with a new number starts a new paragraph.
+
+    Direct usage:
+        s = LineStreamingInterlinearLoader(name_and_path_of_excel_file, records.append, backend='raw')
+        s.run()
+    """
+
+    def __init__(self, loadname, emit, cancel_token=None, backend=DEFAULT_EXCEL_ROW_SOURCE, row_source=None):
+        self.emit = emit
+        self.paragraph_num = 0
+        self.n_paragraph_lines = 0
+        self.n_lines = 0
+        super().__init__(loadname, cancel_token, backend, row_source)
+
+    def read_metadata(self):
+        super().read_metadata()
+        self.emit(('metadata', {element.tag: element.text for element in self.xml_metadata}))
+
+    def count_lines(self):
+        return self.n_lines
+
+    def new_xml_paragraph(self):
+        if self.paragraph_num == 0:
+            super().new_xml_paragraph()     # (stays empty; the cleanup step expects one)
+        self.paragraph_num += 1
+        self.n_paragraph_lines = 0
+
+    def paragraph_has_lines(self):
+        return self.n_paragraph_lines > 0
+
+    def new_xml_line(self):
+        self.vern_words = []
+        self.gloss_words = []
+
+    def new_xml_il_lines(self):
+        pass
+
+    def new_xml_vernacular_line(self):
+        pass
+
+    def new_xml_gloss_line(self):
+        pass
+
+    def add_xml_vernacular_word(self, text):
+        self.vern_words.append(text)
+
+    def add_xml_gloss_word(self, text):
+        self.gloss_words.append(text)
+
+    def add_xml_free(self, text):
+        # the last part of each line
+        self.n_paragraph_lines += 1
+        self.n_lines += 1
+        self.emit(('line', self.paragraph_num, self.vern_words, self.gloss_words, text))
+
+
+class SnapshotInterlinearLoader(InterlinearLoader, InterlinearXML):
+    """
+    Handles "loading" of interlinear data that was already parsed and saved as a snapshot
+    (see InterlinearXML.to_snapshot and snapshot_cache.SnapshotCache).
+
+    Has the same interface as the other loaders, so the GUI can use it in their place.
+
+    Direct usage:
+        s = SnapshotInterlinearLoader(snapshot, warning_list)
+        s.run()
+        txt = s.get_pretty_xml()
+    """
+
+    def __init__(self, snapshot, warning_list):
+        """
+        Construct SnapshotInterlinearLoader object from a snapshot and its load warnings
+        """
+
+        self.snapshot = snapshot
+        self.warning_list = list(warning_list)
+        self.from_cache = True
+        self.next_step = self.restore
+        super().__init__()
+
+    def restore(self):
+        """
+        Rebuild the XML from the snapshot, in a single step.
+        """
+
+        self.from_snapshot(self.snapshot)
+        self.snapshot = None
+        self.next_step = None
+        self._progress = 1.0
+        self.issuccess = True
 
 
 if __name__ == "__main__":
@@ -356,7 +879,7 @@ if __name__ == "__main__":
         from tqdm import tqdm
         with tqdm(total=1.0, desc="Processing Excel File") as pbar:
             while xl.next_step is not None:
-                xl.next_step()
+                xl.step()
                 pbar.update(xl.progress)
         outputname = filename[:-5] + r'_ClassTestTqdm.xml'
         xl.write(outputname)
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Convert many interlinear workbooks at once, in a bounded pool of worker threads.
+
+Each file is a BatchItem, whose status, progress and results are updated by the worker
+converting it, for a GUI to poll (see conversion_queue_view.py). A file is only converted
+if its writing system codes (N2:N4) are valid, or codes were given for it; otherwise it
+is left as NEEDS_CODES.
+
+For long batch runs, a Journal records the result of each file as it finishes, and
+a run with --resume skips the files already converted (and unchanged since).
+
+Usage:
+    queue = ConversionQueue('flextext', workers=2)
+    items = queue.add(['a.xlsx', 'b.xlsx'])
+    ...
+    queue.cancel_all()
+    queue.shutdown()
+
+    python batch_convert.py archive/ -o converted/ --to flextext
+    python batch_convert.py archive/ -o converted/ --to flextext --resume    # after an interruption
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cancellation import CancelToken, OperationCancelled, install_sigint_handler
+from excel_to_xml import DELIMITED_EXTENSIONS, quick_look
+from exporters import EXPORTERS, export_file
+from progress import CallbackProgress
+from snapshot_cache import file_hash
+from validator import check_writing_systems
+
+# BatchItem.status values
+WAITING = "Waiting"
+CONVERTING = "Converting"
+CONVERTED = "Converted"
+NEEDS_CODES = "Needs writing systems"
+SKIPPED = "Skipped"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+FINISHED = (CONVERTED, NEEDS_CODES, SKIPPED, FAILED, CANCELLED)
+
+DEFAULT_WORKERS = 2
+DEFAULT_JOURNAL_NAME = 'conversion-journal.jsonl'
+BATCH_EXTENSIONS = ('.xlsx', '.csv', '.tsv', '.tab')    # taken from folders ('.txt' could be an output)
+
+
+class BatchItem:
+    """
+    One input file of a batch, and how its conversion went.
+
+    Attributes:
+        path: the input file
+        status: one of the status values above
+        progress: fraction of the file converted
+        n_warnings: number of load warnings
+        warnings: the load warnings
+        output_path: where the output was (or will be) written
+        message: why the file failed, was skipped or needs writing systems
+        seconds: time taken to convert
+        ws_codes: (vernacular, gloss, free) codes to use instead of those in the file, or None
+        replace_output: replace an existing output even if the queue does not (e.g. an output
+            of an earlier run, see Journal)
+        input_stat: (size, mtime_ns) of the input when its conversion started
+        version: incremented on every change, for a view to update only the changed items
+    """
+
+    def __init__(self, path, ws_codes=None):
+        self.path = path
+        self.ws_codes = ws_codes
+        self.replace_output = False
+        self.cancel_token = CancelToken()
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        self.status = WAITING
+        self.progress = 0.0
+        self.warnings = []
+        self.output_path = None
+        self.message = ""
+        self.seconds = 0.0
+        self.input_stat = None
+        self.cancel_token.reset()
+        self.touch()
+
+    @property
+    def n_warnings(self):
+        return len(self.warnings)
+
+    @property
+    def is_finished(self):
+        return self.status in FINISHED
+
+    def touch(self):
+        self.version += 1
+
+    def set_status(self, status, message=""):
+        self.status = status
+        self.message = message
+        self.touch()
+
+    def set_progress(self, done, total=None, message=None):
+        self.progress = done / total if total else 0.0
+        self.touch()
+
+
+def output_path_for(input_path, exporter_name, output_dir=None):
+    """
+    Returns the output path of an input file: same name, the exporter's extension,
+    in output_dir or else next to the input.
+    """
+
+    directory, name = os.path.split(os.path.abspath(input_path))
+    base = os.path.splitext(name)[0]
+    return os.path.join(output_dir or directory, base + EXPORTERS[exporter_name].EXTENSION)
+
+
+def convert_item(item, exporter_name, output_dir=None, overwrite=False, backend='raw'):
+    """
+    Convert one BatchItem with an exporter, updating the item as it goes. Does not raise.
+
+    The writing system codes are checked first, from a quick look at the file, and the
+    file is not converted unless they are valid (or item.ws_codes are given).
+    An existing output is only replaced if overwrite (or item.replace_output) is True.
+    """
+
+    start = time.perf_counter()
+    input_format = 'delimited' if os.path.splitext(item.path)[1].lower() in DELIMITED_EXTENSIONS else 'excel'
+    item.output_path = output_path_for(item.path, exporter_name, output_dir)
+    item.set_status(CONVERTING)
+    try:
+        item.cancel_token.check("before starting")
+        stat = os.stat(item.path)
+        item.input_stat = (stat.st_size, stat.st_mtime_ns)
+        if not (overwrite or item.replace_output) and os.path.exists(item.output_path):
+            item.set_status(SKIPPED, "The output file already exists.")
+            return
+        if item.ws_codes is None:
+            xml_root, _ = quick_look(item.path, 1, input_format, backend)
+            errors = check_writing_systems(xml_root.find('text_metadata'))
+            if errors:
+                item.set_status(NEEDS_CODES, ' '.join(errors))
+                return
+        ws_codes = item.ws_codes or (None, None, None)
+        _, item.warnings = export_file(
+            item.path, {exporter_name: item.output_path}, *ws_codes, input_format=input_format,
+            backend=backend, cancel_token=item.cancel_token, progress=CallbackProgress(item.set_progress))
+    except OperationCancelled:
+        item.set_status(CANCELLED, "No output was written.")
+    except Exception as e:
+        cause = f" ({e.__cause__})" if e.__cause__ is not None else ""
+        item.set_status(FAILED, f"{e}{cause}")
+    else:
+        item.progress = 1.0
+        item.set_status(CONVERTED)
+    finally:
+        item.seconds = time.perf_counter() - start
+
+
+class ConversionQueue:
+    """
+    Converts BatchItems with one exporter, at most `workers` files at a time, in background threads.
+
+    Files are converted in the order they were added. The settings (exporter_name, output_dir,
+    overwrite) are read when each file starts, so changing them affects the files still waiting.
+
+    on_finished: Optional. Called with each BatchItem when its conversion ends, in the worker
+    thread (e.g. Journal.record).
+    """
+
+    def __init__(self, exporter_name, workers=DEFAULT_WORKERS, output_dir=None, overwrite=False,
+                 on_finished=None):
+        self.exporter_name = exporter_name
+        self.output_dir = output_dir
+        self.overwrite = overwrite
+        self.on_finished = on_finished
+        self.items = []
+        self._futures = {}  # item -> Future, for the items not yet finished
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="conversion queue")
+
+    def add(self, paths, ws_codes=None, replace_output=False):
+        """
+        Queue files for conversion. Files already in the queue and not finished are not added again.
+
+        ws_codes, replace_output: as for BatchItem.
+
+        Returns:
+            list: the BatchItems added.
+        """
+
+        with self._lock:
+            queued = {os.path.normcase(os.path.abspath(item.path)) for item in self.items if not item.is_finished}
+        added = []
+        for path in paths:
+            key = os.path.normcase(os.path.abspath(path))
+            if key in queued:
+                continue
+            queued.add(key)
+            item = BatchItem(path, ws_codes)
+            item.replace_output = replace_output
+            with self._lock:
+                self.items.append(item)
+            self.submit(item)
+            added.append(item)
+        return added
+
+    def retry(self, item, ws_codes=None):
+        """
+        Convert a finished item again, e.g. with writing system codes, or after fixing the file.
+        """
+
+        if not item.is_finished:
+            return
+        if ws_codes is not None:
+            item.ws_codes = ws_codes
+        item.reset()
+        self.submit(item)
+
+    def submit(self, item):
+        with self._lock:    # so _run cannot remove the future before it is stored
+            self._futures[item] = self._pool.submit(self._run, item)
+
+    def _run(self, item):
+        try:
+            convert_item(item, self.exporter_name, self.output_dir, self.overwrite)
+            if self.on_finished is not None:
+                self.on_finished(item)
+        finally:
+            with self._lock:
+                self._futures.pop(item, None)
+
+    def cancel(self, item):
+        """
+        Stop converting an item: it is not started if still waiting, and stops before its next block if running.
+        """
+
+        item.cancel_token.cancel()
+        with self._lock:
+            future = self._futures.get(item)
+            if future is not None and future.cancel():
+                del self._futures[item]
+                item.set_status(CANCELLED, "Not started.")
+
+    def cancel_all(self):
+        for item in list(self.items):
+            if not item.is_finished:
+                self.cancel(item)
+
+    def remove_converted(self):
+        """
+        Remove the converted items from the queue. Returns them.
+        """
+
+        with self._lock:
+            removed = [item for item in self.items if item.status == CONVERTED]
+            self.items = [item for item in self.items if item.status != CONVERTED]
+        return removed
+
+    @property
+    def is_busy(self):
+        with self._lock:
+            if self._futures:   # (includes items finished but not yet passed to on_finished)
+                return True
+        return any(not item.is_finished for item in self.items)
+
+    def counts(self):
+        """
+        Returns {status: number of items}.
+        """
+
+        counts = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return counts
+
+    def shutdown(self, wait=False):
+        """
+        Cancel everything and let the worker threads end (waiting for them if wait is True).
+        """
+
+        self.cancel_all()
+        self._pool.shutdown(wait=wait)
+
+
+class Journal:
+    """
+    A checkpoint journal of batch conversions, so an interrupted run can be resumed.
+
+    An append-only JSON Lines file, with one entry per finished file:
+        {"input": ..., "size": ..., "mtime_ns": ..., "sha256": ..., "format": "flextext",
+         "output": ..., "status": "Converted", "message": "", "started": "2025-01-31T12:00:00Z",
+         "seconds": 1.2, "warnings": 3, "first_warnings": [...]}
+    The latest entry for an input counts. Each entry is written as one line and flushed to
+    disk before the next, and only after the output file is in place. A line cut short by a
+    crash is removed when the journal is next opened, so the journal is always readable.
+
+    Usage:
+        with Journal('journal.jsonl') as journal:
+            if not journal.is_done(path, output_path):
+                ...
+                journal.record(item, 'flextext')
+    """
+
+    N_WARNINGS_KEPT = 5     # first warnings of each file kept in its entry
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}   # input key -> latest entry
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _load(self):
+        """
+        Read the entries, and cut off a last line left incomplete by an interrupted run.
+        """
+
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b'\n') + 1     # end of the last complete line
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and 'input' in entry:
+                self.entries[self.key(entry['input'])] = entry
+        if end < len(data):
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+
+    def get(self, path):
+        """
+        Returns the latest entry for an input file, or None.
+        """
+
+        return self.entries.get(self.key(path))
+
+    def is_done(self, path, output_path):
+        """
+        True if the input was converted to output_path, has not changed since, and the output is still there.
+
+        The input counts as unchanged if its size and mtime are the same, or else its content hash.
+        """
+
+        entry = self.get(path)
+        if entry is None or entry['status'] != CONVERTED or entry['output'] != os.path.abspath(output_path):
+            return False
+        if not os.path.exists(output_path):
+            return False
+        try:
+            stat = os.stat(path)
+            if stat.st_size != entry['size']:
+                return False
+            return stat.st_mtime_ns == entry['mtime_ns'] or file_hash(path) == entry['sha256']
+        except OSError:
+            return False
+
+    def record(self, item, exporter_name):
+        """
+        Append the entry of a finished BatchItem, and flush it to disk.
+        """
+
+        size, mtime_ns = item.input_stat or (None, None)
+        sha256 = None
+        try:
+            stat = os.stat(item.path)
+            if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns):    # not changed while converting
+                sha256 = file_hash(item.path)
+        except OSError:
+            pass
+        entry = {
+            'input': os.path.abspath(item.path),
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'sha256': sha256,
+            'format': exporter_name,
+            'output': os.path.abspath(item.output_path) if item.output_path else None,
+            'status': item.status,
+            'message': item.message,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() - item.seconds)),
+            'seconds': round(item.seconds, 3),
+            'warnings': item.n_warnings,
+            'first_warnings': item.warnings[:self.N_WARNINGS_KEPT],
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.entries[self.key(item.path)] = entry
+
+
+def batch_inputs(paths):
+    """
+    Expand directories into the workbooks and CSV/TSV files in them (not in subdirectories).
+    """
+
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                extension = os.path.splitext(name)[1].lower()
+                if extension in BATCH_EXTENSIONS and not name.startswith('~$'):    # not Excel's lock files
+                    inputs.append(os.path.join(path, name))
+        else:
+            inputs.append(path)
+    return inputs
+
+
+# ======================================================================
+# --- CLI WRAPPER (Execution Block) ---
+# ======================================================================
+
+def cli_wrapper():
+    """Handles command-line arguments, the journal and errors."""
+
+    parser = argparse.ArgumentParser(
+        description="Convert many interlinear workbooks, recording each result in a journal "
+                    "so that an interrupted run can be resumed."
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="Workbooks (.xlsx) or CSV/TSV files, or folders of them.")
+    parser.add_argument("--to", choices=list(EXPORTERS), default="flextext",
+                        help="Output format (default: flextext).")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="Folder for the outputs (default: next to each input).")
+    parser.add_argument("--journal", default=None,
+                        help=f"Journal file (default: {DEFAULT_JOURNAL_NAME} in the output folder, "
+                             "or the current folder).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip inputs the journal has as converted and unchanged since; "
+                             "convert the rest, retrying failures.")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing output files.")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of files converted at the same time (default: {DEFAULT_WORKERS}).")
+    parser.add_argument("--ws-vernacular", default=None, help="Vernacular writing system code (default: from N2).")
+    parser.add_argument("--ws-gloss", default=None, help="Gloss writing system code (default: from N4).")
+    parser.add_argument("--ws-free", default=None, help="Free translation writing system code (default: from N3).")
+    args = parser.parse_args()
+
+    ws_codes = (args.ws_vernacular, args.ws_gloss, args.ws_free)
+    if any(ws_codes) and not all(ws_codes):
+        parser.error("give all three of --ws-vernacular, --ws-gloss and --ws-free, or none")
+    output_dir = os.path.abspath(args.output_dir) if args.output_dir else None
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    journal_path = args.journal or os.path.join(output_dir or os.getcwd(), DEFAULT_JOURNAL_NAME)
+
+    try:
+        journal = Journal(journal_path)
+    except OSError as e:
+        print(f"FATAL ERROR: Cannot open the journal '{journal_path}': {e}")
+        sys.exit(1)
+
+    inputs = batch_inputs(args.inputs)
+    to_convert = []
+    n_resumed = 0
+    for path in inputs:
+        output_path = output_path_for(path, args.to, output_dir)
+        if args.resume and journal.is_done(path, output_path):
+            n_resumed += 1
+        else:
+            to_convert.append(path)
+    print(f"{len(inputs)} input file(s): {len(to_convert)} to convert"
+          + (f", {n_resumed} already converted (journal '{journal_path}')" if args.resume else "") + ".")
+
+    print_lock = threading.Lock()
+    n_finished = 0
+    journal_error = []
+
+    def finished(item):
+        nonlocal n_finished
+        try:
+            journal.record(item, args.to)
+        except OSError as e:
+            journal_error.append(e)
+            queue.cancel_all()
+        with print_lock:
+            n_finished += 1
+            name = os.path.basename(item.path)
+            if item.status == CONVERTED:
+                print(f"[{n_finished}/{len(to_convert)}] {item.status}: {name} -> "
+                      f"{os.path.basename(item.output_path)} ({item.n_warnings} warning(s), {item.seconds:.1f} s)")
+            else:
+                print(f"[{n_finished}/{len(to_convert)}] {item.status}: {name}. {item.message}")
+
+    cancel_token = CancelToken()
+    install_sigint_handler(cancel_token)
+    queue = ConversionQueue(args.to, workers=max(args.jobs, 1), output_dir=output_dir, overwrite=args.overwrite,
+                            on_finished=finished)
+    for path in to_convert:
+        # an output of an earlier run, whose input has changed since, is replaced
+        entry = journal.get(path)
+        replace_output = args.resume and entry is not None and entry['status'] == CONVERTED and \
+            entry['output'] == os.path.abspath(output_path_for(path, args.to, output_dir))
+        queue.add([path], ws_codes if all(ws_codes) else None, replace_output)
+    try:
+        while queue.is_busy:
+            if cancel_token.is_cancelled:
+                queue.cancel_all()
+            time.sleep(0.1)
+    finally:
+        queue.shutdown(wait=True)
+        journal.close()
+
+    counts = queue.counts()
+    print()
+    print(", ".join(f"{count} {status.lower()}" for status, count in counts.items()) or "Nothing to convert.")
+    if journal_error:
+        print(f"FATAL ERROR: Cannot write to the journal '{journal_path}': {journal_error[0]}")
+        sys.exit(1)
+    if cancel_token.is_cancelled:
+        print("CANCELLED: Run again with --resume to convert the rest.")
+        sys.exit(130)
+    if counts.get(FAILED) or counts.get(NEEDS_CODES):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli_wrapper()
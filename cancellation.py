@@ -0,0 +1,67 @@
+import signal
+import threading
+
+
+class OperationCancelled(Exception):
+    """
+    Raised when a load or conversion stops because its CancelToken was cancelled.
+
+    The message describes how far the operation got.
+    """
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag, shared between the code doing the work and the code
+    that may want to stop it (a GUI button, a Ctrl-C handler, another thread).
+
+    The working code calls check() (or reads is_cancelled) at convenient points,
+    e.g. between interlinear blocks, so it can stop cleanly and report its progress.
+
+    Usage:
+        token = CancelToken()
+        ...
+        token.cancel()  # from elsewhere
+        ...
+        token.check("block 12 of 200")  # raises OperationCancelled("block 12 of 200")
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def reset(self):
+        self._event.clear()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def check(self, where=""):
+        """
+        Raise OperationCancelled if cancellation was requested.
+
+        where: description of the progress so far, used as the exception message.
+        """
+
+        if self._event.is_set():
+            raise OperationCancelled(where)
+
+
+def install_sigint_handler(token):
+    """
+    Make the first Ctrl-C cancel token instead of raising KeyboardInterrupt.
+
+    The default handler is restored after the first Ctrl-C, so a second Ctrl-C
+    still interrupts the program if it is stuck somewhere that does not check the token.
+    Returns the previous handler, for use with signal.signal() to undo this.
+    """
+
+    def handler(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("\nCancelling... (press Ctrl-C again to stop immediately)")
+        token.cancel()
+
+    return signal.signal(signal.SIGINT, handler)
@@ -0,0 +1,61 @@
+"""
+Clean text from spreadsheet cells: whitespace stripped, Unicode NFC-normalized, and interned.
+
+Words and glosses such as "1SG", "and" or "then" repeat thousands of times in a text and
+across a corpus. clean_cell_value memoizes the cleaned text of each distinct raw value in a
+bounded cache and interns it, so equal words share one string object (in the XML tree, the
+concordance, ...), and each distinct value is stripped and normalized only once.
+
+NFC normalization also means that a word typed with precomposed characters in one cell and
+with combining marks in another (e.g. pasted from different keyboards) is the same word
+to FLEx, which does not treat mixed NFC/NFD text as equal.
+"""
+import sys
+import unicodedata
+
+CELL_CACHE_SIZE = 65536     # distinct cell texts remembered (a few MB at most); the cache is emptied when full
+INTERN_MAX_LENGTH = 64      # longer text (e.g. free translations) is rarely repeated, so is not cached
+
+_cache = {}     # raw cell text -> cleaned, interned text
+
+
+def normalize_text(text):
+    """
+    Returns text stripped of surrounding whitespace and in Unicode NFC form.
+    """
+
+    text = text.strip()
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    return text
+
+
+def clean_cell_value(value):
+    """
+    Returns the cleaned text of a cell value (any type), or None for an empty cell.
+
+    Equal short texts give the same (interned) string object.
+    """
+
+    text = _cache.get(value)
+    if text is not None:
+        return text
+    if value is None:
+        return None
+    if value.__class__ is not str:     # numbers, dates, ... (not cached: 1, 1.0 and True are equal keys)
+        return normalize_text(str(value))
+    text = normalize_text(value)
+    if len(value) <= INTERN_MAX_LENGTH:
+        text = sys.intern(text)
+        if len(_cache) >= CELL_CACHE_SIZE:
+            _cache.clear()
+        _cache[value] = text
+    return text
+
+
+def clear_cache():
+    """
+    Forget all cached cell texts.
+    """
+
+    _cache.clear()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Persistent vernacular-gloss concordance, for checking gloss consistency across many texts.
+
+The index records every (vernacular word, gloss) pair read from each workbook, with its
+cell, in an SQLite database. Files are re-read only when they change (size and mtime,
+then content hash), so updating the index over thousands of texts is quick, and
+excel_to_xml.py --concordance adds each file as it is converted.
+
+Usage:
+    python concordance.py update texts/                 # index all workbooks under texts/
+    python concordance.py report                        # words glossed differently
+    python concordance.py report --json --min-glosses 3
+    python concordance.py lookup ninya                  # glosses and cells of one word
+    python concordance.py prune                         # forget files that no longer exist
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import unicodedata
+
+from itertools import groupby
+
+from snapshot_cache import default_cache_dir, file_hash
+from validator import DELIMITED_EXTENSIONS
+
+INDEXED_EXTENSIONS = ('.xlsx',) + DELIMITED_EXTENSIONS
+
+
+def word_key(word):
+    """
+    Returns the form of a word used to group its occurrences: NFC-normalized, stripped and case-folded.
+    """
+
+    return unicodedata.normalize('NFC', word).strip().casefold()
+
+
+def cell_name(row, col):
+    """
+    Returns a cell reference such as 'E26'.
+    """
+
+    from openpyxl.utils.cell import get_column_letter
+    return f"{get_column_letter(col)}{row}"
+
+
+class ConcordanceIndex:
+    """
+    On-disk index of word -> gloss -> occurrences (file, row, col).
+
+    Usage:
+        index = ConcordanceIndex()              # or ConcordanceIndex('project.sqlite3')
+        index.update_file('text1.xlsx')         # re-reads the file only if it changed
+        for word, glosses in index.divergent_words():
+            ...
+        index.close()
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path if db_path else os.path.join(default_cache_dir(), 'concordance.sqlite3')
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER, mtime_ns INTEGER, hash TEXT, indexed_at REAL);
+            CREATE TABLE IF NOT EXISTS occurrences (
+                file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+                word_key TEXT NOT NULL, word TEXT NOT NULL, gloss TEXT NOT NULL,
+                row INTEGER NOT NULL, col INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS occurrences_word ON occurrences(word_key, gloss);
+            CREATE INDEX IF NOT EXISTS occurrences_file ON occurrences(file_id);
+        """)
+        self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.connection.execute("PRAGMA foreign_keys = ON")
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def normalize_path(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def file_state(self, path):
+        """
+        Returns (id, size, mtime_ns, hash) of an indexed file, or None.
+        """
+
+        return self.connection.execute(
+            "SELECT id, size, mtime_ns, hash FROM files WHERE path = ?", (self.normalize_path(path),)).fetchone()
+
+    def is_unchanged(self, path):
+        """
+        Returns True if the file is indexed and has not changed since.
+
+        A file whose mtime changed but whose contents did not is still unchanged (and its mtime is updated).
+        """
+
+        state = self.file_state(path)
+        if state is None:
+            return False
+        file_id, size, mtime_ns, content_hash = state
+        stat = os.stat(path)
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime_ns:
+            return True
+        if file_hash(path) != content_hash:
+            return False
+        with self.connection:
+            self.connection.execute("UPDATE files SET mtime_ns = ? WHERE id = ?", (stat.st_mtime_ns, file_id))
+        return True
+
+    def record(self, path, word_occurrences):
+        """
+        Replace the index entries of a file with its (word, gloss, row, col) occurrences,
+        as collected by ExcelInterlinearLoader.word_occurrences.
+        """
+
+        stat = os.stat(path)
+        content_hash = file_hash(path)
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO files (path, size, mtime_ns, hash, indexed_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "hash = excluded.hash, indexed_at = excluded.indexed_at",
+                (self.normalize_path(path), stat.st_size, stat.st_mtime_ns, content_hash, time.time()))
+            file_id = self.file_state(path)[0]
+            self.connection.execute("DELETE FROM occurrences WHERE file_id = ?", (file_id,))
+            self.connection.executemany(
+                "INSERT INTO occurrences (file_id, word_key, word, gloss, row, col) VALUES (?, ?, ?, ?, ?, ?)",
+                ((file_id, word_key(word), word, gloss, row, col) for word, gloss, row, col in word_occurrences))
+
+    def update_file(self, path, cancel_token=None):
+        """
+        Index a workbook (or CSV/TSV export) if it is new or has changed.
+
+        Returns:
+            str: 'unchanged' or 'indexed'
+        """
+
+        if self.is_unchanged(path):
+            return 'unchanged'
+        from InterlinearLoaders import ExcelInterlinearLoader, DelimitedInterlinearLoader
+        if os.path.splitext(path)[1].lower() == '.xlsx':
+            loader = ExcelInterlinearLoader(path, cancel_token, backend='raw')
+        else:
+            loader = DelimitedInterlinearLoader(path, cancel_token=cancel_token)
+        loader.word_occurrences = []
+        loader.run()
+        self.record(path, loader.word_occurrences)
+        return 'indexed'
+
+    def prune(self):
+        """
+        Remove files that no longer exist from the index. Returns the number removed.
+        """
+
+        missing = [(file_id,) for file_id, path in self.connection.execute("SELECT id, path FROM files")
+                   if not os.path.exists(path)]
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE id = ?", missing)
+        return len(missing)
+
+    def lookup(self, word):
+        """
+        Returns {gloss: [(path, row, col), ...]} for all occurrences of a word.
+        """
+
+        glosses = {}
+        for gloss, path, row, col in self.connection.execute(
+                "SELECT o.gloss, f.path, o.row, o.col FROM occurrences o JOIN files f ON f.id = o.file_id "
+                "WHERE o.word_key = ? ORDER BY o.gloss, f.path, o.row, o.col", (word_key(word),)):
+            glosses.setdefault(gloss, []).append((path, row, col))
+        return glosses
+
+    def divergent_words(self, min_glosses=2, examples=3):
+        """
+        Yield the words with at least min_glosses different (non-empty) glosses, most glosses first.
+
+        Yields:
+            tuple: (word, [(gloss, number of occurrences, number of files, [(path, row, col), ...]), ...])
+                with up to `examples` occurrences per gloss, most frequent gloss first.
+        """
+
+        # one query: the words, the counts of each of their glosses, and the first example cells of each
+        # gloss (numbered with a window function), one row per example (or per gloss, without examples)
+        rows = self.connection.execute("""
+            WITH words AS (
+                SELECT word_key, MIN(word) AS word, COUNT(DISTINCT gloss) AS n_glosses FROM occurrences
+                WHERE gloss != '' GROUP BY word_key HAVING n_glosses >= ?),
+            glossed AS (
+                SELECT o.word_key, o.gloss, o.file_id, f.path, o.row, o.col,
+                    ROW_NUMBER() OVER (PARTITION BY o.word_key, o.gloss ORDER BY f.path, o.row, o.col) AS example,
+                    COUNT(*) OVER (PARTITION BY o.word_key, o.gloss) AS n_occurrences
+                FROM occurrences o JOIN words w ON w.word_key = o.word_key JOIN files f ON f.id = o.file_id
+                WHERE o.gloss != ''),
+            glosses AS (
+                SELECT word_key, gloss, MAX(n_occurrences) AS n_occurrences, COUNT(DISTINCT file_id) AS n_files
+                FROM glossed GROUP BY word_key, gloss)
+            SELECT w.word_key, w.word, g.gloss, g.n_occurrences, g.n_files, e.path, e.row, e.col
+            FROM words w JOIN glosses g ON g.word_key = w.word_key
+                LEFT JOIN glossed e ON e.word_key = g.word_key AND e.gloss = g.gloss AND e.example <= ?
+            ORDER BY w.n_glosses DESC, w.word_key, g.n_occurrences DESC, g.gloss, e.example""",
+            (min_glosses, examples))
+        for (_, word), word_rows in groupby(rows, key=lambda row: row[:2]):
+            glosses = []
+            for (gloss, n_occurrences, n_files), gloss_rows in groupby(word_rows, key=lambda row: row[2:5]):
+                cells = [(path, row, col) for *_, path, row, col in gloss_rows if path is not None]
+                glosses.append((gloss, n_occurrences, n_files, cells))
+            yield word, glosses
+
+    def stats(self):
+        """
+        Returns (number of files, number of occurrences, number of distinct words).
+        """
+
+        n_files = self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        n_occurrences, n_words = self.connection.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT word_key) FROM occurrences").fetchone()
+        return n_files, n_occurrences, n_words
+
+
+def find_input_files(paths):
+    """
+    Yield the files to index: the given files, and the workbooks/exports under the given directories.
+
+    In directories, .txt files that look like this program's outputs are left out: error logs
+    (*_processing_errors.txt), and plain-text exports next to a workbook of the same name.
+    """
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                base_names = {os.path.splitext(name)[0] for name in files
+                              if name.lower().endswith(INDEXED_EXTENSIONS) and not name.lower().endswith('.txt')}
+                for name in sorted(files):
+                    if not name.lower().endswith(INDEXED_EXTENSIONS) or name.startswith('~$'):
+                        continue
+                    if name.lower().endswith('.txt') and (name.endswith('_processing_errors.txt') or
+                                                          os.path.splitext(name)[0] in base_names):
+                        continue
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+# ======================================================================
+# --- CLI ---
+# ======================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Index vernacular words and glosses across texts, "
+                                                 "and report words glossed inconsistently.")
+    parser.add_argument("--db", default=None, help="Index database file (default: in the user cache directory).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="Index new and changed workbooks.")
+    update.add_argument("paths", nargs='+', help="Workbooks (.xlsx), CSV/TSV exports, or directories of them.")
+    report = commands.add_parser("report", help="List words with different glosses.")
+    report.add_argument("--min-glosses", type=int, default=2, help="Only words with at least this many glosses.")
+    report.add_argument("--examples", type=int, default=3, help="Example cells shown per gloss.")
+    report.add_argument("--json", action="store_true", help="Output JSON.")
+    lookup = commands.add_parser("lookup", help="Show the glosses and cells of a word.")
+    lookup.add_argument("word")
+    commands.add_parser("prune", help="Remove files that no longer exist from the index.")
+    args = parser.parse_args()
+
+    index = ConcordanceIndex(args.db)
+    try:
+        if args.command == "update":
+            counts = {'indexed': 0, 'unchanged': 0, 'failed': 0}
+            for path in find_input_files(args.paths):
+                try:
+                    result = index.update_file(path)
+                except Exception as e:
+                    cause = f" ({e.__cause__})" if e.__cause__ is not None else ""
+                    print(f"ERROR: {path}: {e}{cause}")
+                    result = 'failed'
+                counts[result] += 1
+                if result == 'indexed':
+                    print(f"Indexed: {path}")
+            n_files, n_occurrences, n_words = index.stats()
+            print(f"\n{counts['indexed']} indexed, {counts['unchanged']} unchanged, {counts['failed']} failed. "
+                  f"Index: {n_files} files, {n_occurrences} words ({n_words} distinct).")
+            sys.exit(1 if counts['failed'] else 0)
+
+        elif args.command == "report":
+            words = index.divergent_words(args.min_glosses, args.examples)
+            if args.json:
+                print(json.dumps([
+                    {'word': word, 'glosses': [
+                        {'gloss': gloss, 'occurrences': n, 'files': n_files,
+                         'examples': [{'file': path, 'cell': cell_name(row, col)} for path, row, col in cells]}
+                        for gloss, n, n_files, cells in glosses]}
+                    for word, glosses in words], ensure_ascii=False, indent=2))
+                return
+            n_words = 0
+            for word, glosses in words:
+                n_words += 1
+                print(f"{word}")
+                for gloss, n, n_files, cells in glosses:
+                    examples = ", ".join(f"{os.path.basename(path)}!{cell_name(row, col)}" for path, row, col in cells)
+                    print(f"    {gloss!r}: {n} time(s) in {n_files} file(s), e.g. {examples}")
+            print(f"\n{n_words} word(s) with {args.min_glosses} or more different glosses.")
+
+        elif args.command == "lookup":
+            glosses = index.lookup(args.word)
+            if not glosses:
+                print(f"'{args.word}' is not in the index.")
+            for gloss, cells in glosses.items():
+                print(f"{gloss!r}: {len(cells)} time(s)")
+                for path, row, col in cells:
+                    print(f"    {path}!{cell_name(row, col)}")
+
+        elif args.command == "prune":
+            print(f"Removed {index.prune()} missing file(s) from the index.")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import os
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, simpledialog
+
+from batch_convert import ConversionQueue, CONVERTED, NEEDS_CODES, FAILED, CANCELLED, DEFAULT_WORKERS
+from exporters import EXPORTERS, exporter_by_label
+from validator import WRITING_SYSTEM_PATTERN
+
+
+def progress_bar(fraction, width=10):
+    """
+    A progress bar drawn with block characters, for a Treeview cell, e.g. '█████░░░░░  50%'.
+    """
+
+    n_full = int(round(fraction * width))
+    return '█' * n_full + '░' * (width - n_full) + f" {fraction:4.0%}"
+
+
+class WritingSystemsDialog(simpledialog.Dialog):
+    """
+    Asks for the three writing system codes, for files whose N2:N4 codes are missing or invalid.
+
+    dialog.result is (vernacular, gloss, free), or None if cancelled.
+    """
+
+    LABELS = ("Vernacular writing system:", "Gloss writing system:", "Free trans. writing system:")
+
+    def __init__(self, parent, codes=("", "", "")):
+        self.codes = codes
+        super().__init__(parent, title="Writing system codes")
+
+    def body(self, master):
+        ttk.Label(master, text="Use the Code from FLEx's Writing Systems dialog, e.g. 'en' or 'qaa-x-abc'.").grid(
+            row=0, column=0, columnspan=2, pady=5, sticky='w')
+        self.entries = []
+        for i, (label, code) in enumerate(zip(self.LABELS, self.codes), start=1):
+            ttk.Label(master, text=label).grid(row=i, column=0, padx=5, pady=2, sticky='w')
+            entry = ttk.Entry(master, width=20)
+            entry.insert(0, code)
+            entry.grid(row=i, column=1, padx=5, pady=2)
+            self.entries.append(entry)
+        return self.entries[0]
+
+    def validate(self):
+        codes = [entry.get().strip() for entry in self.entries]
+        for label, code in zip(self.LABELS, codes):
+            if not WRITING_SYSTEM_PATTERN.match(code):
+                messagebox.showerror("Writing system codes", f"{label} '{code}' is not a valid code.", parent=self)
+                return False
+        self.codes = tuple(codes)
+        return True
+
+    def apply(self):
+        self.result = self.codes
+
+
+class ConversionQueueWindow(tk.Toplevel):
+    """
+    A window for converting many files at once.
+
+    Files added (through a multi-select dialog) are converted by a batch_convert.ConversionQueue
+    in background threads, a few at a time, while this window polls their status with after().
+    Files with valid writing system codes in N2:N4 are converted without any more questions;
+    the others wait as "Needs writing systems" until codes are entered for them.
+
+    The list shows each file's status, a progress bar, the number of load warnings and the
+    output path; the selected file's warnings and any error are shown below it.
+    """
+
+    POLL_MS = 100
+    FILE_TYPES = [("Excel and CSV/TSV files", "*.xlsx *.csv *.tsv *.tab *.txt"), ("All files", "*.*")]
+
+    def __init__(self, parent, output_label=None, workers=DEFAULT_WORKERS):
+        super().__init__(parent)
+        self.title("Convert many files")
+        labels = [exporter.LABEL for exporter in EXPORTERS.values()]
+        output_label = output_label if output_label in labels else labels[0]
+        self.queue = ConversionQueue(exporter_by_label(output_label).NAME, workers=workers)
+        self.versions = {}      # Treeview iid -> BatchItem.version shown
+        self._after_id = None
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.mainframe = ttk.Frame(self, padding="10 10 10 10")
+        self.mainframe.grid(row=0, column=0, sticky=(tk.N, tk.W, tk.E, tk.S))
+
+        # Settings
+        self.outputFormatLabel = ttk.Label(self.mainframe, text="Output Format:")
+        self.outputFormatLabel.grid(row=0, column=0, pady=5, padx=5, sticky='w')
+        self.outputFormatCombo = ttk.Combobox(self.mainframe, values=labels, state='readonly')
+        self.outputFormatCombo.set(output_label)
+        self.outputFormatCombo.bind('<<ComboboxSelected>>', lambda e: self.settings_changed())
+        self.outputFormatCombo.grid(row=0, column=1, pady=5, padx=5, sticky=(tk.W, tk.E))
+        self.outputDirLabel = ttk.Label(self.mainframe, text="Output folder:")
+        self.outputDirLabel.grid(row=1, column=0, pady=5, padx=5, sticky='w')
+        self.outputDir = ttk.Label(self.mainframe, text="(next to each input file)")
+        self.outputDir.grid(row=1, column=1, pady=5, padx=5, sticky='w')
+        self.outputDirButton = ttk.Button(self.mainframe, text="Choose folder...", command=self.choose_output_dir)
+        self.outputDirButton.grid(row=1, column=2, pady=5, padx=5, sticky=(tk.W, tk.E))
+        self.overwrite = tk.BooleanVar(value=False)
+        self.overwriteCheck = ttk.Checkbutton(
+            self.mainframe, text="Replace existing output files", variable=self.overwrite,
+            command=self.settings_changed)
+        self.overwriteCheck.grid(row=2, column=1, pady=5, padx=5, sticky='w')
+
+        # Actions
+        self.buttonFrame = ttk.Frame(self.mainframe)
+        self.buttonFrame.grid(row=3, column=0, columnspan=3, pady=5, sticky=(tk.W, tk.E))
+        for column, (text, command) in enumerate((
+                ("Add files...", self.add_files),
+                ("Enter writing systems...", self.enter_writing_systems),
+                ("Retry selected", self.retry_selected),
+                ("Cancel selected", self.cancel_selected),
+                ("Cancel all", self.queue.cancel_all),
+                ("Clear converted", self.clear_converted))):
+            ttk.Button(self.buttonFrame, text=text, command=command).grid(row=0, column=column, padx=5)
+
+        # File list
+        self.tree = ttk.Treeview(
+            self.mainframe, columns=('file', 'status', 'progress', 'warnings', 'output'), show='headings',
+            height=12, selectmode='extended')
+        for column, heading, width, stretch in (
+                ('file', "File", 200, True), ('status', "Status", 140, False),
+                ('progress', "Progress", 120, False), ('warnings', "Warnings", 70, False),
+                ('output', "Output", 250, True)):
+            self.tree.heading(column, text=heading, anchor='w')
+            self.tree.column(column, width=width, minwidth=40, stretch=stretch)
+        self.tree.tag_configure(FAILED, foreground='#b00020')
+        self.tree.tag_configure(NEEDS_CODES, foreground='#a05a00')
+        self.tree.tag_configure(CANCELLED, foreground='#606060')
+        self.tree.bind('<<TreeviewSelect>>', lambda e: self.show_details())
+        self.tree.grid(row=4, column=0, columnspan=3, sticky=(tk.N, tk.S, tk.W, tk.E))
+        self.treeScrollbar = ttk.Scrollbar(self.mainframe, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.treeScrollbar.set)
+        self.treeScrollbar.grid(row=4, column=3, sticky=(tk.N, tk.S))
+        self.summaryLabel = ttk.Label(self.mainframe, text="Add files to convert them.")
+        self.summaryLabel.grid(row=5, column=0, columnspan=3, pady=5, padx=5, sticky='w')
+
+        # Details of the selected file
+        default_font = ttk.Style().lookup('TLabel', 'font')
+        self.details = tk.Text(
+            self.mainframe, wrap='word', height=5, width=50, state='disabled',
+            borderwidth=2, relief='sunken', font=default_font)
+        self.details.grid(row=6, column=0, columnspan=4, pady=5, sticky=(tk.N, tk.S, tk.W, tk.E))
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.mainframe.columnconfigure(1, weight=1)
+        self.mainframe.rowconfigure(4, weight=3)
+        self.mainframe.rowconfigure(6, weight=1)
+
+    def settings_changed(self):
+        """
+        Apply the output settings to the files not started yet.
+        """
+
+        self.queue.exporter_name = exporter_by_label(self.outputFormatCombo.get()).NAME
+        self.queue.overwrite = self.overwrite.get()
+
+    def choose_output_dir(self):
+        directory = filedialog.askdirectory(title="Write the outputs to", parent=self)
+        if directory:
+            self.queue.output_dir = directory
+            self.outputDir.config(text=directory)
+
+    def add_files(self, paths=None):
+        """
+        Queue files for conversion (from a multi-select dialog if paths is not given).
+        """
+
+        if paths is None:
+            paths = filedialog.askopenfilenames(title="Convert files", filetypes=self.FILE_TYPES, parent=self)
+        self.settings_changed()
+        for item in self.queue.add(paths):
+            iid = str(id(item))
+            self.tree.insert('', 'end', iid=iid, values=(os.path.basename(item.path), '', '', '', ''))
+        self.poll()
+
+    def selected_items(self):
+        by_iid = {str(id(item)): item for item in self.queue.items}
+        return [by_iid[iid] for iid in self.tree.selection() if iid in by_iid]
+
+    def enter_writing_systems(self):
+        """
+        Ask for writing system codes and convert the selected files that need them
+        (or all such files, if none is selected).
+        """
+
+        items = [item for item in self.selected_items() if item.status == NEEDS_CODES]
+        if not items:
+            items = [item for item in self.queue.items if item.status == NEEDS_CODES]
+        if not items:
+            messagebox.showinfo("Writing system codes", "No files are waiting for writing system codes.", parent=self)
+            return
+        dialog = WritingSystemsDialog(self, items[0].ws_codes or ("", "", ""))
+        if dialog.result is None:
+            return
+        self.settings_changed()
+        for item in items:
+            self.queue.retry(item, dialog.result)
+        self.poll()
+
+    def retry_selected(self):
+        self.settings_changed()
+        for item in self.selected_items():
+            if item.status != CONVERTED:
+                self.queue.retry(item)
+        self.poll()
+
+    def cancel_selected(self):
+        for item in self.selected_items():
+            self.queue.cancel(item)
+        self.poll()
+
+    def clear_converted(self):
+        """
+        Remove the converted files from the list.
+        """
+
+        for item in self.queue.remove_converted():
+            self.tree.delete(str(id(item)))
+            self.versions.pop(str(id(item)), None)
+        self.refresh_summary()
+
+    def poll(self):
+        """
+        Update the rows of the files that changed, and poll again while files are being converted.
+        """
+
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        for item in list(self.queue.items):
+            iid = str(id(item))
+            version = item.version
+            if self.versions.get(iid) == version:
+                continue
+            self.versions[iid] = version
+            warnings = str(item.n_warnings) if item.status == CONVERTED else ''
+            self.tree.item(iid, values=(
+                os.path.basename(item.path), item.status, progress_bar(item.progress), warnings,
+                item.output_path or ''), tags=(item.status,))
+        self.refresh_summary()
+        self.show_details()
+        if self.queue.is_busy:
+            self._after_id = self.after(self.POLL_MS, self.poll)
+
+    def refresh_summary(self):
+        counts = self.queue.counts()
+        n = len(self.queue.items)
+        if n:
+            self.summaryLabel.config(text=f"{n} file(s): " + ", ".join(
+                f"{count} {status.lower()}" for status, count in counts.items()))
+        else:
+            self.summaryLabel.config(text="Add files to convert them.")
+
+    def show_details(self):
+        """
+        Show the full path, message and load warnings of the selected file.
+        """
+
+        items = self.selected_items()
+        lines = []
+        if len(items) == 1:
+            item = items[0]
+            lines.append(item.path)
+            if item.message:
+                lines.append(f"{item.status}: {item.message}")
+            if item.output_path and item.status == CONVERTED:
+                lines.append(f"Written to {item.output_path} ({item.seconds:.1f} s)")
+            lines.extend(f"⚠️ {warning}" for warning in item.warnings)
+        text = '\n'.join(lines)
+        if text != self.details.get('1.0', 'end-1c'):
+            self.details.config(state='normal')
+            self.details.delete('1.0', 'end')
+            self.details.insert('1.0', text)
+            self.details.config(state='disabled')
+
+    def close(self):
+        if self.queue.is_busy and not messagebox.askyesno(
+                "Convert many files", "Stop converting the files not finished yet?", parent=self):
+            return
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self.queue.shutdown()
+        self.destroy()
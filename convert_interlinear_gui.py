@@ -2,13 +2,22 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
 import os
+import time
 import traceback
-from xml.etree.ElementTree import tostring
-from xml.dom import minidom
 
-from InterlinearLoaders import ExcelInterlinearLoader
-from excel_to_xml import convert_excel_to_xml_dom
-from xml_to_flextext import transform_to_flextext_dom
+from InterlinearLoaders import ExcelInterlinearLoader, DelimitedInterlinearLoader, SnapshotInterlinearLoader
+from snapshot_cache import SnapshotCache
+from conversion_queue_view import ConversionQueueWindow
+from diagnostics_view import DiagnosticsView
+from interlinear_preview import InterlinearPreview
+from cancellation import OperationCancelled
+from resource_limits import ResourceLimitExceeded
+from engine_selection import choose_engine
+from progress import CallbackProgress, DEFAULT_RATE_HZ
+from excel_to_xml import convert_excel_to_xml_dom, quick_look
+from exporters import EXPORTERS, exporter_by_label, export
+from intermediate_jsonl import xml_to_records
+from speculative_conversion import SpeculativeConversion
 
 
 class Converter(tk.Tk):
@@ -21,12 +30,21 @@ class Converter(tk.Tk):
 
         super().__init__()
         self.AFTER_DELAY_MS = 1 # milliseconds. For allowing GUI & progressbar to update during processing
+        self.LOAD_STEP_BUDGET_S = 1 / DEFAULT_RATE_HZ # seconds of loading steps between progressbar updates
+        self.SPECULATIVE_POLL_MS = 50   # how often Convert checks whether the background conversion is done
+        self.QUICK_LOOK_LINES = 20  # lines read and previewed before the whole file is loaded
         self.title("Interlinear Converter")
         self.intermediate_xml = None
         self.is_data_loaded = False
         self.writing_systems_ready = False
         self.inputFileName = None
         self.loader = None
+        self.loaderKind = None  # key for snapshotCache: 'excel' or 'delimited'
+        self.snapshotCache = SnapshotCache()
+        self.engineChoice = None    # engine_selection.EngineChoice for the loaded file
+        self.speculativeConversion = None   # output prepared in the background, before Convert is clicked
+        self.queueWindow = None     # ConversionQueueWindow, for converting many files at once
+        self.protocol("WM_DELETE_WINDOW", self.close)
 
         self.mainframe = ttk.Frame(self, padding="10 10 10 10")
         self.mainframe.grid(row=0, column=0, sticky=(tk.N, tk.W, tk.E, tk.S))
@@ -34,7 +52,7 @@ class Converter(tk.Tk):
         # Input block
         self.inputFormatLabel = ttk.Label(self.mainframe, text="Input Format:")
         self.inputFormatLabel.grid(row=0, column=0, pady=5, padx=5)
-        self.inputFormatCombo = ttk.Combobox(self.mainframe, values=["Excel Interlinear"])
+        self.inputFormatCombo = ttk.Combobox(self.mainframe, values=["Excel Interlinear", "Delimited Interlinear (CSV/TSV)"])
         self.inputFormatCombo.bind('<<ComboboxSelected>>', lambda e: self.inputLoadButton.state(['!disabled']))
         self.inputFormatCombo.grid(row=0, column=1, pady=5, padx=5, sticky=(tk.W, tk.E))
         self.inputLoadButton = ttk.Button(
@@ -45,8 +63,12 @@ class Converter(tk.Tk):
         self.loadProgressLabel.grid(row=1, column=0, pady=5, padx=5, sticky=(tk.W, tk.E))
         self.loadProgress = ttk.Progressbar(
             self.mainframe, orient=tk.HORIZONTAL, mode='determinate', maximum=1.0)
-        self.loadProgress.grid(row=1, column=1, columnspan=2, pady=5, padx=5, sticky=(tk.W, tk.E))
+        self.loadProgress.grid(row=1, column=1, pady=5, padx=5, sticky=(tk.W, tk.E))
+        self.loadCancelButton = ttk.Button(self.mainframe, text="Cancel", command=self.load_file_cancel)
+        self.loadCancelButton.grid(row=1, column=2, pady=5, padx=5, sticky=(tk.W, tk.E))
         self.hide_load_progress()
+        self.queueButton = ttk.Button(self.mainframe, text="Convert many files...", command=self.open_queue_window)
+        self.queueButton.grid(row=2, column=2, pady=5, padx=5, sticky=(tk.W, tk.E))
 
         # Reminder
         reminderText = ' '.join([
@@ -86,11 +108,16 @@ class Converter(tk.Tk):
         self.extraSpace.grid(row=3, column=1)
         self.update_writing_systems()
 
+        # Interlinear preview of the loaded text (its first lines as soon as a file is selected)
+        self.preview = InterlinearPreview(self.mainframe, height=8)
+        self.preview.grid(row=5, column=0, columnspan=4, pady=5, padx=5, sticky=(tk.N, tk.S, tk.W, tk.E))
+
         # Output block
         self.outputFormatLabel = ttk.Label(self.mainframe, text="Output Format:")
         self.outputFormatLabel.grid(row=8, column=0, pady=5, padx=5)
-        self.outputFormatCombo = ttk.Combobox(self.mainframe, values=["FlexText Interlinear"])
-        self.outputFormatCombo.bind('<<ComboboxSelected>>', lambda e: self.update_convert_button_state())
+        self.outputFormatCombo = ttk.Combobox(
+            self.mainframe, values=[exporter.LABEL for exporter in EXPORTERS.values()], state='readonly')
+        self.outputFormatCombo.bind('<<ComboboxSelected>>', lambda e: self.output_format_changed())
         self.outputFormatCombo.grid(row=8, column=1, pady=5, padx=5, sticky=(tk.W, tk.E))
         self.convertButton = ttk.Button(self.mainframe, text="Select output file & convert", state='disabled', command=self.convert)
         self.convertButton.grid(row=8, column=2, pady=5, padx=5)
@@ -100,10 +127,15 @@ class Converter(tk.Tk):
         self.convertProgress.grid(row=9, column=1, columnspan=2, pady=5, padx=5, sticky=(tk.W, tk.E))
         self.hide_convert_progress()
 
+        # Load diagnostics (alignment errors etc.), which can number in the thousands
+        self.diagnosticsView = DiagnosticsView(self.mainframe, height=8)
+        self.diagnosticsView.grid(row=10, column=0, columnspan=4, pady=5, padx=5, sticky=(tk.N, tk.S, tk.W, tk.E))
+        self.diagnosticsView.bind('<<DiagnosticSelect>>', lambda e: self.show_diagnostic_in_preview())
+
         # Error display
         default_font = ttk.Style().lookup('TLabel', 'font') # because the tk.Text widget has a different default
         self.errorDisplay = tk.Text(
-            self.mainframe, wrap='word', height=9, width=50, state='disabled',
+            self.mainframe, wrap='word', height=5, width=50, state='disabled',
             borderwidth=2, relief='sunken', font=default_font,
             yscrollcommand=lambda *args: self.errorDisplayScrollbar.set(*args))
         self.errorDisplay.grid(row=11, column=0, columnspan=3, pady=5, padx=(5,0), sticky=(tk.N, tk.S, tk.W, tk.E))
@@ -115,7 +147,9 @@ class Converter(tk.Tk):
         self.rowconfigure(0, weight=1)
         # Make center column expand horizontally with main window
         self.mainframe.columnconfigure(1, weight=1)
-        # Make error message box expand vertically with main window
+        # Make preview, diagnostics list and error message box expand vertically with main window
+        self.mainframe.rowconfigure(5, weight=4)
+        self.mainframe.rowconfigure(10, weight=3)
         self.mainframe.rowconfigure(11, weight=1)
 
     def add_error_msg(self, errorString):
@@ -180,14 +214,10 @@ class Converter(tk.Tk):
         if self.is_data_loaded:
             metadata = self.intermediate_xml.find('text_metadata')
             if metadata is not None:
-                displayTextVernacular, isValidVernacular = self.get_one_writing_system(metadata.find('writing_system_vernacular'))
-                displayTextGloss, isValidGloss = self.get_one_writing_system(metadata.find('writing_system_gloss'))
-                displayTextFree, isValidFree = self.get_one_writing_system(metadata.find('writing_system_free'))
-                self.wsVernacular.config(text=displayTextVernacular)
-                self.wsGloss.config(text=displayTextGloss)
-                self.wsFree.config(text=displayTextFree)
-                self.writing_systems_ready = isValidVernacular and isValidGloss and isValidFree
-                if not self.writing_systems_ready:
+                self.writing_systems_ready = self.show_writing_systems(metadata)
+                if self.writing_systems_ready:
+                    self.start_speculative_conversion()
+                else:
                     self.add_error_msg("❌ All writing system codes must be valid in order to convert.")
             else:
                 self.add_error_msg("❌ Error: input file metadata not found")
@@ -199,13 +229,117 @@ class Converter(tk.Tk):
             self.wsGloss.config(text="(not loaded)")
             self.wsFree.config(text="(not loaded)")
 
+    def show_writing_systems(self, metadata):
+        """
+        Display the writing system codes of a <text_metadata> element.
+
+        Returns True if all three are valid.
+        """
+
+        displayTextVernacular, isValidVernacular = self.get_one_writing_system(metadata.find('writing_system_vernacular'))
+        displayTextGloss, isValidGloss = self.get_one_writing_system(metadata.find('writing_system_gloss'))
+        displayTextFree, isValidFree = self.get_one_writing_system(metadata.find('writing_system_free'))
+        self.wsVernacular.config(text=displayTextVernacular)
+        self.wsGloss.config(text=displayTextGloss)
+        self.wsFree.config(text=displayTextFree)
+        return isValidVernacular and isValidGloss and isValidFree
+
+    def show_diagnostic_in_preview(self):
+        """
+        Scroll the preview to the line of the selected diagnostic.
+        """
+
+        row = self.diagnosticsView.selected_row()
+        if row is not None:
+            self.preview.go_to_row(row)
+
+    def show_quick_look(self):
+        """
+        Read and show the metadata and first lines of the selected file, which takes milliseconds,
+        before the full load starts.
+        """
+
+        try:
+            xml_root, _ = quick_look(self.inputFileName, self.QUICK_LOOK_LINES, self.loaderKind)
+        except Exception:
+            return  # the full load reports the problem
+        metadata = xml_root.find('text_metadata')
+        if metadata is not None:
+            self.show_writing_systems(metadata)
+        self.preview.set_text(xml_root, note="(Loading the rest of the file...)")
+        self.update_idletasks()
+
+    def output_format_changed(self):
+        self.update_convert_button_state()
+        self.start_speculative_conversion()
+
+    def speculative_conversion_key(self):
+        """
+        Returns what a prepared conversion output depends on, besides the loaded data.
+        """
+
+        return (self.outputFormatCombo.get(), self.wsVernacular.cget('text'), self.wsGloss.cget('text'),
+                self.wsFree.cget('text'))
+
+    def start_speculative_conversion(self):
+        """
+        Start converting the loaded data in the background, so the output is ready
+        (or nearly) when the user clicks Convert.
+
+        Any previous speculative conversion is discarded, unless it is for the same output.
+        """
+
+        if not hasattr(self, 'outputFormatCombo'):
+            return  # (still in __init__)
+        key = self.speculative_conversion_key()
+        if self.speculativeConversion is not None:
+            if self.speculativeConversion.key == key:
+                return
+            self.discard_speculative_conversion()
+        if not (self.is_data_loaded and self.writing_systems_ready):
+            return
+        exporter = exporter_by_label(key[0])
+        if exporter is not None:
+            self.speculativeConversion = SpeculativeConversion(key, self.intermediate_xml, exporter.NAME, *key[1:])
+            self.speculativeConversion.start()
+
+    def discard_speculative_conversion(self):
+        if self.speculativeConversion is not None:
+            self.speculativeConversion.discard()
+            self.speculativeConversion = None
+
+    def open_queue_window(self):
+        """
+        Open the window for converting many files (or bring it to the front), and ask for files.
+        """
+
+        if self.queueWindow is None or not self.queueWindow.winfo_exists():
+            self.queueWindow = ConversionQueueWindow(self, self.outputFormatCombo.get())
+        self.queueWindow.lift()
+        self.queueWindow.add_files()
+
+    def close(self):
+        if self.queueWindow is not None and self.queueWindow.winfo_exists():
+            self.queueWindow.close()
+            if self.queueWindow.winfo_exists():
+                return  # the user chose to keep converting
+        self.discard_speculative_conversion()
+        self.destroy()
+
     def hide_load_progress(self):
         self.loadProgressLabel.config(text="")
         self.loadProgress.grid_remove()
+        self.loadCancelButton.grid_remove()
 
     def show_load_progress(self):
         self.loadProgressLabel.config(text="Loading...")
         self.loadProgress.grid()
+        self.loadCancelButton.state(['!disabled'])
+        self.loadCancelButton.grid()
+
+    def update_convert_progress(self, done, total, message=None):
+        self.convertProgress["value"] = done / total if total else 0.0
+        self.update_idletasks()
 
     def hide_convert_progress(self):
         self.convertProgressLabel.config(text="")
@@ -231,15 +365,20 @@ class Converter(tk.Tk):
         self.is_data_loaded = False
         self.intermediate_xml = None
         self.inputFileName = None
+        self.discard_speculative_conversion()
+        self.preview.clear()
         # delete error messages
         self.errorDisplay.config(state='normal')
         self.errorDisplay.delete('1.0', 'end')
         self.errorDisplay.config(state='disabled')
+        self.diagnosticsView.clear()
 
         # Check input type from dropdown
         formatString = self.inputFormatCombo.get()
         if formatString == "Excel Interlinear":
             filetypelist = [("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+        elif formatString == "Delimited Interlinear (CSV/TSV)":
+            filetypelist = [("CSV/TSV files", "*.csv *.tsv *.tab *.txt"), ("All files", "*.*")]
         else:
             # User should never get this error, because button is disabled until input type is selected.
             # Only if inputFormatCombo is updated but this code is not updated.
@@ -257,13 +396,43 @@ class Converter(tk.Tk):
         self.show_load_progress()
         self.loadProgress["value"] = 0.0
 
+        # Pick the loading engine and output strategy to fit in memory
+        self.loaderKind = 'excel' if formatString == "Excel Interlinear" else 'delimited'
+        try:
+            self.engineChoice = choose_engine(self.inputFileName)
+            if self.loaderKind != 'excel':
+                self.engineChoice.backend = None
+            self.add_error_msg(f"ℹ️ {self.engineChoice.describe()}")
+        except Exception:
+            self.engineChoice = None    # e.g. not a valid .xlsx file; the loader reports the error
+
+        # Use the parsed data from a previous load, if the file has not changed
+        cached = self.snapshotCache.get(self.inputFileName, self.loaderKind)
+
         # Initialize Loader object
-        if formatString == "Excel Interlinear":
+        if cached is not None:
+            self.loader = SnapshotInterlinearLoader(*cached)
+        elif formatString == "Excel Interlinear":
             try:
-                self.loader = ExcelInterlinearLoader(self.inputFileName)
+                if self.engineChoice is not None and self.engineChoice.backend:
+                    self.loader = ExcelInterlinearLoader(self.inputFileName, backend=self.engineChoice.backend)
+                else:
+                    self.loader = ExcelInterlinearLoader(self.inputFileName)
             except Exception as e:
                 self.add_error_msg(f"❌ Error initializing ExcelInterlinearLoader:\n{traceback.format_exc()}")
                 return None
+        elif formatString == "Delimited Interlinear (CSV/TSV)":
+            try:
+                self.loader = DelimitedInterlinearLoader(self.inputFileName)
+            except Exception as e:
+                self.add_error_msg(f"❌ Error initializing DelimitedInterlinearLoader:\n{traceback.format_exc()}")
+                return None
+        if cached is None:
+            self.loader.line_rows = []  # for placing warnings in the preview
+
+        # Show the metadata and first lines right away, while the whole file loads
+        if cached is None:
+            self.show_quick_look()
 
         # tkinter is single-threaded. So we schedule each incremental step of processing
         #   to give tkinter time to refresh the GUI, including the progressbar,
@@ -280,15 +449,33 @@ class Converter(tk.Tk):
             if self.loader.isdone:
                 # Finalize progressbar, update statuses
                 self.loadProgress["value"] = 1.0
+                self.loadCancelButton.grid_remove()
                 self.load_file_success()
                 self.update_writing_systems()
                 self.update_convert_button_state()
             else:
                 try:
-                    self.loader.next_step()
-                    # The Loader object handles what the next step is
+                    # Run steps for up to one progress interval, then let tkinter redraw:
+                    # one step per after() spends most of the time redrawing on files with many blocks
+                    deadline = time.monotonic() + self.LOAD_STEP_BUDGET_S
+                    while True:
+                        self.loader.step()
+                        # The Loader object handles what the next step is
+                        if self.loader.isdone or time.monotonic() >= deadline:
+                            break
+                except OperationCancelled as e:
+                    self.load_file_cancelled(str(e))
+                except ResourceLimitExceeded as e:
+                    # a clear reason rather than a traceback: the file is too big or malformed to load safely
+                    self.loadCancelButton.grid_remove()
+                    self.add_error_msg(f'❌ File not loaded: {e}')
+                    self.preview.clear()
+                    self.update_writing_systems()
+                    self.update_convert_button_state()
                 except Exception as e:
+                    self.loadCancelButton.grid_remove()
                     self.add_error_msg('❌ Loading error: ' + traceback.format_exc())
+                    self.preview.clear()
                     # Update statuses
                     self.update_writing_systems()
                     self.update_convert_button_state()
@@ -300,6 +487,29 @@ class Converter(tk.Tk):
             # should not be possible for user to get this error
             raise RuntimeError('Cannot run next_load_step without loader')
         
+    def load_file_cancel(self):
+        """
+        Ask the loader to stop. It stops at its next step (see load_file_cancelled).
+        """
+
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loadCancelButton.state(['disabled'])
+            self.loadProgressLabel.config(text="Cancelling...")
+
+    def load_file_cancelled(self, where):
+        """
+        Report how far loading got after a cancellation. The partial data is not used.
+        """
+
+        self.hide_load_progress()
+        self.loadProgressLabel.config(text="Loading cancelled")
+        self.add_error_msg(f"⏹ Loading cancelled {where}. No data was loaded.")
+        self.preview.clear()
+        self.diagnosticsView.set_diagnostics(self.loader.warning_list)
+        self.update_writing_systems()
+        self.update_convert_button_state()
+
     def load_file_success(self):
         """
         Display load warnings and update status after successful loading
@@ -308,43 +518,41 @@ class Converter(tk.Tk):
         if not self.loader.isdone:  # should not be possible for user to get this error
             raise Exception('Cannot show loader warnings when loader is not done')
         if self.loader.warning_list:
-            error_messages = '⚠️' + '\n⚠️  '.join(self.loader.warning_list)
-            self.add_error_msg(error_messages)
+            self.add_error_msg(f'⚠️ {len(self.loader.warning_list)} load warning(s), listed above.')
+        self.diagnosticsView.set_diagnostics(self.loader.warning_list)
 
         # Get XML data and update status
         self.intermediate_xml = self.loader.xml_root
         self.is_data_loaded = True
-        self.loadProgressLabel.config(text="Loading complete!")
+        self.preview.set_text(self.intermediate_xml, self.loader.line_rows, self.loader.warning_list)
+        if getattr(self.loader, 'from_cache', False):
+            self.loadProgressLabel.config(text="Loaded from cache!")
+        else:
+            self.loadProgressLabel.config(text="Loading complete!")
+            self.snapshotCache.put(
+                self.inputFileName, self.loaderKind, self.loader.to_snapshot(), self.loader.warning_list)
 
     def convert(self):
         """
         Sets an output file from a file dialog and converts into target format.
         """
 
-        # TODO: Refactor conversion code into a Converter or Exporter class, similar to Loader.
-        #   If the class is set up with next_step() like Loader, it would allow
-        #   the progressbar to work (although so far, this step is very quick).
-        #   Whether it is designed with next_step() or not, a class structure would also
-        #   help ensure that the GUI can use the same interface with different export formats.
-
-        # Check output format type from dropdown
-        formatString = self.outputFormatCombo.get()
-        if formatString == "FlexText Interlinear":
-            filetypelist = [("FlexText files", "*.flextext"), ("All files", "*.*")]
-        else:
+        # Check output format type from dropdown (filled from the exporters.EXPORTERS registry)
+        exporter = exporter_by_label(self.outputFormatCombo.get())
+        if exporter is None:
             # User should never get this error
-            raise ValueError("Unsupported output format selected. Add code here")
+            raise ValueError("Unsupported output format selected. Register an exporter for it")
 
         # Construct suggested filename
         initialpath, initialname = os.path.split(self.inputFileName)
         filenamebase, _ = os.path.splitext(initialname)
-        initialfilename = filenamebase + ".flextext"
+        initialfilename = filenamebase + exporter.EXTENSION
         # Provide dialog for user to confirm suggested filename, or rename
         filepath = filedialog.asksaveasfilename(
             title="Save conversion output",
             initialdir=initialpath, initialfile=initialfilename,
-            defaultextension=".flextext",
-            filetypes=[("FlexText files", "*.flextext"), ("All files", "*.*")])
+            defaultextension=exporter.EXTENSION,
+            filetypes=exporter.file_types())
         if not filepath:
             return None
 
@@ -353,37 +561,73 @@ class Converter(tk.Tk):
         self.convertProgress["value"] = 0.0
         self.update_idletasks() # let GUI update to show progressbar
 
+        # Use the output prepared in the background, if it is for the current settings
+        conversion = self.speculativeConversion
+        if conversion is not None and conversion.key == self.speculative_conversion_key():
+            self.convertButton.state(['disabled'])
+            self.convert_speculative_next(conversion, filepath)
+        else:
+            self.convert_in_foreground(exporter, filepath)
+
+    def convert_in_foreground(self, exporter, filepath):
+        """
+        Convert the loaded data with an exporter class and write it to filepath, while the GUI waits.
+        """
+
+        # Exporters write as they go, so write to a temporary file and only replace filepath on success
+        temp_path = filepath + ".partial"
         try:
-            # Perform conversion to output format
-            (flextext_xml, missing_freetrans_count) = transform_to_flextext_dom(
-                self.intermediate_xml, self.wsVernacular.cget('text'), self.wsGloss.cget('text'), self.wsFree.cget('text'))
-            # TODO exporter could read writing system codes from metadata, instead of as input args
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                export(xml_to_records(self.intermediate_xml),
+                       [exporter(f, self.wsVernacular.cget('text'), self.wsGloss.cget('text'), self.wsFree.cget('text'))],
+                       progress=CallbackProgress(self.update_convert_progress),
+                       n_paragraphs=len(self.intermediate_xml.findall('body/paragraph')))
+            os.replace(temp_path, filepath)
         except Exception:
             self.add_error_msg(f"❌ Conversion error:\n{traceback.format_exc()}")
+            self.hide_convert_progress()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
             return None
 
-        # Make the output XML pretty. This should actually go in exporter code
-        pretty_xml = self.prettify_xml(flextext_xml)
+        self.convert_success(filepath)
 
-        # Write to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(pretty_xml)
+    def convert_speculative_next(self, conversion, filepath):
+        """
+        Wait (without blocking the GUI) for the background conversion to finish, then write its output.
 
+        If it failed, convert again in the foreground, which reports the error as usual.
+        """
+
+        if conversion is not self.speculativeConversion:  # discarded while waiting, e.g. by a reload
+            self.hide_convert_progress()
+            self.update_convert_button_state()
+            return
+        if not conversion.is_done:
+            self.convertProgress["value"] = conversion.progress
+            self.after(self.SPECULATIVE_POLL_MS, self.convert_speculative_next, conversion, filepath)
+            return
+        # The output is written once; the next Convert starts over
+        self.speculativeConversion = None
+        self.update_convert_button_state()
+        if conversion.error is not None:
+            self.convert_in_foreground(conversion.exporter_class, filepath)
+            return
+        try:
+            conversion.commit(filepath)
+        except Exception:
+            self.add_error_msg(f"❌ Error writing file:\n{traceback.format_exc()}")
+            self.hide_convert_progress()
+            return
+        self.convert_success(filepath)
+
+    def convert_success(self, filepath):
         # Finalize progressbar, etc.
         self.convertProgress["value"] = 1.0
         self.hide_convert_progress()
         self.convertProgressLabel.config(text="Conversion complete!")
         self.add_error_msg(f"\nWritten to file at {filepath}") # extra blank line
 
-    def prettify_xml(self, element):
-        """
-        Add whitespace to make an XML element tree pretty-printed.
-        """
-
-        rough_string = tostring(element, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(encoding='utf-8', indent="  ").decode('utf-8')
-
 
 if __name__ == "__main__":
     app = Converter()
@@ -0,0 +1,339 @@
+import re
+import tkinter as tk
+from tkinter import ttk
+
+
+CELL_PATTERN = re.compile(r'Non-empty cell: ([A-Z]+)(\d+)')
+ROW_PATTERN = re.compile(r'\bRow (\d+)')
+
+
+def parse_diagnostic(message):
+    """
+    Classify one loader warning message.
+
+    parse_diagnostic(message) -> (severity, type, cell, row, message)
+
+    severity: "Error" or "Warning"
+    type: short description such as "Alignment" or "Separator row"
+    cell: sheet cell reference such as "E26", or the row ("Row 37"), or "" if none is given
+    row: sheet row number as an int, or None
+    """
+
+    if message.startswith('Alignment Error'):
+        severity, diagnostic_type = 'Error', 'Alignment'
+    elif message.startswith('Partial interlinear block'):
+        severity, diagnostic_type = 'Warning', 'Partial block'
+    elif 'separator row' in message:
+        severity, diagnostic_type = 'Warning', 'Separator row'
+    else:
+        severity = 'Error' if 'Error' in message.split(':', 1)[0] else 'Warning'
+        diagnostic_type = 'Other'
+
+    match = CELL_PATTERN.search(message)
+    if match:
+        return severity, diagnostic_type, match.group(1) + match.group(2), int(match.group(2)), message
+    match = ROW_PATTERN.search(message)
+    if match:
+        return severity, diagnostic_type, f'Row {match.group(1)}', int(match.group(1)), message
+    return severity, diagnostic_type, '', None, message
+
+
+class DiagnosticsView(ttk.Frame):
+    """
+    A filterable list of loader diagnostics, which only creates widgets for the visible rows.
+
+    A ttk.Treeview holds just one screenful of items. Scrolling changes which slice of the
+    (filtered) diagnostics is shown, so the cost of displaying does not depend on how many
+    diagnostics there are. Messages are classified in chunks between GUI events, so that
+    even 100k messages do not freeze the window.
+
+    Usage:
+        view = DiagnosticsView(parent)
+        view.set_diagnostics(loader.warning_list)
+        view.bind('<<DiagnosticSelect>>', lambda e: ... view.selected_row() ...)
+        view.clear()
+
+    <<DiagnosticSelect>> is generated only when the user selects a different diagnostic. The
+    Treeview's own <<TreeviewSelect>> also fires each time its items are re-created (scrolling,
+    resizing, more messages parsed) and the selection is restored.
+    """
+
+    ALL_SEVERITIES = "All severities"
+    ALL_TYPES = "All types"
+    PARSE_CHUNK_SIZE = 5000
+    AFTER_DELAY_MS = 1
+
+    def __init__(self, parent, height=8, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.records = []       # parsed diagnostics, in loader order
+        self.shown = []         # indexes into self.records that pass the filters
+        self.offset = 0         # index into self.shown of the top visible row
+        self.selected = None    # index into self.shown of the selected row
+        self._announced = None  # self.selected when <<DiagnosticSelect>> was last generated
+        self.n_visible = height
+        self._messages = []
+        self._n_parsed = 0
+        self._after_id = None
+
+        # Filter and navigation bar
+        self.filterFrame = ttk.Frame(self)
+        self.filterFrame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        self.severityCombo = ttk.Combobox(
+            self.filterFrame, state='readonly', width=14,
+            values=[self.ALL_SEVERITIES, "Error", "Warning"])
+        self.severityCombo.set(self.ALL_SEVERITIES)
+        self.severityCombo.bind('<<ComboboxSelected>>', lambda e: self.apply_filters())
+        self.severityCombo.grid(row=0, column=0, padx=(0, 5))
+        self.typeCombo = ttk.Combobox(self.filterFrame, state='readonly', width=14, values=[self.ALL_TYPES])
+        self.typeCombo.set(self.ALL_TYPES)
+        self.typeCombo.bind('<<ComboboxSelected>>', lambda e: self.apply_filters())
+        self.typeCombo.grid(row=0, column=1, padx=5)
+        self.goToLabel = ttk.Label(self.filterFrame, text="Go to row:")
+        self.goToLabel.grid(row=0, column=2, padx=(10, 0))
+        self.goToEntry = ttk.Entry(self.filterFrame, width=7)
+        self.goToEntry.bind('<Return>', lambda e: self.go_to_entry_row())
+        self.goToEntry.grid(row=0, column=3, padx=5)
+        self.countLabel = ttk.Label(self.filterFrame, text="")
+        self.countLabel.grid(row=0, column=4, padx=5, sticky=tk.E)
+        self.filterFrame.columnconfigure(4, weight=1)
+
+        # Virtual list
+        self.tree = ttk.Treeview(
+            self, columns=('severity', 'type', 'cell', 'message'), show='headings',
+            height=height, selectmode='browse')
+        for column, heading, width, stretch in (
+                ('severity', "Severity", 70, False), ('type', "Type", 100, False),
+                ('cell', "Cell", 70, False), ('message', "Message", 300, True)):
+            self.tree.heading(column, text=heading, anchor='w')
+            self.tree.column(column, width=width, minwidth=40, stretch=stretch)
+        self.tree.tag_configure('Error', foreground='#b00020')
+        self.tree.grid(row=1, column=0, sticky=(tk.N, tk.S, tk.W, tk.E))
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.statusLabel = ttk.Label(self, text="")
+        self.statusLabel.grid(row=2, column=0, columnspan=2, sticky=tk.W)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        self.tree.bind('<Double-1>', lambda e: self.copy_selected_cell())
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_by(-1 if e.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_by(-1, 'units'))   # X11 wheel up
+        self.tree.bind('<Button-5>', lambda e: self.scroll_by(1, 'units'))    # X11 wheel down
+        self.tree.bind('<Up>', lambda e: self.move_selection(-1))
+        self.tree.bind('<Down>', lambda e: self.move_selection(1))
+        self.tree.bind('<Prior>', lambda e: self.move_selection(-self.n_visible))
+        self.tree.bind('<Next>', lambda e: self.move_selection(self.n_visible))
+        self.refresh()
+
+    def clear(self):
+        """
+        Remove all diagnostics.
+        """
+
+        self.set_diagnostics([])
+
+    def set_diagnostics(self, messages):
+        """
+        Replace the displayed diagnostics with a list of loader warning messages.
+
+        Messages are classified in chunks, scheduled with tkinter's after(),
+        so the first screenful is shown right away.
+
+        The type filter is reset, as the new messages may not have the type chosen. The severity
+        filter is kept: the same severities apply to every file, e.g. when reloading a file being fixed.
+        """
+
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        self._messages = messages
+        self._n_parsed = 0
+        self.records = []
+        self.shown = []
+        self.offset = 0
+        self.selected = None
+        self._announced = None
+        self.typeCombo.config(values=[self.ALL_TYPES])
+        self.typeCombo.set(self.ALL_TYPES)
+        self.statusLabel.config(text="")
+        self.parse_next_chunk()
+
+    def parse_next_chunk(self):
+        """
+        Classify the next chunk of messages, then schedule the following chunk.
+        """
+
+        self._after_id = None
+        start = self._n_parsed
+        chunk = [parse_diagnostic(m) for m in self._messages[start:start + self.PARSE_CHUNK_SIZE]]
+        self.records.extend(chunk)
+        self._n_parsed += len(chunk)
+
+        types = set(self.typeCombo.cget('values')) - {self.ALL_TYPES}
+        new_types = {record[1] for record in chunk} - types
+        if new_types:
+            self.typeCombo.config(values=[self.ALL_TYPES] + sorted(types | new_types))
+        self.shown.extend(start + i for i, record in enumerate(chunk) if self.passes_filters(record))
+        self.refresh()
+
+        if self._n_parsed < len(self._messages):
+            self._after_id = self.after(self.AFTER_DELAY_MS, self.parse_next_chunk)
+
+    def passes_filters(self, record):
+        severity = self.severityCombo.get()
+        diagnostic_type = self.typeCombo.get()
+        return ((severity == self.ALL_SEVERITIES or record[0] == severity) and
+                (diagnostic_type == self.ALL_TYPES or record[1] == diagnostic_type))
+
+    def apply_filters(self):
+        """
+        Recompute which diagnostics are shown, after a filter changes.
+        """
+
+        self.shown = [i for i, record in enumerate(self.records) if self.passes_filters(record)]
+        self.offset = 0
+        self.selected = None
+        self._announced = None
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-create the Treeview items for the visible slice, and update the scrollbar and counts.
+        """
+
+        n = len(self.shown)
+        self.offset = max(0, min(self.offset, n - self.n_visible))
+        self.tree.delete(*self.tree.get_children())
+        for i in range(self.offset, min(self.offset + self.n_visible, n)):
+            severity, diagnostic_type, cell, _, message = self.records[self.shown[i]]
+            self.tree.insert('', 'end', iid=str(i), values=(severity, diagnostic_type, cell, message), tags=(severity,))
+        if self.selected is not None and self.tree.exists(str(self.selected)):
+            self.tree.selection_set(str(self.selected))
+        if n:
+            self.scrollbar.set(self.offset / n, min(self.offset + self.n_visible, n) / n)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        total = len(self._messages)
+        if total == 0:
+            self.countLabel.config(text="No diagnostics")
+        elif n == total:
+            self.countLabel.config(text=f"{total} diagnostics")
+        else:
+            self.countLabel.config(text=f"{n} of {total} diagnostics shown")
+
+    def on_scrollbar(self, *args):
+        """
+        Handle the scrollbar's command: ('moveto', fraction) or ('scroll', n, 'units'/'pages').
+        """
+
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.shown))
+            self.refresh()
+        elif args[0] == 'scroll':
+            self.scroll_by(int(args[1]), args[2])
+
+    def scroll_by(self, n, what):
+        step = self.n_visible if what == 'pages' else 1
+        self.offset += n * step
+        self.refresh()
+
+    def on_resize(self, event):
+        """
+        Show as many rows as fit in the Treeview's new height.
+        """
+
+        row_height = ttk.Style().lookup('Treeview', 'rowheight') or 20
+        n_visible = max(1, (event.height - 25) // int(row_height))  # minus the heading row
+        if n_visible != self.n_visible:
+            self.n_visible = n_visible
+            self.refresh()
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection:
+            self.selected = int(selection[0])
+            self.announce_selection()
+
+    def announce_selection(self):
+        """
+        Generate <<DiagnosticSelect>> if the selected diagnostic changed since the last one.
+        """
+
+        if self.selected != self._announced:
+            self._announced = self.selected
+            self.event_generate('<<DiagnosticSelect>>')
+
+    def selected_row(self):
+        """
+        Returns the sheet row of the selected diagnostic, or None.
+        """
+
+        if self.selected is None or self.selected >= len(self.shown):
+            return None
+        return self.records[self.shown[self.selected]][3]
+
+    def move_selection(self, n):
+        """
+        Move the selection by n rows, scrolling if it leaves the visible slice.
+        """
+
+        if not self.shown:
+            return 'break'
+        if self.selected is None:
+            self.selected = self.offset
+        else:
+            self.selected = max(0, min(self.selected + n, len(self.shown) - 1))
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + self.n_visible:
+            self.offset = self.selected - self.n_visible + 1
+        self.refresh()
+        self.tree.focus(str(self.selected))
+        self.announce_selection()
+        return 'break'
+
+    def go_to_row(self, row):
+        """
+        Select and scroll to the first shown diagnostic at or after a sheet row.
+
+        Returns True if one was found.
+        """
+
+        for i, record_index in enumerate(self.shown):
+            record_row = self.records[record_index][3]
+            if record_row is not None and record_row >= row:
+                self.selected = i
+                self.offset = i
+                self.refresh()
+                self.announce_selection()
+                return True
+        return False
+
+    def go_to_entry_row(self):
+        try:
+            row = int(self.goToEntry.get())
+        except ValueError:
+            self.statusLabel.config(text="Enter a row number.")
+            return
+        if self.go_to_row(row):
+            self.statusLabel.config(text="")
+        else:
+            self.statusLabel.config(text=f"No diagnostics at or after row {row}.")
+
+    def copy_selected_cell(self):
+        """
+        Copy the selected diagnostic's cell reference, for pasting into Excel's Go To (Ctrl+G).
+        """
+
+        if self.selected is None or self.selected >= len(self.shown):
+            return
+        cell = self.records[self.shown[self.selected]][2]
+        if cell.startswith('Row '):
+            cell = f'A{cell[4:]}'
+        if cell:
+            self.clipboard_clear()
+            self.clipboard_append(cell)
+            self.statusLabel.config(text=f"Copied {cell} to the clipboard (use Ctrl+G in Excel to go there).")
@@ -0,0 +1,194 @@
+"""
+Adaptive choice of the Excel loading engine and the XML output strategy.
+
+choose_engine() estimates the memory each engine would need from the size of the
+.xlsx parts, compares it with a memory budget (by default, half of the memory
+currently available), and picks:
+    - a backend from row_sources.EXCEL_ROW_SOURCES ('read-only', 'full' or 'raw'), and
+    - an output strategy: 'dom' (minidom pretty-printing, as before)
+      or 'stream' (xml_writer.write_pretty_xml, same output without a second copy in memory).
+
+The cost factors below are rough multiples of the uncompressed sheet XML size,
+measured with tracemalloc on workbooks made from the Excel templates (scripts/benchmark.py).
+
+The sheet's <dimension> tag does not matter here: every backend reads rows until they
+run out, and uses the tag only for progress.
+"""
+import os
+import re
+import sys
+import zipfile
+
+from row_sources import inspect_xlsx
+
+# Peak memory of each engine, as a multiple of the uncompressed sheet (and shared strings) XML
+ENGINE_COST_FACTORS = {
+    'full': 18.0,      # every cell (including empty, styled ones) becomes a Python object
+    'read-only': 2.5,  # the intermediate XML tree, plus openpyxl's per-row overhead
+    'raw': 1.5,        # the intermediate XML tree, plus a few rows at a time
+}
+# Extra peak memory of minidom pretty-printing, as a multiple of the same size
+DOM_OUTPUT_COST_FACTOR = 7.0
+# Share of the available memory used as the budget if none is given
+DEFAULT_BUDGET_FRACTION = 0.5
+
+_SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(i?b)?\s*$', re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+
+def parse_memory_size(text):
+    """
+    Returns the number of bytes in a size such as '512M', '2G', '1.5GiB' or '1000000'.
+
+    Raises ValueError for anything else.
+    """
+
+    match = _SIZE_PATTERN.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid memory size '{text}'. Use e.g. 512M or 2G.")
+    number, unit, _ = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.lower()])
+
+
+def format_memory_size(n_bytes):
+    """
+    Returns a size in bytes as short text, e.g. '1.5 GiB'.
+    """
+
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if n_bytes < 1024 or unit == 'GiB':
+            return f"{n_bytes:.0f} {unit}" if unit == 'B' else f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1024
+
+
+def available_memory():
+    """
+    Returns the memory available to new allocations, in bytes, or None if it cannot be found.
+
+    Uses psutil if it is installed, else /proc/meminfo (Linux) or GlobalMemoryStatusEx (Windows).
+    """
+
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if sys.platform == 'win32':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+
+    return None
+
+
+class EngineChoice:
+    """
+    The engine and output strategy picked by choose_engine(), with the reason.
+
+    Attributes:
+        backend: a key of row_sources.EXCEL_ROW_SOURCES, or None for non-Excel input
+        output: 'dom' or 'stream'
+        reason: a sentence explaining the choice
+        budget: the memory budget in bytes (None if unknown)
+    """
+
+    def __init__(self, backend, output, reason, budget=None):
+        self.backend = backend
+        self.output = output
+        self.reason = reason
+        self.budget = budget
+
+    def describe(self):
+        """
+        Returns a one-line summary for the user.
+        """
+
+        engine = f"'{self.backend}' engine, " if self.backend else ""
+        return f"Using {engine}{'streaming' if self.output == 'stream' else 'DOM'} XML output: {self.reason}"
+
+
+def choose_output(data_size, budget, engine_cost=0):
+    """
+    Returns 'dom' if minidom pretty-printing fits in the budget next to the loaded data, else 'stream'.
+    """
+
+    if budget is None or engine_cost + DOM_OUTPUT_COST_FACTOR * data_size <= budget:
+        return 'dom'
+    return 'stream'
+
+
+def choose_engine(path, memory_budget=None):
+    """
+    Pick the Excel loading engine and XML output strategy for a file.
+
+    Args:
+        path (str): The input file. Files that are not .xlsx zips (e.g. CSV) only get an output strategy.
+        memory_budget (int): Optional. The memory budget in bytes; by default,
+            DEFAULT_BUDGET_FRACTION of the available memory (no limit if that is unknown).
+
+    Returns:
+        EngineChoice
+    """
+
+    budget = memory_budget
+    budget_text = "budget"
+    if budget is None:
+        available = available_memory()
+        if available is not None:
+            budget = int(available * DEFAULT_BUDGET_FRACTION)
+            budget_text = "budget (half the available memory)"
+
+    def fits(cost):
+        return budget is None or cost <= budget
+
+    def sizes(cost):
+        if budget is None:
+            return f"needs about {format_memory_size(cost)}, no memory limit known"
+        return f"needs about {format_memory_size(cost)} of the {format_memory_size(budget)} {budget_text}"
+
+    if not zipfile.is_zipfile(path):
+        data_size = os.path.getsize(path)
+        cost = ENGINE_COST_FACTORS['raw'] * data_size
+        output = choose_output(data_size, budget, cost)
+        reason = f"loading the file {sizes(cost)}."
+        if output == 'stream':
+            reason += f" DOM output would need about {format_memory_size(DOM_OUTPUT_COST_FACTOR * data_size)} more."
+        return EngineChoice(None, output, reason, budget)
+
+    info = inspect_xlsx(path)
+    data_size = info['sheet_size'] + info['shared_strings_size']
+    costs = {backend: factor * data_size for backend, factor in ENGINE_COST_FACTORS.items()}
+
+    if fits(costs['read-only']):
+        backend = 'read-only'
+        reason = f"streaming with openpyxl {sizes(costs['read-only'])}."
+    else:
+        backend = 'raw'
+        reason = (f"openpyxl read-only would need about {format_memory_size(costs['read-only'])}; "
+                  f"streaming raw XML {sizes(costs['raw'])}.")
+        if not fits(costs['raw']):
+            reason += " This may still run out of memory."
+
+    output = choose_output(data_size, budget, costs[backend])
+    if output == 'stream':
+        reason += f" DOM output would need about {format_memory_size(DOM_OUTPUT_COST_FACTOR * data_size)} more."
+    return EngineChoice(backend, output, reason, budget)
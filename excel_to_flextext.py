@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Convert an interlinear workbook straight to a .flextext file, in three pipelined stages.
+
+    reader thread       reads the sheet (zip inflate, XML parsing) into line records
+    transform (caller)  turns each line into a FlexText <phrase> (as transform_to_flextext_dom does)
+    writer thread       pretty-prints the phrases and writes them to disk
+
+The stages run at the same time, connected by bounded queues: a stage that gets ahead
+waits for the next one, so only a few hundred lines are held in memory however long the
+text is, and no intermediate XML or FlexText tree is built. The output is the same as
+excel_to_xml.py followed by xml_to_flextext.py.
+
+An error or cancellation in any stage stops the others and is raised to the caller;
+the output file is only written (renamed into place) if the whole conversion succeeds.
+
+Usage:
+    python excel_to_flextext.py text.xlsx                 # writes text.flextext
+    python excel_to_flextext.py text.xlsx -o out.flextext --ws-vernacular xku --ws-gloss en --ws-free en
+"""
+import argparse
+import os
+import queue
+import sys
+import tempfile
+import threading
+from xml.etree.ElementTree import Element
+
+from cancellation import CancelToken, OperationCancelled, install_sigint_handler
+from progress import PROGRESS_KINDS, make_progress
+from resource_limits import add_limit_arguments, limits_from_args
+from xml_to_flextext import add_phrase_items, write_flextext_stream
+
+DEFAULT_QUEUE_SIZE = 256    # records (lines or phrases) waiting between two stages
+PUT_TIMEOUT_S = 0.1         # how often a blocked stage checks whether the pipeline was stopped
+
+_END = ('end',)
+
+
+class PipelineStopped(Exception):
+    """
+    Raised in a stage when another stage has failed (or the pipeline was cancelled).
+    """
+
+
+class _Stage(threading.Thread):
+    """
+    A pipeline thread that records its exception (if any) and stops the pipeline on failure.
+    """
+
+    def __init__(self, name, target, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.target = target
+        self.stop_event = stop_event
+        self.error = None
+
+    def run(self):
+        try:
+            self.target()
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            self.error = e
+            self.stop_event.set()
+
+
+def _put(records, record, stop_event):
+    """
+    Put a record on a bounded queue, waiting while it is full (backpressure) unless the pipeline stops.
+    """
+
+    while True:
+        if stop_event.is_set():
+            raise PipelineStopped()
+        try:
+            records.put(record, timeout=PUT_TIMEOUT_S)
+            return
+        except queue.Full:
+            pass
+
+
+def _get(records, stop_event):
+    """
+    Get the next record from a queue, unless the pipeline stops.
+    """
+
+    while True:
+        if stop_event.is_set():
+            raise PipelineStopped()
+        try:
+            return records.get(timeout=PUT_TIMEOUT_S)
+        except queue.Empty:
+            pass
+
+
+def convert_pipelined(input_path, output_path, ws_vernacular=None, ws_gloss=None, ws_freetrans=None,
+                      backend='raw', cancel_token=None, queue_size=DEFAULT_QUEUE_SIZE, progress=None,
+                      make_loader=None, limits=None):
+    """
+    Convert an interlinear workbook to a .flextext file with pipelined reader, transform and writer stages.
+
+    Args:
+        input_path (str): The workbook (.xlsx).
+        output_path (str): The .flextext file to write. It is only written if the conversion succeeds.
+        ws_vernacular, ws_gloss, ws_freetrans (str): Optional. Writing system codes; by default
+            those in the workbook (N2:N4).
+        backend (str): How to read the workbook, one of row_sources.EXCEL_ROW_SOURCES (default 'raw').
+        cancel_token (cancellation.CancelToken): Optional. If cancelled, raises
+            cancellation.OperationCancelled before the next block.
+        queue_size (int): Maximum number of records waiting between two stages.
+        progress (callable): Optional. A progress callback for the reader (see progress.py).
+        make_loader (callable): Optional. make_loader(emit, cancel_token) returns the loader to
+            read with, instead of an InterlinearLoaders.LineStreamingInterlinearLoader of input_path.
+        limits (resource_limits.ResourceLimits): Optional. Limits on the rows, cells, bytes and
+            time of reading, instead of the loader's defaults.
+
+    Returns:
+        tuple: (number of phrases, count of missing free translations, list of load warnings)
+
+    Raises:
+        ValueError: if a writing system code is neither given nor in the workbook.
+        cancellation.OperationCancelled: if cancelled.
+        Exception: any error of the stages (e.g. the workbook could not be read).
+    """
+
+    from InterlinearLoaders import LineStreamingInterlinearLoader
+
+    cancel_token = cancel_token if cancel_token is not None else CancelToken()
+    stop_event = threading.Event()
+    lines = queue.Queue(maxsize=queue_size)     # reader -> transform
+    phrases = queue.Queue(maxsize=queue_size)   # transform -> writer
+
+    def emit(record):
+        _put(lines, record, stop_event)
+
+    if make_loader is None:
+        loader = LineStreamingInterlinearLoader(input_path, emit, cancel_token, backend=backend)
+    else:
+        loader = make_loader(emit, cancel_token)
+    if limits is not None:
+        loader.limits = limits
+
+    def read():
+        loader.run(progress)
+        _put(lines, _END, stop_event)
+
+    # the writer starts once the title and writing systems are known (from the metadata record)
+    header = {}
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    temp_file = tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=output_dir, prefix='.~', suffix='.flextext', delete=False)
+
+    def iter_phrases():
+        while True:
+            record = _get(phrases, stop_event)
+            if record is _END:
+                return
+            yield record
+
+    def write():
+        write_flextext_stream(temp_file, iter_phrases(), header['title'],
+                              header['ws_vernacular'], header['ws_gloss'], header['ws_freetrans'])
+        temp_file.flush()
+
+    reader = _Stage("pipeline reader", read, stop_event)
+    writer = _Stage("pipeline writer", write, stop_event)
+    n_phrases = 0
+    missing_freetrans_count = 0
+    transform_error = None
+    reader.start()
+    try:
+        # the transform stage, in this thread
+        record = _get(lines, stop_event)
+        if record is not _END:
+            metadata = record[1]
+            header['title'] = metadata.get('title') or "Untitled Text"
+            header['ws_vernacular'] = ws_vernacular or metadata.get('writing_system_vernacular', "")
+            header['ws_gloss'] = ws_gloss or metadata.get('writing_system_gloss', "")
+            header['ws_freetrans'] = ws_freetrans or metadata.get('writing_system_free', "")
+            missing = [name for name in ('ws_vernacular', 'ws_gloss', 'ws_freetrans') if not header[name]]
+            if missing:
+                raise ValueError(f"Missing writing system code(s): {', '.join(missing)} "
+                                 f"(not given, and not in cells N2:N4 of the workbook)")
+            writer.start()
+            while True:
+                record = _get(lines, stop_event)
+                if record is _END:
+                    break
+                _, paragraph_num, vern_words, gloss_words, free = record
+                phrase = Element('phrase')
+                if add_phrase_items(phrase, vern_words, gloss_words, free,
+                                    header['ws_vernacular'], header['ws_gloss'], header['ws_freetrans']):
+                    missing_freetrans_count += 1
+                n_phrases += 1
+                _put(phrases, (paragraph_num, phrase), stop_event)
+            _put(phrases, _END, stop_event)
+    except PipelineStopped:
+        pass
+    except BaseException as e:
+        transform_error = e
+        stop_event.set()
+    finally:
+        reader.join()
+        if writer.ident is not None:   # (started)
+            writer.join()
+        temp_file.close()
+
+    error = reader.error or transform_error or writer.error
+    if error is None and writer.ident is None:
+        error = RuntimeError("No data was read from the workbook.")
+    if error is not None:
+        os.remove(temp_file.name)
+        raise error
+    os.replace(temp_file.name, output_path)
+    return n_phrases, missing_freetrans_count, loader.warning_list
+
+
+# ======================================================================
+# --- CLI WRAPPER (Execution Block) ---
+# ======================================================================
+
+def cli_wrapper():
+    """Handles command-line arguments, progress reporting and errors."""
+    parser = argparse.ArgumentParser(
+        description="Convert an interlinear Excel workbook directly to a FLEx text (.flextext), "
+                    "reading, converting and writing at the same time."
+    )
+    parser.add_argument("input_file", help="The path to the input Excel spreadsheet (.xlsx file).")
+    parser.add_argument("-o", "--output", default=None,
+                        help="The output .flextext file (default: the input file name with .flextext).")
+    parser.add_argument("--ws-vernacular", default=None, help="Vernacular writing system code (default: cell N2).")
+    parser.add_argument("--ws-gloss", default=None, help="Gloss writing system code (default: cell N4).")
+    parser.add_argument("--ws-free", default=None, help="Free translation writing system code (default: cell N3).")
+    parser.add_argument("--backend", default="raw", choices=["read-only", "full", "raw"],
+                        help="How to read the workbook (default: 'raw', the fastest).")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Lines held between the reader, transform and writer stages.")
+    parser.add_argument("--progress", choices=PROGRESS_KINDS, default="auto",
+                        help="Progress reporting: 'auto' (default), 'tqdm', 'json' (JSON lines on stderr) or 'null'.")
+    add_limit_arguments(parser)
+    args = parser.parse_args()
+
+    input_path = os.path.abspath(args.input_file)
+    output_path = os.path.abspath(args.output) if args.output else os.path.splitext(input_path)[0] + ".flextext"
+    if not os.path.exists(input_path):
+        print(f"FATAL ERROR: Input file not found at path: {input_path}")
+        sys.exit(1)
+
+    print(f"Converting: {os.path.basename(input_path)}")
+    cancel_token = CancelToken()
+    install_sigint_handler(cancel_token)
+    try:
+        progress = make_progress(args.progress, desc="Processing Blocks", unit="block")
+    except ImportError:
+        print("FATAL ERROR: The 'tqdm' library is required for --progress tqdm. Please install it with: pip install tqdm")
+        sys.exit(1)
+
+    try:
+        n_phrases, missing_freetrans_count, warnings = convert_pipelined(
+            input_path, output_path, args.ws_vernacular, args.ws_gloss, args.ws_free,
+            backend=args.backend, cancel_token=cancel_token, queue_size=args.queue_size, progress=progress,
+            limits=limits_from_args(args))
+    except OperationCancelled as e:
+        progress.finish()
+        print(f"\nCANCELLED: Stopped {e}. No output was written.")
+        sys.exit(130)
+    except Exception as e:
+        progress.finish()
+        cause = f" ({e.__cause__})" if e.__cause__ is not None else ""
+        print(f"\nFATAL ERROR: {e}{cause}")
+        sys.exit(1)
+    progress.finish()
+
+    for warning in warnings:
+        print(warning)
+    print(f"\nCOMPLETED: {n_phrases} phrase(s) written to '{os.path.basename(output_path)}'")
+    if missing_freetrans_count > 0:
+        print(f"WARNING: {missing_freetrans_count} line(s) have no free translation.")
+
+
+if __name__ == "__main__":
+    cli_wrapper()
@@ -2,210 +2,280 @@
 import argparse
 import os
 import sys
-from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.etree.ElementTree import tostring
 from xml.dom import minidom 
 
-def tqdmDummy(arg1, **kwargs):
+from cancellation import CancelToken, OperationCancelled, install_sigint_handler
+from row_sources import EXCEL_ROW_SOURCES, DEFAULT_EXCEL_ROW_SOURCE
+from engine_selection import choose_engine, parse_memory_size
+from xml_writer import write_pretty_xml
+from progress import PROGRESS_KINDS, make_progress
+from resource_limits import add_limit_arguments, limits_from_args
+
+def load_to_xml_dom(make_loader, input_path, cancel_token=None, word_occurrences=None, progress='auto',
+                    limits=None):
     """
-    If code is being run for a GUI with no attached console (pyinstaller -w),
-    use this to allow tqdm(range(...), ...) to only return the range(...).
+    Run an interlinear loader to completion, with progress reporting,
+    and return its XML Element (DOM object) and warnings.
+
+    Args:
+        make_loader (callable): make_loader(cancel_token) returns the loader
+            (e.g. an InterlinearLoaders.ExcelInterlinearLoader) to run.
+        input_path (str): The full path to the input file, for error messages.
+        cancel_token (cancellation.CancelToken): Optional. If cancelled, processing
+            stops before the next block.
+        word_occurrences (list): Optional. If given, (word, gloss, row, col) of each word
+            are appended to it (see concordance.py).
+        progress: Optional. One of progress.PROGRESS_KINDS ('auto' (default): a tqdm bar
+            if there is a console), or a progress reporter or callback (see progress.py).
+        limits (resource_limits.ResourceLimits): Optional. Limits on the rows, cells, bytes
+            and time of loading, instead of the loader's defaults.
+
+    Returns:
+        tuple: (xml.etree.ElementTree.Element, list) 
+               The root XML element and a list of errors.
+               Returns (None, list) on a fatal error or cancellation; for a cancellation,
+               the first item of the list says how far processing got.
     """
+    if not os.path.exists(input_path):
+        return None, [f"FATAL ERROR: Input file not found at path: {input_path}"]
 
-    return arg1
+    if isinstance(progress, str):
+        try:
+            progress = make_progress(progress, desc="Processing Blocks", unit="block")
+        except ImportError:
+            return None, ["FATAL ERROR: The 'tqdm' library is required for --progress tqdm. "
+                          "Please install it with: pip install tqdm"]
 
+    loader = make_loader(cancel_token)
+    loader.word_occurrences = word_occurrences
+    if limits is not None:
+        loader.limits = limits
 
-def convert_excel_to_xml_dom(excel_path):
+    try:
+        loader.run(progress)
+    except OperationCancelled as e:
+        return None, [f"CANCELLED: Stopped {e}."] + loader.warning_list
+    except Exception as e:
+        cause = f" ({e.__cause__})" if e.__cause__ is not None else ""
+        return None, [f"FATAL ERROR: Could not load the file. {e}{cause}"]
+    finally:
+        if hasattr(progress, 'finish'):
+            progress.finish()
+
+    if loader.exited_early and hasattr(progress, 'write'):
+        progress.write(f"\nExiting early: Found {loader.BLANK_BLOCK_EXIT_THRESHOLD} consecutive empty blocks "
+                       f"(approx. {loader.BLANK_BLOCK_EXIT_THRESHOLD * loader.ROWS_PER_LINE_BLOCK} blank rows).")
+
+    return loader.xml_root, loader.warning_list
+
+
+def convert_excel_to_xml_dom(excel_path, cancel_token=None, backend=None, word_occurrences=None, progress='auto',
+                             limits=None):
     """
     Core function to read interlinear data from an Excel file, validate it, 
-    and return an XML Element (DOM object). Includes tqdm for progress reporting
+    and return an XML Element (DOM object). Includes progress reporting
     and an early exit for long stretches of blank rows.
 
+    The parsing itself is done by InterlinearLoaders.ExcelInterlinearLoader,
+    the same engine the GUI uses.
+
     Args:
         excel_path (str): The full path to the Excel file.
+        cancel_token (cancellation.CancelToken): Optional. If cancelled, processing
+            stops before the next block.
+        backend (str): Optional. How to read the workbook, one of
+            row_sources.EXCEL_ROW_SOURCES ('read-only', 'full' or 'raw').
+        word_occurrences (list): Optional. If given, (word, gloss, row, col) of each word
+            are appended to it (see concordance.py).
+        progress: Optional. How to report progress, as for load_to_xml_dom.
+        limits (resource_limits.ResourceLimits): Optional, as for load_to_xml_dom.
 
     Returns:
         tuple: (xml.etree.ElementTree.Element, list) 
                The root XML element and a list of errors.
-               Returns (None, list) on a fatal error.
+               Returns (None, list) on a fatal error or cancellation; for a cancellation,
+               the first item of the list says how far processing got.
     """
     try:
         # Import necessary external libraries
-        import openpyxl 
-        if sys.stdin is None:  # no console window (pyinstaller -w)
-            IS_CONSOLE = False
-            tqdm = tqdmDummy
-        else:   # normal CLI
-            IS_CONSOLE = True
-            from tqdm import tqdm # Import tqdm here
+        from InterlinearLoaders import ExcelInterlinearLoader
     except ImportError as e:
-        # Provide a helpful error if either library is missing
-        library_name = 'openpyxl' if 'openpyxl' in str(e) else 'tqdm'
-        return None, [f"FATAL ERROR: The '{library_name}' library is required. Please install it with: pip install {library_name}"]
-        
-    # --- Excel Template Constants (INSIDE THE FUNCTION) ---
-    METADATA_CELLS = {
-        'title': 'C2',
-        'author': 'C3',
-        'transcriber': 'C4',
-        'writing_system_vernacular': 'N2',
-        'writing_system_free': 'N3',
-        'writing_system_gloss': 'N4'
-    }
-    DATA_START_ROW = 6
-    DATA_START_COLUMN = 3 # Column C
-    DATA_END_COLUMN = 26 # Column Z (where the free translation merge ends)
-    ROWS_PER_LINE_BLOCK = 4
-    BLANK_BLOCK_EXIT_THRESHOLD = 5 # Exit after 5 consecutive empty 4-row blocks (20 blank rows)
-    # -----------------------------------------------------------
-
-    error_list = []
-    consecutive_empty_blocks = 0
-
-    # --- Helper Functions (Nested for clean encapsulation) ---
-
-    def get_cell_value(sheet, row, col):
-        """Safely retrieves the value from a cell and cleans it (e.g., handles merged cells)."""
-        cell = sheet.cell(row=row, column=col)
-        value = cell.value
-
-        for merged_range in sheet.merged_cells.ranges:
-            if cell.coordinate in merged_range:
-                if value is None:
-                    value = sheet.cell(row=merged_range.min_row, column=merged_range.min_col).value
-                break
-                
-        return str(value).strip() if value is not None else None
-
-    def is_row_empty(sheet, row):
-        """Checks if all cells in the data range (Col C to Z) for a row are empty."""
-        for col in range(DATA_START_COLUMN, DATA_END_COLUMN + 1):
-            value = get_cell_value(sheet, row, col)
-            if value:
-                return False
-        return True
-
-    # --- XML Generation Logic ---
-    
+        # Provide a helpful error if the library is missing
+        return None, [f"FATAL ERROR: The 'openpyxl' library is required. Please install it with: pip install openpyxl ({e})"]
+
+    return load_to_xml_dom(
+        lambda token: ExcelInterlinearLoader(excel_path, token, backend=backend or DEFAULT_EXCEL_ROW_SOURCE),
+        excel_path, cancel_token, word_occurrences, progress, limits)
+
+
+def convert_delimited_to_xml_dom(delimited_path, delimiter=None, cancel_token=None, word_occurrences=None,
+                                 progress='auto', limits=None):
+    """
+    Read interlinear data from a CSV/TSV export of the Excel template, validate it,
+    and return an XML Element (DOM object), with the same return values as
+    convert_excel_to_xml_dom.
+
+    Args:
+        delimited_path (str): The full path to the CSV/TSV file.
+        delimiter (str): The field delimiter, or None to guess it.
+        cancel_token (cancellation.CancelToken): Optional, as for convert_excel_to_xml_dom.
+        word_occurrences (list): Optional, as for convert_excel_to_xml_dom.
+        progress: Optional, as for convert_excel_to_xml_dom.
+        limits: Optional, as for convert_excel_to_xml_dom.
+
+    Returns:
+        tuple: (xml.etree.ElementTree.Element, list) 
+               The root XML element and a list of errors.
+               Returns (None, list) on a fatal error.
+    """
+    try:
+        from InterlinearLoaders import DelimitedInterlinearLoader
+    except ImportError as e:
+        return None, [f"FATAL ERROR: Could not import the interlinear loaders. {e}"]
+
+    return load_to_xml_dom(
+        lambda token: DelimitedInterlinearLoader(delimited_path, delimiter=delimiter, cancel_token=token),
+        delimited_path, cancel_token, word_occurrences, progress, limits)
+
+
+def convert_to_jsonl(input_path, output_path, input_format='excel', backend=None, delimiter=None,
+                     cancel_token=None, word_occurrences=None, progress='auto', limits=None):
+    """
+    Read interlinear data from a workbook (or CSV/TSV export) and write it as the JSON Lines
+    intermediate (see intermediate_jsonl.py), line by line as it is read, without building the XML.
+
+    Args:
+        input_path (str): The full path to the input file.
+        output_path (str): The .jsonl file to write. It is only written if loading succeeds.
+        input_format (str): 'excel' or 'delimited'.
+        backend, delimiter, cancel_token, word_occurrences, progress, limits: as for
+            convert_excel_to_xml_dom and convert_delimited_to_xml_dom.
+
+    Returns:
+        tuple: (int, list) The number of lines written and a list of errors.
+               Returns (None, list) on a fatal error or cancellation, as load_to_xml_dom does.
+    """
     try:
-        workbook = openpyxl.load_workbook(excel_path, data_only=True)
-    except FileNotFoundError:
-        error_list.append(f"FATAL ERROR: Excel file not found at path: {excel_path}")
-        return None, error_list
+        from InterlinearLoaders import LineStreamingInterlinearLoader
+        from intermediate_jsonl import JsonlWriter
+        from row_sources import DelimitedRows
+    except ImportError as e:
+        return None, [f"FATAL ERROR: Could not import the interlinear loaders. {e}"]
+
+    if not os.path.exists(input_path):
+        return None, [f"FATAL ERROR: Input file not found at path: {input_path}"]
+
+    temp_path = output_path + ".partial"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        writer = JsonlWriter(f)
+
+        def make_loader(token):
+            if input_format == "delimited":
+                return LineStreamingInterlinearLoader(input_path, writer.emit, token,
+                                                      row_source=DelimitedRows(input_path, delimiter))
+            return LineStreamingInterlinearLoader(input_path, writer.emit, token,
+                                                  backend=backend or DEFAULT_EXCEL_ROW_SOURCE)
+
+        xml_root, errors = load_to_xml_dom(make_loader, input_path, cancel_token, word_occurrences, progress, limits)
+    if xml_root is None:
+        os.remove(temp_path)
+        return None, errors
+    os.replace(temp_path, output_path)
+    return writer.n_lines, errors
+
+
+DELIMITED_EXTENSIONS = ('.csv', '.tsv', '.tab', '.txt')
+QUICK_LOOK_BLOCKS = 20
+
+
+def quick_look(input_path, n_blocks=QUICK_LOOK_BLOCKS, input_format='excel', backend='raw', delimiter=None):
+    """
+    Read only the metadata and the first n_blocks interlinear blocks of a file, stopping there.
+
+    Takes milliseconds however long the text is (with the 'raw' backend, only the start of
+    the sheet XML is decompressed), e.g. to check the writing system codes in N2:N4.
+
+    Args:
+        input_path (str): The full path to the workbook, or CSV/TSV file.
+        n_blocks (int): The number of blocks (lines or paragraph breaks) to read, at least 1.
+        input_format (str): 'excel' or 'delimited'.
+        backend, delimiter: as for convert_excel_to_xml_dom and convert_delimited_to_xml_dom.
+
+    Returns:
+        tuple: (xml.etree.ElementTree.Element, list) The intermediate XML of the lines read,
+               and the warnings about them.
+
+    Raises:
+        Exception: if the file cannot be read.
+    """
+    from InterlinearLoaders import ExcelInterlinearLoader, DelimitedInterlinearLoader
+
+    if input_format == "delimited":
+        loader = DelimitedInterlinearLoader(input_path, delimiter=delimiter)
+    else:
+        loader = ExcelInterlinearLoader(input_path, backend=backend or 'raw')
+    loader.max_blocks = max(n_blocks, 1)
+    loader.run()
+    return loader.xml_root, loader.warning_list
+
+
+def print_quick_look(input_path, n_blocks, input_format='excel', backend='raw', delimiter=None):
+    """
+    Print the metadata and first n_blocks blocks of a file as an interlinear listing (the --head mode).
+
+    Returns:
+        int: The exit code: 0, or 1 if the file could not be read.
+    """
+    from exporters import PlainTextExporter, export
+    from intermediate_jsonl import xml_to_records
+
+    try:
+        xml_root, warnings = quick_look(input_path, n_blocks, input_format, backend, delimiter)
     except Exception as e:
-        error_list.append(f"FATAL ERROR: Could not load the Excel file. {e}")
-        return None, error_list
+        cause = f" ({e.__cause__})" if e.__cause__ is not None else ""
+        print(f"FATAL ERROR: Could not read the file. {e}{cause}")
+        return 1
+    for element in xml_root.find('text_metadata'):
+        print(f"{element.tag}: {element.text or '(empty)'}")
+    print()
+    export(xml_to_records(xml_root), [PlainTextExporter(sys.stdout)])
+    if warnings:
+        print(f"\n{len(warnings)} warning(s) in these lines:")
+        for warning in warnings:
+            print(f"  - {warning}")
+    return 0
 
-    sheet = workbook.worksheets[0]
-    
-    # --- 1. Build Metadata ---
-    root = Element('text')
-    metadata = SubElement(root, 'text_metadata')
-    for tag, cell_coord in METADATA_CELLS.items():
-        cell = sheet[cell_coord]
-        cell_value = get_cell_value(sheet, cell.row, cell.column)
-        element = SubElement(metadata, tag)
-        element.text = cell_value if cell_value else ""
-
-    # --- 2. Process Interlinear Data (Body) ---
-    body = SubElement(root, 'body')
-    paragraph = SubElement(body, 'paragraph') 
-    
-    # CALCULATE TOTAL BLOCKS FOR PROGRESS BAR
-    total_rows_to_scan = sheet.max_row - DATA_START_ROW + 1
-    total_blocks = (total_rows_to_scan + ROWS_PER_LINE_BLOCK - 1) // ROWS_PER_LINE_BLOCK 
-    
-    # We use tqdm() to wrap the iteration for the progress bar
-    for block_num in tqdm(range(total_blocks), desc="Processing Excel Blocks", unit="block"):
-        
-        current_row = DATA_START_ROW + (block_num * ROWS_PER_LINE_BLOCK)
-        
-        # Check if we've gone past the actual max row
-        if current_row > sheet.max_row:
-             break
-
-        # Define the 4 rows for the current 'line' block
-        vernacular_row = current_row
-        gloss_row      = current_row + 1
-        free_row       = current_row + 2
-        blank_row      = current_row + 3 
-
-        # --- Data Extraction ---
-        vern_words = []
-        gloss_words = []
-        
-        for col in range(DATA_START_COLUMN, DATA_END_COLUMN + 1):
-            vern_val = get_cell_value(sheet, vernacular_row, col)
-            gloss_val = get_cell_value(sheet, gloss_row, col)
-            
-            vern_is_present = bool(vern_val)
-            gloss_is_present = bool(gloss_val)
-            
-            # CRITICAL CHECK: Alignment
-            if vern_is_present != gloss_is_present:
-                problem_cell = f"{chr(col + 64)}{vernacular_row}" if vern_is_present else f"{chr(col + 64)}{gloss_row}"
-                error_list.append(
-                    f"Alignment Error: Mismatched word/gloss at column {chr(col + 64)}. "
-                    f"Non-empty cell: {problem_cell} (Rows {vernacular_row} and {gloss_row})."
-                )
-            
-            if vern_is_present:
-                vern_words.append(vern_val)
-                gloss_words.append(gloss_val if gloss_val else "") 
-            elif gloss_is_present:
-                 pass # Ignore if only a gloss exists, but error is logged above
-        
-        free_translation = get_cell_value(sheet, free_row, DATA_START_COLUMN)
-        is_block_empty = (not vern_words) and (not free_translation)
-
-        if not is_block_empty:
-            # --- Data Found: Process and Reset Counter ---
-            consecutive_empty_blocks = 0 # Reset the counter
-
-            line = SubElement(paragraph, 'line')
-            il_lines = SubElement(line, 'il-lines')
-            
-            # 1. Vernacular Line
-            vern_line = SubElement(il_lines, 'vernacular-line')
-            for word in vern_words:
-                wrd = SubElement(vern_line, 'wrd')
-                wrd.text = word
-                
-            # 2. Gloss Line
-            gloss_line = SubElement(il_lines, 'gloss-line')
-            for gloss in gloss_words:
-                gls = SubElement(gloss_line, 'gls')
-                gls.text = gloss
-            
-            # 3. Free Translation
-            free = SubElement(line, 'free')
-            free.text = free_translation if free_translation else ""
-            
-            # Warning about the blank separator row
-            if blank_row <= sheet.max_row and not is_row_empty(sheet, blank_row):
-                 error_list.append(f"Warning: Expected blank separator row at Row {blank_row} is not empty.")
-
-        elif is_block_empty and block_num > 0:
-            # --- Paragraph Break / Early Exit Logic ---
-            consecutive_empty_blocks += 1
-
-            if consecutive_empty_blocks >= BLANK_BLOCK_EXIT_THRESHOLD:
-                if IS_CONSOLE:
-                    tqdm.write(f"\nExiting early: Found {BLANK_BLOCK_EXIT_THRESHOLD} consecutive empty blocks (approx. {BLANK_BLOCK_EXIT_THRESHOLD * ROWS_PER_LINE_BLOCK} blank rows).")
-                else:
-                    pass    # no need for message for GUI
-                break # Break the tqdm loop and exit processing
-            
-            # If it hasn't reached the threshold, signal a paragraph break if the current one has data
-            if list(paragraph):
-                paragraph = SubElement(body, 'paragraph')
-            
-    # Post-processing: Remove the last paragraph element if it ended up empty
-    if not list(body) or not list(paragraph):
-        for p in list(body):
-            if not list(p):
-                body.remove(p)
-    
-    return root, error_list
+
+def check_files(paths, jobs=None, backend=None, delimiter=None, input_format='auto', cancel_token=None):
+    """
+    Validate files without converting them (the --check mode), printing the problems found.
+
+    Returns:
+        int: The exit code: 0 if no problems were found, 1 if there were diagnostics,
+             2 if a file could not be read, 130 if cancelled (see validator.py).
+    """
+    from validator import validate_files, EXIT_OK, EXIT_CANCELLED
+
+    exit_code = EXIT_OK
+    n_checked = n_failed = 0
+    for result in validate_files(paths, jobs, backend or 'raw', delimiter, cancel_token, input_format):
+        n_checked += 1
+        problems = result.problems()
+        if result.cancelled:
+            print(f"CANCELLED  {result.path}")
+        elif problems:
+            n_failed += 1
+            print(f"FAIL  {result.path}: {len(problems)} problem(s)")
+            for problem in problems:
+                print(f"        - {problem}")
+        else:
+            print(f"OK    {result.path} ({result.n_lines} lines, {result.seconds:.2f} s)")
+        exit_code = max(exit_code, result.exit_code)
+    if cancel_token is not None and cancel_token.is_cancelled:
+        exit_code = EXIT_CANCELLED
+    print(f"\nChecked {n_checked} of {len(paths)} file(s): {n_failed} with problems.")
+    return exit_code
 
 
 # ======================================================================
@@ -224,25 +294,138 @@ if __name__ == "__main__":
         description="Convert a specialized interlinear Excel spreadsheet into a UTF-8 XML file."
     )
     parser.add_argument(
-        "input_file", 
-        help="The path to the input Excel spreadsheet (.xlsx file)."
+        "input_file", nargs="+",
+        help="The path to the input Excel spreadsheet (.xlsx file), or a CSV/TSV export of it. "
+             "With --check, any number of files."
     )
+    parser.add_argument(
+        "--check", action="store_true",
+        help="Only check the files for problems (alignment, separator rows, partial blocks, "
+             "writing system codes), without writing any output. Exit code: 0 no problems, "
+             "1 problems found, 2 a file could not be read."
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None,
+        help="With --check: number of files to check in parallel (default: the number of CPUs)."
+    )
+    parser.add_argument(
+        "--input-format", choices=["auto", "excel", "delimited"], default="auto",
+        help="Input file format. 'auto' (default) treats .csv/.tsv/.tab/.txt files as delimited."
+    )
+    parser.add_argument(
+        "--delimiter", default=None,
+        help="Field delimiter for delimited input (default: guessed from the file)."
+    )
+    parser.add_argument(
+        "--backend", choices=["auto"] + list(EXCEL_ROW_SOURCES), default="auto",
+        help="How to read Excel input: 'auto' (default) picks one to fit the memory budget, "
+             "openpyxl 'read-only' streaming, openpyxl 'full' in-memory load, "
+             "or 'raw' zip/XML streaming without openpyxl."
+    )
+    parser.add_argument(
+        "--memory-budget", type=parse_memory_size, default=None,
+        help="Memory budget for choosing the engine and XML output strategy, e.g. 512M or 2G "
+             "(default: half the available memory)."
+    )
+    parser.add_argument(
+        "--format", choices=["xml", "jsonl"], default="xml",
+        help="Intermediate output format: 'xml' (default, a .xml file) or 'jsonl' (a compact, streamed "
+             "JSON Lines .jsonl file; see intermediate_jsonl.py). xml_to_flextext.py reads both."
+    )
+    parser.add_argument(
+        "--progress", choices=PROGRESS_KINDS, default="auto",
+        help="Progress reporting: 'auto' (default) a progress bar if tqdm is installed, 'tqdm', "
+             "'json' (JSON lines on stderr, for other programs) or 'null' (none)."
+    )
+    parser.add_argument(
+        "--concordance", nargs="?", const="", default=None, metavar="DB",
+        help="Add the file's words and glosses to the concordance index (see concordance.py), "
+             "optionally in the index file DB."
+    )
+    parser.add_argument(
+        "--head", type=int, default=None, metavar="N",
+        help="Only print the metadata and the first N blocks (lines) as an interlinear listing, "
+             "reading no further into the file. For a quick look at large files."
+    )
+    add_limit_arguments(parser)
     args = parser.parse_args()
+
+    if args.check:
+        cancel_token = CancelToken()
+        install_sigint_handler(cancel_token)
+        sys.exit(check_files(args.input_file, args.jobs, None if args.backend == "auto" else args.backend,
+                             args.delimiter, args.input_format, cancel_token))
+    if len(args.input_file) > 1:
+        parser.error("converting more than one file at a time is not supported (use --check to check many files)")
     
-    input_path = os.path.abspath(args.input_file)
-    base_name, _ = os.path.splitext(input_path)
-    output_xml_path = base_name + ".xml"
+    input_path = os.path.abspath(args.input_file[0])
+    base_name, extension = os.path.splitext(input_path)
+    input_format = args.input_format
+    if input_format == "auto":
+        input_format = "delimited" if extension.lower() in DELIMITED_EXTENSIONS else "excel"
+
+    if args.head is not None:
+        if not os.path.exists(input_path):
+            print(f"FATAL ERROR: Input file not found at path: {input_path}")
+            sys.exit(1)
+        sys.exit(print_quick_look(input_path, args.head, input_format,
+                                  None if args.backend == "auto" else args.backend, args.delimiter))
+    output_xml_path = base_name + (".jsonl" if args.format == "jsonl" else ".xml")
     error_log_path = base_name + "_processing_errors.txt"
 
     print(f"Starting conversion for: {os.path.basename(input_path)}")
+
+    # Estimate the cost of the file and pick an engine and output strategy to fit the budget
+    backend = None if args.backend == "auto" else args.backend
+    output_strategy = "dom"
+    if os.path.exists(input_path):
+        try:
+            choice = choose_engine(input_path, args.memory_budget)
+        except Exception as e:
+            print(f"Could not estimate the memory needed ({e}); using the defaults.")
+        else:
+            if input_format == "delimited":
+                choice.backend = None
+            elif backend is not None:
+                choice.backend = backend
+                choice.reason = "engine chosen with --backend." + (
+                    " DOM output would not fit the memory budget." if choice.output == "stream" else "")
+            backend = choice.backend
+            output_strategy = choice.output
+            print(choice.describe())
     
-    # 1. Run the core conversion function
-    xml_root, errors = convert_excel_to_xml_dom(input_path)
+    # 1. Run the core conversion function (Ctrl-C cancels cleanly at the next block)
+    cancel_token = CancelToken()
+    install_sigint_handler(cancel_token)
+    word_occurrences = [] if args.concordance is not None else None
+    limits = limits_from_args(args)
+    if args.format == "jsonl":
+        # written as it is read; there is no XML tree
+        n_lines, errors = convert_to_jsonl(
+            input_path, output_xml_path, input_format, backend, args.delimiter, cancel_token, word_occurrences,
+            args.progress, limits)
+        is_loaded = n_lines is not None
+    elif input_format == "delimited":
+        xml_root, errors = convert_delimited_to_xml_dom(
+            input_path, delimiter=args.delimiter, cancel_token=cancel_token, word_occurrences=word_occurrences,
+            progress=args.progress, limits=limits)
+    else:
+        xml_root, errors = convert_excel_to_xml_dom(
+            input_path, cancel_token=cancel_token, backend=backend, word_occurrences=word_occurrences,
+            progress=args.progress, limits=limits)
+    if args.format == "xml":
+        is_loaded = xml_root is not None
     
     # Add an extra newline after the progress bar finishes to clean up the display
     print() 
     
-    if xml_root is None:
+    if not is_loaded and cancel_token.is_cancelled:
+        print("\n--- CANCELLED ---")
+        print(errors[0])
+        print("No output was written.")
+        sys.exit(130)
+
+    if not is_loaded:
         # Fatal error occurred (e.g., file not found, missing library)
         print("\n--- FATAL ERROR ---")
         for error in errors:
@@ -261,12 +444,29 @@ if __name__ == "__main__":
         if os.path.exists(error_log_path):
             os.remove(error_log_path)
         print("COMPLETED SUCCESSFULLY. No errors found.")
+
+    if word_occurrences is not None:
+        from concordance import ConcordanceIndex
+        try:
+            index = ConcordanceIndex(args.concordance or None)
+            index.record(input_path, word_occurrences)
+            index.close()
+            print(f"Concordance index updated ({len(word_occurrences)} words).")
+        except Exception as e:
+            print(f"ERROR: Could not update the concordance index. {e}")
     
-    # 3. Write XML Output
+    # 3. Write XML Output (JSON Lines output was written while loading)
+    if args.format == "jsonl":
+        print(f"JSON Lines output saved to: '{os.path.basename(output_xml_path)}' ({n_lines} lines)")
+        sys.exit(0)
     try:
-        pretty_xml = prettify_xml(xml_root)
-        with open(output_xml_path, 'w', encoding='utf-8') as f:
-            f.write(pretty_xml)
+        if output_strategy == "stream":
+            with open(output_xml_path, 'w', encoding='utf-8') as f:
+                write_pretty_xml(xml_root, f)
+        else:
+            pretty_xml = prettify_xml(xml_root)
+            with open(output_xml_path, 'w', encoding='utf-8') as f:
+                f.write(pretty_xml)
         print(f"XML output saved to: '{os.path.basename(output_xml_path)}'")
     except Exception as e:
         print(f"ERROR: Could not write XML file. {e}")
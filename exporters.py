@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+"""
+Output formats for interlinear texts, as exporters registered by name.
+
+An exporter consumes the parsed text as a stream of events, the records of the JSON Lines
+intermediate format (see intermediate_jsonl.py):
+    {'type': 'metadata', 'fields': {'title': ..., 'writing_system_vernacular': ..., ...}}
+    {'type': 'paragraph'}
+    {'type': 'line', 'vernacular': [...], 'gloss': [...], 'free': ...}
+and writes its output as they arrive, so nothing but the current line is held in memory.
+
+Records come from a loader as it reads a workbook (LoaderRecords), from an intermediate
+XML tree (intermediate_jsonl.xml_to_records) or from a .jsonl file (intermediate_jsonl.iter_records).
+export() sends one stream to any number of exporters, so several output formats
+are written in a single pass over a single parse.
+
+To add a format, subclass Exporter and decorate it with @register_exporter:
+    @register_exporter
+    class MyExporter(Exporter):
+        NAME = 'mine'
+        LABEL = "My Format"
+        EXTENSION = '.txt'
+        def line(self, vernacular, gloss, free): ...
+
+Usage:
+    python exporters.py text.xlsx --to flextext sfm text      # writes text.flextext, text.sfm, text.txt
+"""
+import argparse
+import os
+import sys
+import unicodedata
+from abc import ABC
+from xml.etree.ElementTree import Element, SubElement
+
+from cancellation import CancelToken, OperationCancelled, install_sigint_handler
+from intermediate_jsonl import PARAGRAPH_RECORD, is_jsonl_file, iter_records, metadata_record, write_record, \
+    xml_to_records
+from xml_to_flextext import FlexTextStreamWriter, add_phrase_items
+from xml_writer import iter_pretty_element, xml_declaration
+
+EXPORTERS = {}  # exporter name -> Exporter subclass, in registration order
+
+
+def register_exporter(cls):
+    """
+    Class decorator adding an Exporter subclass to EXPORTERS (under its NAME).
+    """
+
+    EXPORTERS[cls.NAME] = cls
+    return cls
+
+
+def exporter_by_label(label):
+    """
+    Returns the Exporter subclass with a LABEL (as shown in the GUI), or None.
+    """
+
+    for cls in EXPORTERS.values():
+        if cls.LABEL == label:
+            return cls
+    return None
+
+
+class Exporter(ABC):
+    """
+    Abstract class for an output format, written to the text file f from a stream of records.
+
+    Writing system codes given here replace those in the metadata.
+
+    Child classes set NAME (for the command line), LABEL (for the GUI) and EXTENSION,
+    and override start(), paragraph(), line() and finish() as needed. The records are
+    sent to write_record(); start() is always called first, finish() last.
+    """
+
+    NAME = None
+    LABEL = None
+    EXTENSION = None
+
+    def __init__(self, f, ws_vernacular=None, ws_gloss=None, ws_freetrans=None):
+        self.f = f
+        self.ws_overrides = (ws_vernacular, ws_gloss, ws_freetrans)
+        self.fields = {}
+        self.n_paragraphs = 0
+        self.n_lines = 0
+
+    @classmethod
+    def file_types(cls):
+        """
+        Returns (description, pattern) pairs for a file dialog.
+        """
+
+        return [(f"{cls.LABEL} files", f"*{cls.EXTENSION}"), ("All files", "*.*")]
+
+    def writing_systems(self):
+        """
+        Returns the (vernacular, gloss, free translation) writing system codes: the ones given, or else the metadata's.
+        """
+
+        names = ('writing_system_vernacular', 'writing_system_gloss', 'writing_system_free')
+        return tuple(given or self.fields.get(name) or "" for given, name in zip(self.ws_overrides, names))
+
+    def write_record(self, record):
+        record_type = record['type']
+        if record_type == 'line':
+            if not self.n_paragraphs:   # (lines before any paragraph record)
+                self.write_record(PARAGRAPH_RECORD)
+            self.n_lines += 1
+            self.line(record.get('vernacular'), record.get('gloss'), record.get('free'))
+        elif record_type == 'paragraph':
+            self.n_paragraphs += 1
+            self.paragraph()
+        elif record_type == 'metadata':
+            self.fields = dict(record.get('fields', {}))
+            self.start()
+
+    def start(self):
+        """
+        Called with the metadata in self.fields, before any paragraph.
+        """
+
+    def paragraph(self):
+        """
+        Called at the start of each paragraph.
+        """
+
+    def line(self, vernacular, gloss, free):
+        """
+        Called for each interlinear line: its vernacular words and glosses (lists of text,
+        with None for empty cells; None if the line has none) and free translation (text or None).
+        """
+
+    def finish(self):
+        """
+        Called after the last record.
+        """
+
+    def summary(self):
+        """
+        Returns a short description of what was written, for the user.
+        """
+
+        return f"{self.n_lines} line(s) in {self.n_paragraphs} paragraph(s)"
+
+
+@register_exporter
+class FlexTextExporter(Exporter):
+    """
+    FLEx interlinear text (.flextext), the same as xml_to_flextext.py writes.
+    """
+
+    NAME = 'flextext'
+    LABEL = "FlexText Interlinear"
+    EXTENSION = '.flextext'
+
+    def __init__(self, f, ws_vernacular=None, ws_gloss=None, ws_freetrans=None):
+        super().__init__(f, ws_vernacular, ws_gloss, ws_freetrans)
+        self.writer = None
+        self.missing_freetrans_count = 0
+
+    def start(self):
+        self.ws_codes = self.writing_systems()
+        missing = [name for name, code in zip(('vernacular', 'gloss', 'free translation'), self.ws_codes) if not code]
+        if missing:
+            raise ValueError(f"Missing writing system code(s) for FlexText output: {', '.join(missing)}")
+        self.writer = FlexTextStreamWriter(self.f, self.fields.get('title') or "Untitled Text", *self.ws_codes)
+
+    def paragraph(self):
+        self.writer.paragraph()
+
+    def line(self, vernacular, gloss, free):
+        phrase = Element('phrase')
+        if vernacular is not None and gloss is not None:
+            if add_phrase_items(phrase, vernacular, gloss, free, *self.ws_codes):
+                self.missing_freetrans_count += 1
+        self.writer.phrase(phrase)
+
+    def finish(self):
+        self.writer.close()
+
+    def summary(self):
+        text = f"{self.n_lines} phrase(s)"
+        if self.missing_freetrans_count:
+            text += f", {self.missing_freetrans_count} without a free translation"
+        return text
+
+
+@register_exporter
+class IntermediateXmlExporter(Exporter):
+    """
+    The intermediate <text> XML, the same as excel_to_xml.py writes.
+    """
+
+    NAME = 'xml'
+    LABEL = "Intermediate XML"
+    EXTENSION = '.xml'
+
+    def __init__(self, f, ws_vernacular=None, ws_gloss=None, ws_freetrans=None, indent="  "):
+        super().__init__(f, ws_vernacular, ws_gloss, ws_freetrans)
+        self.indent = indent
+        self.n_paragraph_lines = 0
+        self.has_free = True
+
+    def start(self):
+        metadata = Element('text_metadata')
+        for tag, text in self.fields.items():
+            SubElement(metadata, tag).text = text
+        self.f.write(xml_declaration())
+        self.f.write('<text>\n')
+        self.f.writelines(iter_pretty_element(metadata, self.indent, self.indent))
+
+    def close_paragraph(self):
+        if self.n_paragraph_lines:
+            self.f.write(f'{self.indent * 2}</paragraph>\n')
+        else:
+            self.f.write(f'{self.indent * 2}<paragraph/>\n')
+
+    def paragraph(self):
+        if self.n_paragraphs == 1:
+            self.f.write(f'{self.indent}<body>\n')
+        else:
+            self.close_paragraph()
+        self.n_paragraph_lines = 0
+
+    def line(self, vernacular, gloss, free):
+        if not self.n_paragraph_lines:
+            self.f.write(f'{self.indent * 2}<paragraph>\n')
+        self.n_paragraph_lines += 1
+        line = Element('line')
+        if vernacular is not None or gloss is not None:
+            il_lines = SubElement(line, 'il-lines')
+            if vernacular is not None:
+                vern_line = SubElement(il_lines, 'vernacular-line')
+                for text in vernacular:
+                    SubElement(vern_line, 'wrd').text = text
+            if gloss is not None:
+                gloss_line = SubElement(il_lines, 'gloss-line')
+                for text in gloss:
+                    SubElement(gloss_line, 'gls').text = text
+        if self.has_free:
+            SubElement(line, 'free').text = free
+        self.f.writelines(iter_pretty_element(line, self.indent * 3, self.indent))
+
+    def write_record(self, record):
+        self.has_free = 'free' in record    # (a line without a <free> element, rather than an empty one)
+        super().write_record(record)
+
+    def finish(self):
+        if self.n_paragraphs:
+            self.close_paragraph()
+            self.f.write(f'{self.indent}</body>\n')
+        else:
+            self.f.write(f'{self.indent}<body/>\n')
+        self.f.write('</text>\n')
+
+
+def one_line(text):
+    """
+    Returns text with any line breaks (and runs of spaces) replaced by single spaces.
+    """
+
+    return " ".join(text.split())
+
+
+def text_width(text):
+    """
+    Returns the number of columns text takes in a fixed-width font (combining marks take none).
+    """
+
+    return sum(not unicodedata.combining(char) for char in text)
+
+
+def align_columns(*rows, placeholder=""):
+    """
+    Returns lines of text with the words of each row (lists of text or None) padded
+    so that the n-th words of all rows start in the same column.
+    """
+
+    rows = [[one_line(word or "") or placeholder for word in (row or [])] for row in rows]
+    n_columns = max((len(row) for row in rows), default=0)
+    widths = [max((text_width(row[col]) for row in rows if col < len(row)), default=0)
+              for col in range(n_columns)]
+    return [" ".join(word + " " * (width - text_width(word)) for word, width in zip(row, widths)).rstrip()
+            for row in rows]
+
+
+@register_exporter
+class ToolboxExporter(Exporter):
+    """
+    Toolbox/Shoebox standard format (SFM) interlinear text: a \\ref record for each line,
+    with the words (\\tx) and glosses (\\ge) aligned in columns, and the free translation (\\ft).
+
+    Each paragraph starts with a \\p marker. FLEx imports this with its "Interlinear text"
+    SFM import; empty glosses are written as *** (Toolbox's placeholder).
+    """
+
+    NAME = 'sfm'
+    LABEL = "Toolbox/SFM Interlinear"
+    EXTENSION = '.sfm'
+
+    def start(self):
+        self.f.write(f"\\id {one_line(self.fields.get('title') or 'Untitled Text')}\n")
+        for marker, field in (('\\au', 'author'), ('\\tr', 'transcriber')):
+            if self.fields.get(field):
+                self.f.write(f"{marker} {one_line(self.fields[field])}\n")
+
+    def paragraph(self):
+        self.f.write("\n\\p\n")
+
+    def line(self, vernacular, gloss, free):
+        tx, ge = align_columns(vernacular, gloss, placeholder="***")
+        self.f.write(f"\n\\ref {self.n_lines:03d}\n\\tx {tx}\n\\ge {ge}\n")
+        if free and free.strip():
+            self.f.write(f"\\ft {one_line(free)}\n")
+
+
+@register_exporter
+class PlainTextExporter(Exporter):
+    """
+    A plain-text interlinear listing, for reading or printing: numbered lines,
+    words above their glosses in aligned columns, and the free translation in quotes.
+    """
+
+    NAME = 'text'
+    LABEL = "Plain Text Interlinear"
+    EXTENSION = '.txt'
+
+    def start(self):
+        title = one_line(self.fields.get('title') or "Untitled Text")
+        self.f.write(f"{title}\n{'=' * text_width(title)}\n")
+        for label, field in (("Author", 'author'), ("Transcriber", 'transcriber')):
+            if self.fields.get(field):
+                self.f.write(f"{label}: {one_line(self.fields[field])}\n")
+
+    def paragraph(self):
+        self.n_paragraph_lines = 0
+
+    def line(self, vernacular, gloss, free):
+        self.n_paragraph_lines += 1
+        number = f"{self.n_paragraphs}.{self.n_paragraph_lines}"
+        margin = " " * (len(number) + 2)
+        tx, ge = align_columns(vernacular, gloss)
+        self.f.write(f"\n{number}  {tx}\n{margin}{ge}\n")
+        if free and free.strip():
+            self.f.write(f"{margin}'{one_line(free)}'\n")
+
+
+@register_exporter
+class JsonlExporter(Exporter):
+    """
+    The JSON Lines intermediate (see intermediate_jsonl.py).
+    """
+
+    NAME = 'jsonl'
+    LABEL = "Intermediate JSON Lines"
+    EXTENSION = '.jsonl'
+
+    def write_record(self, record):
+        super().write_record(record)
+        if record['type'] == 'metadata':
+            record = metadata_record(record.get('fields', {}))   # (the current format and version)
+        write_record(self.f, record)
+
+
+class LoaderRecords:
+    """
+    Turns the records of an InterlinearLoaders.LineStreamingInterlinearLoader (pass
+    records.emit as the loader's emit) into exporter records, sending each to send(record).
+    """
+
+    def __init__(self, send):
+        self.send = send
+        self.paragraph_num = None
+
+    def emit(self, record):
+        if record[0] == 'metadata':
+            self.send(metadata_record(record[1]))
+            return
+        _, paragraph_num, vern_words, gloss_words, free = record
+        if paragraph_num != self.paragraph_num:
+            self.send(PARAGRAPH_RECORD)
+            self.paragraph_num = paragraph_num
+        self.send({'type': 'line', 'vernacular': vern_words, 'gloss': gloss_words, 'free': free})
+
+
+def export(records, exporters, cancel_token=None, progress=None, n_paragraphs=None):
+    """
+    Send a stream of records to each of the exporters, in one pass, then finish them.
+
+    Args:
+        records (iterable): exporter records, starting with the metadata record.
+        exporters (list): Exporter objects.
+        cancel_token (cancellation.CancelToken): Optional. If cancelled, raises
+            cancellation.OperationCancelled before the next paragraph.
+        progress (callable): Optional. Called as progress(paragraphs done, n_paragraphs)
+            at the start of each paragraph (see progress.py).
+        n_paragraphs (int): Optional. The number of paragraphs, for progress.
+    """
+
+    n_done = 0
+    for record in records:
+        if record['type'] == 'paragraph':
+            if cancel_token is not None:
+                cancel_token.check(f"at paragraph {n_done + 1}")
+            if progress is not None:
+                progress(n_done, n_paragraphs)
+            n_done += 1
+        for exporter in exporters:
+            exporter.write_record(record)
+    for exporter in exporters:
+        exporter.finish()
+    if progress is not None:
+        progress(n_done, n_paragraphs)
+
+
+def export_file(input_path, outputs, ws_vernacular=None, ws_gloss=None, ws_freetrans=None, input_format='auto',
+                backend='raw', delimiter=None, cancel_token=None, progress=None, limits=None):
+    """
+    Read an interlinear text once and write it in each of the output formats, in one pass.
+
+    Args:
+        input_path (str): A workbook (.xlsx), a CSV/TSV export of it, or an intermediate .xml or .jsonl file.
+        outputs (dict): exporter name -> output path. Each output is only written if the export succeeds.
+        ws_vernacular, ws_gloss, ws_freetrans (str): Optional. Writing system codes to use instead of
+            those in the input.
+        input_format (str): 'auto' (default: from the file extension), 'excel', 'delimited' or 'intermediate'.
+        backend (str): How to read a workbook, one of row_sources.EXCEL_ROW_SOURCES (default 'raw').
+        delimiter (str): Optional. The field delimiter of delimited input (default: guessed).
+        cancel_token (cancellation.CancelToken): Optional. If cancelled, raises
+            cancellation.OperationCancelled before the next block or paragraph.
+        progress (callable): Optional. A progress callback (see progress.py).
+        limits (resource_limits.ResourceLimits): Optional. Limits for reading a workbook or
+            CSV/TSV file, instead of the loader's defaults.
+
+    Returns:
+        tuple: (list of the Exporter objects, list of load warnings)
+    """
+
+    from excel_to_xml import DELIMITED_EXTENSIONS
+    from InterlinearLoaders import LineStreamingInterlinearLoader
+    from row_sources import DelimitedRows
+
+    extension = os.path.splitext(input_path)[1].lower()
+    if input_format == 'auto':
+        if extension == '.xml' or is_jsonl_file(input_path):
+            input_format = 'intermediate'
+        elif extension in DELIMITED_EXTENSIONS:
+            input_format = 'delimited'
+        else:
+            input_format = 'excel'
+
+    files = {}
+    exporters = []
+    warnings = []
+    try:
+        for name, path in outputs.items():
+            if os.path.abspath(path) == os.path.abspath(input_path):
+                raise ValueError(f"The {name} output would overwrite the input file '{path}'.")
+            files[path] = open(path + ".partial", 'w', encoding='utf-8')
+            exporters.append(EXPORTERS[name](files[path], ws_vernacular, ws_gloss, ws_freetrans))
+
+        if input_format == 'intermediate':
+            if is_jsonl_file(input_path):
+                with open(input_path, 'r', encoding='utf-8') as f:
+                    export(iter_records(f), exporters, cancel_token, progress)
+            else:
+                from xml.etree.ElementTree import parse
+                xml_root = parse(input_path).getroot()
+                if xml_root.tag != 'text':
+                    raise ValueError(f"Root tag expected to be 'text', found '{xml_root.tag}'")
+                export(xml_to_records(xml_root), exporters, cancel_token, progress,
+                       len(xml_root.findall('body/paragraph')))
+        else:
+            def send(record):
+                for exporter in exporters:
+                    exporter.write_record(record)
+
+            records = LoaderRecords(send)
+            if input_format == 'delimited':
+                loader = LineStreamingInterlinearLoader(input_path, records.emit, cancel_token,
+                                                        row_source=DelimitedRows(input_path, delimiter))
+            else:
+                loader = LineStreamingInterlinearLoader(input_path, records.emit, cancel_token, backend=backend)
+            if limits is not None:
+                loader.limits = limits
+            loader.run(progress)
+            warnings = loader.warning_list
+            for exporter in exporters:
+                exporter.finish()
+    except BaseException:
+        for f in files.values():
+            f.close()
+            os.remove(f.name)
+        raise
+    for path, f in files.items():
+        f.close()
+        os.replace(f.name, path)
+    return exporters, warnings
+
+
+# ======================================================================
+# --- CLI WRAPPER (Execution Block) ---
+# ======================================================================
+
+def cli_wrapper():
+    """Handles command-line arguments, progress reporting and errors."""
+    from progress import PROGRESS_KINDS, make_progress
+    from resource_limits import add_limit_arguments, limits_from_args
+
+    parser = argparse.ArgumentParser(
+        description="Convert an interlinear text to one or more output formats, reading it only once."
+    )
+    parser.add_argument("input_file", help="A workbook (.xlsx), a CSV/TSV export of it, "
+                                           "or an intermediate .xml or .jsonl file.")
+    parser.add_argument("--to", nargs="+", choices=list(EXPORTERS), default=["flextext"], metavar="FORMAT",
+                        help=f"Output format(s): {', '.join(EXPORTERS)} (default: flextext). "
+                             "Each is written next to the input, with the format's extension.")
+    parser.add_argument("-o", "--output-base", default=None,
+                        help="Path of the outputs without extension (default: the input file's).")
+    parser.add_argument("--ws-vernacular", default=None, help="Vernacular writing system code (default: from the input).")
+    parser.add_argument("--ws-gloss", default=None, help="Gloss writing system code (default: from the input).")
+    parser.add_argument("--ws-free", default=None, help="Free translation writing system code (default: from the input).")
+    parser.add_argument("--input-format", choices=["auto", "excel", "delimited", "intermediate"], default="auto",
+                        help="Input file format (default: from the file extension).")
+    parser.add_argument("--backend", default="raw", choices=["read-only", "full", "raw"],
+                        help="How to read a workbook (default: 'raw', the fastest).")
+    parser.add_argument("--delimiter", default=None, help="Field delimiter for CSV/TSV input (default: guessed).")
+    parser.add_argument("--progress", choices=PROGRESS_KINDS, default="auto",
+                        help="Progress reporting: 'auto' (default), 'tqdm', 'json' (JSON lines on stderr) or 'null'.")
+    add_limit_arguments(parser)
+    args = parser.parse_args()
+
+    input_path = os.path.abspath(args.input_file)
+    if not os.path.exists(input_path):
+        print(f"FATAL ERROR: Input file not found at path: {input_path}")
+        sys.exit(1)
+    base = os.path.abspath(args.output_base) if args.output_base else os.path.splitext(input_path)[0]
+    outputs = {name: base + EXPORTERS[name].EXTENSION for name in dict.fromkeys(args.to)}
+
+    print(f"Converting: {os.path.basename(input_path)}")
+    cancel_token = CancelToken()
+    install_sigint_handler(cancel_token)
+    try:
+        progress = make_progress(args.progress, desc="Exporting", unit="block")
+    except ImportError:
+        print("FATAL ERROR: The 'tqdm' library is required for --progress tqdm. Please install it with: pip install tqdm")
+        sys.exit(1)
+
+    try:
+        exporters, warnings = export_file(
+            input_path, outputs, args.ws_vernacular, args.ws_gloss, args.ws_free, args.input_format,
+            args.backend, args.delimiter, cancel_token, progress, limits_from_args(args))
+    except OperationCancelled as e:
+        progress.finish()
+        print(f"\nCANCELLED: Stopped {e}. No output was written.")
+        sys.exit(130)
+    except Exception as e:
+        progress.finish()
+        cause = f" ({e.__cause__})" if e.__cause__ is not None else ""
+        print(f"\nFATAL ERROR: {e}{cause}")
+        sys.exit(1)
+    progress.finish()
+
+    for warning in warnings:
+        print(warning)
+    print()
+    for exporter, path in zip(exporters, outputs.values()):
+        print(f"COMPLETED: {exporter.summary()} written to '{os.path.basename(path)}'")
+
+
+if __name__ == "__main__":
+    cli_wrapper()
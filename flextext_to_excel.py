@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Export a FLEx text (.flextext) to a workbook with the Excel template layout,
+so that it can be corrected in Excel and converted back with excel_to_xml.py.
+
+The FlexText file is streamed with iterparse and the workbook is written with
+openpyxl's write-only mode, so long texts are exported in bounded memory.
+"""
+import argparse
+import os
+import sys
+import traceback
+from xml.etree.ElementTree import iterparse
+
+from cancellation import CancelToken, OperationCancelled, install_sigint_handler
+from progress import PROGRESS_KINDS, make_progress
+
+# The Excel template layout, as read by InterlinearLoaders.ExcelInterlinearLoader
+METADATA_LABELS = {'B2': "Title:", 'B3': "Author:", 'B4': "Transcriber:",
+                   'M1': "FLEx Writing Systems:", 'M2': "Baseline:", 'M3': "Free tr.:", 'M4': "Gloss:"}
+TITLE_CELL = 'C2'
+WRITING_SYSTEM_CELLS = {'vernacular': 'N2', 'free': 'N3', 'gloss': 'N4'}
+DATA_START_ROW = 6
+DATA_START_COLUMN = 3   # Column C
+WORDS_PER_ROW = 24      # Columns C:Z; longer phrases wrap onto the next block
+BLOCK_LABELS = ("Vernacular:", "Gloss:", "Free trans.:")  # column B of each block's rows
+
+
+class FlexTextReader:
+    """
+    Streaming reader for the first interlinear text of a .flextext file.
+
+    Usage:
+        reader = FlexTextReader(path)
+        header = reader.read_header()   # title and writing systems
+        for paragraph_num, words, glosses, free in reader.iter_phrases():
+            ...
+
+    Punctuation "words" are joined to the word before them (or after, at the start of a phrase).
+    Word glosses missing at word level are made from the morpheme glosses, joined with '-'.
+    Phrases without word analyses are split at spaces, with empty glosses.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.title = ""
+        self.writing_systems = {'vernacular': "", 'gloss': "", 'free': ""}
+        self._events = None
+        self._first_phrase = None
+        self._paragraph_num = 0
+
+    def read_header(self):
+        """
+        Read up to the end of the first phrase, and return a dict with 'title' and the
+        'writing_systems' (dict of 'vernacular', 'gloss' and 'free' codes, found in the first phrase).
+        """
+
+        self._events = self._iter_phrase_elements()
+        self._first_phrase = next(self._events, None)
+        return {'title': self.title, 'writing_systems': dict(self.writing_systems)}
+
+    def _iter_phrase_elements(self):
+        """
+        Yield (paragraph number, phrase data) for each phrase, clearing parsed elements as it goes.
+        """
+
+        context = iterparse(self.path, events=('start', 'end'))
+        in_text = False     # True while inside the first <interlinear-text>
+        parent_stack = []
+        for event, elem in context:
+            if event == 'start':
+                if elem.tag == 'interlinear-text':
+                    in_text = True
+                elif elem.tag == 'paragraph' and in_text:
+                    self._paragraph_num += 1
+                parent_stack.append(elem)
+                continue
+
+            parent_stack.pop()
+            if elem.tag == 'interlinear-text':
+                return  # only the first text is exported
+            if not in_text:
+                continue
+            if elem.tag == 'item' and elem.get('type') == 'title' and parent_stack \
+                    and parent_stack[-1].tag == 'interlinear-text':
+                self.title = self.title or (elem.text or "")
+            elif elem.tag == 'phrase':
+                phrase = self.read_phrase(elem)
+                yield self._paragraph_num, phrase
+                if parent_stack:
+                    parent_stack[-1].remove(elem)   # keep memory bounded
+            elif elem.tag == 'paragraph' and parent_stack:
+                parent_stack[-1].remove(elem)
+
+    def read_phrase(self, phrase):
+        """
+        Returns (words, glosses, free translation) of a <phrase> element, noting its writing systems.
+        """
+
+        free = ""
+        phrase_text = ""
+        for item in phrase.findall('./item'):
+            if item.get('type') == 'gls' and not free:
+                free = (item.text or "").strip()
+                self._note_writing_system('free', item)
+            elif item.get('type') == 'txt' and not phrase_text:
+                phrase_text = item.text or ""
+                self._note_writing_system('vernacular', item)
+
+        words = []
+        glosses = []
+        leading_punctuation = ""
+        for word in phrase.findall('./words/word'):
+            text = None
+            gloss = None
+            punctuation = None
+            for item in word.findall('./item'):
+                item_type = item.get('type')
+                if item_type == 'txt' and text is None:
+                    text = item.text or ""
+                    self._note_writing_system('vernacular', item)
+                elif item_type == 'gls' and gloss is None:
+                    gloss = item.text or ""
+                    self._note_writing_system('gloss', item)
+                elif item_type == 'punct' and punctuation is None:
+                    punctuation = item.text or ""
+            if text is None and punctuation is not None:
+                if words:
+                    words[-1] += punctuation
+                else:
+                    leading_punctuation += punctuation
+                continue
+            if gloss is None:
+                morpheme_glosses = [item for item in word.findall('./morphemes/morph/item') if item.get('type') == 'gls']
+                for item in morpheme_glosses:
+                    self._note_writing_system('gloss', item)
+                gloss = "-".join(item.text or "" for item in morpheme_glosses)
+            words.append(leading_punctuation + (text or ""))
+            glosses.append(gloss)
+            leading_punctuation = ""
+        if leading_punctuation:
+            words.append(leading_punctuation)
+            glosses.append("")
+
+        if not words and phrase_text:
+            words = phrase_text.split()
+            glosses = [""] * len(words)
+        return words, glosses, free
+
+    def _note_writing_system(self, kind, item):
+        if not self.writing_systems[kind] and item.get('lang'):
+            self.writing_systems[kind] = item.get('lang')
+
+    def iter_phrases(self):
+        """
+        Yield (paragraph number, words, glosses, free translation) for each phrase.
+        """
+
+        if self._events is None:
+            self.read_header()
+        if self._first_phrase is not None:
+            paragraph_num, phrase = self._first_phrase
+            self._first_phrase = None
+            yield (paragraph_num,) + phrase
+        for paragraph_num, phrase in self._events:
+            yield (paragraph_num,) + phrase
+
+
+def export_flextext_to_excel(flextext_path, excel_path, cancel_token=None, progress=None):
+    """
+    Write the first interlinear text of a .flextext file to a new workbook in the Excel template layout.
+
+    Metadata goes in C2 (title) and N2:N4 (writing systems). Each phrase fills a 4-row block
+    from row 6: words in C:Z, glosses below them, and the free translation merged across C:Z,
+    then a blank row. Phrases of more than 24 words wrap onto further blocks (the free translation
+    stays with the first one), and a blank block separates paragraphs. Empty phrases are left
+    out, with a warning.
+
+    Args:
+        flextext_path (str): The input .flextext file.
+        excel_path (str): The output .xlsx file. It is only written if the export completes.
+        cancel_token (cancellation.CancelToken): Optional. If cancelled, raises
+            cancellation.OperationCancelled before the next phrase.
+        progress (callable): Optional. Called with the number of phrases written so far, after each phrase
+            (e.g. a reporter from progress.py).
+
+    Returns:
+        tuple: (int, list) The number of phrases exported and a list of warnings.
+    """
+
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter
+    from openpyxl.worksheet.cell_range import CellRange
+
+    reader = FlexTextReader(flextext_path)
+    header = reader.read_header()
+    warnings = []
+    for kind, code in header['writing_systems'].items():
+        if not code:
+            warnings.append(f"Warning: No {kind} writing system found in the first phrase; cell "
+                            f"{WRITING_SYSTEM_CELLS[kind]} is left empty.")
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Interlinear Text")
+    sheet.column_dimensions['B'].width = 12
+    for col in range(DATA_START_COLUMN, DATA_START_COLUMN + WORDS_PER_ROW):
+        sheet.column_dimensions[get_column_letter(col)].width = 12
+    bold = Font(bold=True)
+
+    # Metadata rows 1-5
+    metadata_rows = [[None] * (DATA_START_COLUMN + WORDS_PER_ROW) for _ in range(DATA_START_ROW - 1)]
+
+    def set_cell(coord, value, font=None):
+        row, col = coordinate_to_tuple(coord)
+        cell = WriteOnlyCell(sheet, value=value)
+        if font is not None:
+            cell.font = font
+        metadata_rows[row - 1][col - 1] = cell
+
+    for coord, label in METADATA_LABELS.items():
+        set_cell(coord, label, bold)
+    set_cell(TITLE_CELL, header['title'], Font(bold=True, size=14))
+    for kind, coord in WRITING_SYSTEM_CELLS.items():
+        set_cell(coord, header['writing_systems'][kind] or None)
+    for row_values in metadata_rows:
+        sheet.append(row_values)
+
+    row = DATA_START_ROW
+    last_col_letter = get_column_letter(DATA_START_COLUMN + WORDS_PER_ROW - 1)
+    padding = [None] * (DATA_START_COLUMN - 2)  # columns before B
+    n_phrases = 0
+    n_read = 0
+    previous_paragraph = None
+
+    def separator_row():
+        # a styled empty cell, so that the row is really written (write-only mode leaves out empty
+        # rows, and a sheet without its last blank row would end in the middle of a block)
+        cell = WriteOnlyCell(sheet)
+        cell.number_format = '@'
+        return padding + [cell]
+
+    for paragraph_num, words, glosses, free in reader.iter_phrases():
+        n_read += 1
+        if cancel_token is not None:
+            cancel_token.check(f"at phrase {n_read}")
+        if not any(words) and not any(glosses) and not free:
+            # (an empty block would be read back as a paragraph break, and 5 of them as the end of the text)
+            warnings.append(f"Warning: Phrase {n_read} is empty, and was not exported.")
+            continue
+
+        if previous_paragraph is not None and paragraph_num != previous_paragraph:
+            for _ in range(4):  # an empty block starts a new paragraph
+                sheet.append([])
+            row += 4
+        previous_paragraph = paragraph_num
+        n_phrases += 1
+
+        n_words = max(len(words), len(glosses), 1)
+        if n_words > WORDS_PER_ROW:
+            warnings.append(f"Phrase {n_read} has {n_words} words; wrapped onto "
+                            f"{-(-n_words // WORDS_PER_ROW)} lines starting at Row {row}.")
+        for start in range(0, n_words, WORDS_PER_ROW):
+            sheet.append(padding + [BLOCK_LABELS[0]] + words[start:start + WORDS_PER_ROW])
+            sheet.append(padding + [BLOCK_LABELS[1]] + glosses[start:start + WORDS_PER_ROW])
+            sheet.append(padding + [BLOCK_LABELS[2]] + ([free or None] if start == 0 else []))
+            sheet.append(separator_row())
+            # (MultiCellRange.add checks overlaps with every range so far; these never overlap)
+            sheet.merged_cells.ranges.add(CellRange(f"C{row + 2}:{last_col_letter}{row + 2}"))
+            row += 4
+
+        if progress is not None:
+            progress(n_phrases)
+
+    workbook.save(excel_path)
+    return n_phrases, warnings
+
+
+# ======================================================================
+# --- CLI WRAPPER (Execution Block) ---
+# ======================================================================
+
+def cli_wrapper():
+    """Handles command-line arguments, progress reporting and errors."""
+    parser = argparse.ArgumentParser(
+        description="Export a FLEx text (.flextext) to an Excel workbook in the interlinear template layout."
+    )
+    parser.add_argument("input_file", help="The path to the input .flextext file.")
+    parser.add_argument("-o", "--output", default=None,
+                        help="The output .xlsx file (default: the input file name with .xlsx).")
+    parser.add_argument("--progress", choices=PROGRESS_KINDS, default="auto",
+                        help="Progress reporting: 'auto' (default), 'tqdm', 'json' (JSON lines on stderr) or 'null'.")
+    args = parser.parse_args()
+
+    input_path = os.path.abspath(args.input_file)
+    output_path = os.path.abspath(args.output) if args.output else os.path.splitext(input_path)[0] + ".xlsx"
+    if not os.path.exists(input_path):
+        print(f"FATAL ERROR: Input file not found at path: {input_path}")
+        sys.exit(1)
+
+    print(f"Exporting: {os.path.basename(input_path)}")
+    cancel_token = CancelToken()
+    install_sigint_handler(cancel_token)
+
+    try:
+        progress = make_progress(args.progress, desc="Exporting Phrases", unit="phrase")
+    except ImportError:
+        print("FATAL ERROR: The 'tqdm' library is required for --progress tqdm. Please install it with: pip install tqdm")
+        sys.exit(1)
+
+    try:
+        n_phrases, warnings = export_flextext_to_excel(input_path, output_path, cancel_token, progress)
+    except OperationCancelled as e:
+        print(f"\nCANCELLED: Stopped {e}. No output was written.")
+        sys.exit(130)
+    except Exception:
+        print(f"\nFATAL ERROR: Export failed.\n{traceback.format_exc()}")
+        sys.exit(1)
+    finally:
+        progress.finish()
+
+    for warning in warnings:
+        print(warning)
+    print(f"\nCOMPLETED: {n_phrases} phrase(s) written to '{os.path.basename(output_path)}'")
+
+
+if __name__ == "__main__":
+    cli_wrapper()
@@ -0,0 +1,318 @@
+import bisect
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+from diagnostics_view import parse_diagnostic
+
+
+ROWS_PER_LINE_BLOCK = 4     # as in the template: vernacular, gloss, free translation, blank
+MISSING_GLOSS = "***"       # shown under a word with no gloss, as in Toolbox
+
+
+def text_lines(xml_root):
+    """
+    Flatten an intermediate XML <text> into its lines.
+
+    text_lines(xml_root) -> [(paragraph number, vernacular words, gloss words, free translation), ...]
+    """
+
+    lines = []
+    for paragraph_num, paragraph in enumerate(xml_root.iterfind('body/paragraph'), start=1):
+        for line in paragraph.iterfind('line'):
+            vern_words = tuple(wrd.text or "" for wrd in line.iterfind('il-lines/vernacular-line/wrd'))
+            gloss_words = tuple(gls.text or "" for gls in line.iterfind('il-lines/gloss-line/gls'))
+            free = line.find('free')
+            lines.append((paragraph_num, vern_words, gloss_words, (free.text or "") if free is not None else ""))
+    return lines
+
+
+def line_warnings(line_rows, warnings):
+    """
+    Find the line each loader warning is about, from the sheet row it names.
+
+    line_rows: the vernacular row of each line (ExcelInterlinearLoader.line_rows)
+
+    Returns:
+        dict: line index -> list of (severity, message), for the lines with warnings.
+    """
+
+    by_line = {}
+    if not line_rows:
+        return by_line
+    for message in warnings:
+        severity, _, _, row, message = parse_diagnostic(message)
+        if row is None:
+            continue
+        i = bisect.bisect_right(line_rows, row) - 1
+        if i >= 0 and row < line_rows[i] + ROWS_PER_LINE_BLOCK:
+            by_line.setdefault(i, []).append((severity, message))
+    return by_line
+
+
+class InterlinearPreview(ttk.Frame):
+    """
+    An interlinear view of a loaded text, with each word above its gloss, which only lays out
+    and draws the lines in view.
+
+    Lines are drawn on a canvas from the top visible line down, until the canvas is full,
+    so the cost of scrolling does not depend on the length of the text. The layout of a line
+    (where each word and gloss goes, wrapped to the width of the canvas) is computed when
+    the line first comes into view and kept until the width changes, and text widths are
+    cached, since the same words come up again and again.
+
+    Lines with load warnings are marked, with their warnings below them, and a word without
+    a gloss is shown over a red "***".
+
+    Usage:
+        preview = InterlinearPreview(parent)
+        preview.set_text(loader.xml_root, loader.line_rows, loader.warning_list)
+        preview.go_to_row(26)
+        preview.clear()
+    """
+
+    MARGIN = 6              # pixels
+    COLUMN_GAP = 12         # between word columns
+    LINE_GAP = 10           # between interlinear lines
+    LAYOUT_CACHE_SIZE = 5000    # lines; the cache is cleared when it gets bigger
+    COLORS = {'Error': '#b00020', 'Warning': '#a05a00', 'paragraph': '#606060', 'number': '#909090',
+              'text': 'black', 'free': '#202060', 'background': 'white'}
+
+    def __init__(self, parent, height=8, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.lines = []         # (paragraph number, vernacular words, gloss words, free translation)
+        self.warnings = {}      # line index -> [(severity, message)]
+        self.warning_lines = [] # sorted indexes of the lines with warnings
+        self.line_rows = None   # vernacular row of each line, if known
+        self.offset = 0         # index of the top visible line
+        self.n_visible = 0      # lines drawn at the last refresh
+        self.note = ""
+        self._layouts = {}      # line index -> (height, [(x, y, text, font name, color)]), for _layout_width
+        self._layout_width = None
+        self._widths = {}       # (font name, text) -> width in pixels
+
+        default_font = tkfont.nametofont('TkDefaultFont')
+        self.fonts = {
+            'vernacular': default_font.copy(),
+            'gloss': default_font.copy(),
+            'free': default_font.copy(),
+            'note': default_font.copy(),
+        }
+        self.fonts['vernacular'].configure(weight='bold')
+        self.fonts['free'].configure(slant='italic')
+        self.linespace = max(font.metrics('linespace') for font in self.fonts.values())
+
+        self.canvas = tk.Canvas(
+            self, height=height * self.linespace, background=self.COLORS['background'],
+            borderwidth=2, relief='sunken', highlightthickness=0, takefocus=True)
+        self.canvas.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.W, tk.E))
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.statusFrame = ttk.Frame(self)
+        self.statusFrame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        self.statusLabel = ttk.Label(self.statusFrame, text="")
+        self.statusLabel.grid(row=0, column=0, sticky=tk.W)
+        self.nextWarningButton = ttk.Button(
+            self.statusFrame, text="Next warning", state='disabled', command=self.go_to_next_warning)
+        self.nextWarningButton.grid(row=0, column=1, sticky=tk.E)
+        self.statusFrame.columnconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.canvas.bind('<Configure>', lambda e: self.refresh())
+        self.canvas.bind('<Button-1>', lambda e: self.canvas.focus_set())
+        self.canvas.bind('<MouseWheel>', lambda e: self.scroll_by(-1 if e.delta > 0 else 1, 'units'))
+        self.canvas.bind('<Button-4>', lambda e: self.scroll_by(-1, 'units'))   # X11 wheel up
+        self.canvas.bind('<Button-5>', lambda e: self.scroll_by(1, 'units'))    # X11 wheel down
+        self.canvas.bind('<Up>', lambda e: self.scroll_by(-1, 'units'))
+        self.canvas.bind('<Down>', lambda e: self.scroll_by(1, 'units'))
+        self.canvas.bind('<Prior>', lambda e: self.scroll_by(-1, 'pages'))
+        self.canvas.bind('<Next>', lambda e: self.scroll_by(1, 'pages'))
+        self.canvas.bind('<Home>', lambda e: self.scroll_to(0))
+        self.canvas.bind('<End>', lambda e: self.scroll_to(len(self.lines) - 1))
+
+    def clear(self, note=""):
+        """
+        Show no text (only the note, if any).
+        """
+
+        self.set_text(None, note=note)
+
+    def set_text(self, xml_root, line_rows=None, warnings=(), note=""):
+        """
+        Show an intermediate XML <text>, from its first line.
+
+        line_rows: the vernacular row of each line (ExcelInterlinearLoader.line_rows),
+            to find the lines that warnings are about. Without them, no lines are marked.
+        warnings: loader warning messages
+        note: shown below the text, e.g. that only the first lines are loaded yet
+        """
+
+        self.lines = text_lines(xml_root) if xml_root is not None else []
+        self.line_rows = line_rows if line_rows is not None and len(line_rows) == len(self.lines) else None
+        self.warnings = line_warnings(self.line_rows, warnings)
+        self.warning_lines = sorted(self.warnings)
+        self.nextWarningButton.state(['!disabled'] if self.warning_lines else ['disabled'])
+        self.note = note
+        self.offset = 0
+        self._layouts = {}
+        self._widths = {}
+        self.refresh()
+
+    def measure(self, text, font_name):
+        """
+        Width of text in a font, in pixels (cached).
+        """
+
+        key = (font_name, text)
+        width = self._widths.get(key)
+        if width is None:
+            width = self._widths[key] = self.fonts[font_name].measure(text)
+        return width
+
+    def wrap(self, text, font_name, width):
+        """
+        Split text at spaces into pieces that fit in width pixels (a single long word may not).
+        """
+
+        pieces = []
+        current = ""
+        for word in text.split():
+            candidate = f"{current} {word}" if current else word
+            if current and self.measure(candidate, font_name) > width:
+                pieces.append(current)
+                current = word
+            else:
+                current = candidate
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def layout(self, i, width):
+        """
+        Place the words, glosses, free translation and warnings of line i in a canvas width.
+
+        Returns (height, [(x, y, text, font name, color), ...]), with y relative to the top of the line.
+        Layouts are cached until the width changes.
+        """
+
+        if width != self._layout_width or len(self._layouts) > self.LAYOUT_CACHE_SIZE:
+            self._layouts = {}
+            self._layout_width = width
+        cached = self._layouts.get(i)
+        if cached is not None:
+            return cached
+
+        paragraph_num, vern_words, gloss_words, free = self.lines[i]
+        items = []
+        y = 0
+        if i == 0 or self.lines[i - 1][0] != paragraph_num:
+            items.append((self.MARGIN, y, f"¶ {paragraph_num}", 'note', self.COLORS['paragraph']))
+            y += self.linespace
+        items.append((self.MARGIN, y, str(i + 1), 'note', self.COLORS['number']))
+        left = self.MARGIN + self.measure("00000", 'note')
+        right = max(width - self.MARGIN, left + 1)
+
+        x = left
+        for n, word in enumerate(vern_words):
+            gloss = gloss_words[n] if n < len(gloss_words) else ""
+            column_width = max(self.measure(word, 'vernacular'), self.measure(gloss or MISSING_GLOSS, 'gloss'))
+            if x > left and x + column_width > right:
+                x = left
+                y += 2 * self.linespace
+            items.append((x, y, word, 'vernacular', self.COLORS['text']))
+            if gloss:
+                items.append((x, y + self.linespace, gloss, 'gloss', self.COLORS['text']))
+            else:
+                items.append((x, y + self.linespace, MISSING_GLOSS, 'gloss', self.COLORS['Error']))
+            x += column_width + self.COLUMN_GAP
+        if vern_words:
+            y += 2 * self.linespace
+
+        for piece in self.wrap(free, 'free', right - left):
+            items.append((left, y, piece, 'free', self.COLORS['free']))
+            y += self.linespace
+        for severity, message in self.warnings.get(i, ()):
+            for piece in self.wrap(message, 'note', right - left):
+                items.append((left, y, piece, 'note', self.COLORS[severity]))
+                y += self.linespace
+
+        self._layouts[i] = result = (y + self.LINE_GAP, items)
+        return result
+
+    def refresh(self):
+        """
+        Redraw the lines from the top visible line down to the bottom of the canvas,
+        and update the scrollbar and status.
+        """
+
+        n = len(self.lines)
+        self.offset = max(0, min(self.offset, n - 1))
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        self.canvas.delete('all')
+
+        y = self.MARGIN
+        i = self.offset
+        while i < n and y < height:
+            line_height, items = self.layout(i, width)
+            if i in self.warnings:
+                severity = 'Error' if any(s == 'Error' for s, _ in self.warnings[i]) else 'Warning'
+                self.canvas.create_rectangle(
+                    0, y, 3, y + line_height - self.LINE_GAP, fill=self.COLORS[severity], width=0)
+            for x, dy, text, font_name, color in items:
+                self.canvas.create_text(x, y + dy, text=text, anchor='nw', font=self.fonts[font_name], fill=color)
+            y += line_height
+            i += 1
+        self.n_visible = i - self.offset
+
+        if n:
+            self.scrollbar.set(self.offset / n, i / n)
+            status = f"Lines {self.offset + 1}-{i} of {n}"
+            if self.warnings:
+                status += f", {len(self.warnings)} with warnings"
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            status = ""
+        self.statusLabel.config(text=' '.join(s for s in (status, self.note) if s))
+
+    def scroll_to(self, i):
+        self.offset = i
+        self.refresh()
+
+    def scroll_by(self, n, what):
+        step = max(self.n_visible - 1, 1) if what == 'pages' else 1
+        self.scroll_to(self.offset + n * step)
+
+    def on_scrollbar(self, *args):
+        """
+        Handle the scrollbar's command: ('moveto', fraction) or ('scroll', n, 'units'/'pages').
+        """
+
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.lines)))
+        elif args[0] == 'scroll':
+            self.scroll_by(int(args[1]), args[2])
+
+    def go_to_row(self, row):
+        """
+        Scroll to the line of a sheet row. Returns True if the row is in a line.
+        """
+
+        if not self.line_rows:
+            return False
+        i = bisect.bisect_right(self.line_rows, row) - 1
+        if i < 0 or row >= self.line_rows[i] + ROWS_PER_LINE_BLOCK:
+            return False
+        self.scroll_to(i)
+        return True
+
+    def go_to_next_warning(self):
+        """
+        Scroll to the next line with warnings below the top line, or back to the first one.
+        """
+
+        if not self.warning_lines:
+            return
+        k = bisect.bisect_right(self.warning_lines, self.offset)
+        self.scroll_to(self.warning_lines[k] if k < len(self.warning_lines) else self.warning_lines[0])
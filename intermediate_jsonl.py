@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+JSON Lines form of the intermediate interlinear text, as an alternative to the <text> XML
+written by excel_to_xml.py and read by xml_to_flextext.py.
+
+One JSON object per line:
+    {"type": "metadata", "format": "interlinear-jsonl", "version": 1,
+     "fields": {"title": "...", "author": "...", ..., "writing_system_gloss": "en"}}
+    {"type": "paragraph"}                                     # starts each paragraph
+    {"type": "line", "vernacular": ["wrd", ...], "gloss": ["gls", ...], "free": "..."}
+    ...
+
+The first record is the metadata. Word and free translation texts are strings, or null
+for an empty XML element; a line without a free translation (or vernacular/gloss line)
+element has no "free" (or "vernacular"/"gloss") key. Conversion to and from the XML is
+lossless (see xml_to_records and records_to_xml), and both sides stream: records are
+written as lines are read from the sheet, and read one at a time.
+
+Usage:
+    python intermediate_jsonl.py text.xml        # writes text.jsonl
+    python intermediate_jsonl.py text.jsonl      # writes text.xml
+"""
+import argparse
+import json
+import os
+import sys
+from xml.etree.ElementTree import Element, SubElement, parse
+
+FORMAT_NAME = "interlinear-jsonl"
+FORMAT_VERSION = 1
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+PARAGRAPH_RECORD = {'type': 'paragraph'}
+
+
+def metadata_record(fields):
+    """
+    Returns the metadata record for a dict of metadata fields (tag: text).
+    """
+
+    return {'type': 'metadata', 'format': FORMAT_NAME, 'version': FORMAT_VERSION, 'fields': dict(fields)}
+
+
+def line_record(vern_words, gloss_words, free):
+    """
+    Returns the record of one interlinear line.
+    """
+
+    return {'type': 'line', 'vernacular': list(vern_words), 'gloss': list(gloss_words), 'free': free}
+
+
+def write_record(f, record):
+    """
+    Write one record as a line of compact JSON to the text file f.
+    """
+
+    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+    f.write('\n')
+
+
+class JsonlWriter:
+    """
+    Writes the records of an InterlinearLoaders.LineStreamingInterlinearLoader as JSON Lines,
+    as they are read (pass writer.emit as the loader's emit).
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.paragraph_num = None
+        self.n_lines = 0
+
+    def emit(self, record):
+        if record[0] == 'metadata':
+            write_record(self.f, metadata_record(record[1]))
+            return
+        _, paragraph_num, vern_words, gloss_words, free = record
+        if paragraph_num != self.paragraph_num:
+            write_record(self.f, PARAGRAPH_RECORD)
+            self.paragraph_num = paragraph_num
+        write_record(self.f, line_record(vern_words, gloss_words, free))
+        self.n_lines += 1
+
+
+def xml_to_records(xml_root):
+    """
+    Yield the JSON Lines records of an intermediate XML <text> element.
+    """
+
+    metadata = xml_root.find('text_metadata')
+    yield metadata_record((element.tag, element.text) for element in (metadata if metadata is not None else ()))
+    body = xml_root.find('body')
+    for paragraph in (body if body is not None else ()):
+        yield PARAGRAPH_RECORD
+        for line in paragraph.findall('line'):
+            record = {'type': 'line'}
+            vern_line = line.find('il-lines/vernacular-line')
+            if vern_line is not None:
+                record['vernacular'] = [wrd.text for wrd in vern_line.findall('wrd')]
+            gloss_line = line.find('il-lines/gloss-line')
+            if gloss_line is not None:
+                record['gloss'] = [gls.text for gls in gloss_line.findall('gls')]
+            free = line.find('free')
+            if free is not None:
+                record['free'] = free.text
+            yield record
+
+
+def write_jsonl(xml_root, f):
+    """
+    Write an intermediate XML <text> element to the text file f as JSON Lines.
+    """
+
+    for record in xml_to_records(xml_root):
+        write_record(f, record)
+
+
+def iter_records(f):
+    """
+    Yield the records of a JSON Lines intermediate file (a text file), checking its format.
+
+    Raises:
+        ValueError: if the file is not in this format.
+    """
+
+    is_first = True     # the first record (blank lines are skipped) must be the metadata
+    for line_num, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"Line {line_num} is not valid JSON: {e}") from None
+        record_type = record.get('type') if isinstance(record, dict) else None
+        if is_first:
+            if record_type != 'metadata' or record.get('format') != FORMAT_NAME:
+                raise ValueError(f"Not an {FORMAT_NAME} file: the first record must be its metadata record.")
+            if record.get('version', 0) > FORMAT_VERSION:
+                raise ValueError(f"Unsupported {FORMAT_NAME} version {record.get('version')} "
+                                 f"(this program reads version {FORMAT_VERSION}).")
+            is_first = False
+        if record_type not in ('metadata', 'paragraph', 'line'):
+            raise ValueError(f"Line {line_num}: unknown record type {record_type!r}.")
+        yield record
+
+
+def records_to_xml(records):
+    """
+    Returns the intermediate XML <text> element built from JSON Lines records.
+    """
+
+    xml_root = Element('text')
+    xml_metadata = SubElement(xml_root, 'text_metadata')
+    xml_body = SubElement(xml_root, 'body')
+    paragraph = None
+    for record in records:
+        if record['type'] == 'metadata':
+            for tag, text in record.get('fields', {}).items():
+                SubElement(xml_metadata, tag).text = text
+        elif record['type'] == 'paragraph':
+            paragraph = SubElement(xml_body, 'paragraph')
+        else:
+            if paragraph is None:   # (lines before any paragraph record)
+                paragraph = SubElement(xml_body, 'paragraph')
+            line = SubElement(paragraph, 'line')
+            if 'vernacular' in record or 'gloss' in record:
+                il_lines = SubElement(line, 'il-lines')
+                if 'vernacular' in record:
+                    vern_line = SubElement(il_lines, 'vernacular-line')
+                    for text in record['vernacular']:
+                        SubElement(vern_line, 'wrd').text = text
+                if 'gloss' in record:
+                    gloss_line = SubElement(il_lines, 'gloss-line')
+                    for text in record['gloss']:
+                        SubElement(gloss_line, 'gls').text = text
+            if 'free' in record:
+                SubElement(line, 'free').text = record['free']
+    return xml_root
+
+
+def read_jsonl_to_xml(path):
+    """
+    Returns the intermediate XML <text> element of a JSON Lines intermediate file.
+    """
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return records_to_xml(iter_records(f))
+
+
+def is_jsonl_file(path):
+    """
+    Returns True if a file is a JSON Lines intermediate: by its extension, or else by its first
+    non-blank byte ('{' rather than the '<' of XML).
+    """
+
+    if os.path.splitext(path)[1].lower() in JSONL_EXTENSIONS:
+        return True
+    with open(path, 'rb') as f:
+        start = f.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')
+    return start[:1] == b'{'
+
+
+# ======================================================================
+# --- CLI WRAPPER (Execution Block) ---
+# ======================================================================
+
+def cli_wrapper():
+    """Converts between the XML and JSON Lines intermediate formats."""
+    parser = argparse.ArgumentParser(
+        description="Convert an intermediate interlinear text between XML (.xml) and JSON Lines (.jsonl)."
+    )
+    parser.add_argument("input_file", help="The intermediate file (.xml or .jsonl).")
+    parser.add_argument("-o", "--output", default=None,
+                        help="The output file (default: the input file name with .jsonl or .xml).")
+    args = parser.parse_args()
+
+    input_path = os.path.abspath(args.input_file)
+    if not os.path.exists(input_path):
+        print(f"FATAL ERROR: Input file not found at path: {input_path}")
+        sys.exit(1)
+    to_xml = is_jsonl_file(input_path)
+    output_path = args.output or os.path.splitext(input_path)[0] + (".xml" if to_xml else ".jsonl")
+
+    try:
+        if to_xml:
+            from xml_writer import write_pretty_xml
+            xml_root = read_jsonl_to_xml(input_path)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                write_pretty_xml(xml_root, f)
+        else:
+            xml_root = parse(input_path).getroot()
+            if xml_root.tag != 'text':
+                raise ValueError(f"Root tag expected to be 'text', found '{xml_root.tag}'")
+            with open(output_path, 'w', encoding='utf-8') as f:
+                write_jsonl(xml_root, f)
+    except Exception as e:
+        print(f"FATAL ERROR: {e}")
+        sys.exit(1)
+    print(f"Written to: '{os.path.basename(output_path)}'")
+
+
+if __name__ == "__main__":
+    cli_wrapper()
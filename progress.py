@@ -0,0 +1,213 @@
+"""
+Progress reporting for the loaders and exporters.
+
+The protocol is a callable:
+    progress(done, total=None, message=None)
+called as often as convenient (e.g. after every block), with the amount of work done,
+the total if known, and an optional short description. Any function with that signature
+will do; the reporters here coalesce the calls, passing on at most rate_hz updates per
+second (20 by default), so reporting costs almost nothing however often it is called.
+
+Reporters:
+    NullProgress         ignores all updates
+    TqdmProgress         a tqdm progress bar on the console
+    JsonLinesProgress    one JSON object per line (e.g. on stderr, for other programs to read)
+    QueueProgress        puts updates on a queue.Queue, for a GUI thread to poll
+    CallbackProgress     calls a function with the coalesced updates
+
+Usage:
+    with make_progress('auto', desc="Processing Blocks", unit="block") as progress:
+        loader.run(progress)
+"""
+import json
+import sys
+import time
+
+DEFAULT_RATE_HZ = 20
+PROGRESS_KINDS = ('auto', 'tqdm', 'json', 'null')   # for a --progress command-line option
+
+
+class ProgressReporter:
+    """
+    Base class for rate-limited progress reporters.
+
+    Child classes implement emit(done, total, message), which is called for at most
+    rate_hz of the updates per second, and always for the last one (on finish()).
+    """
+
+    def __init__(self, rate_hz=DEFAULT_RATE_HZ):
+        self.interval = 1.0 / rate_hz if rate_hz else 0.0
+        self.done = 0
+        self.total = None
+        self.message = None
+        self.n_emitted = 0
+        self._next_emit_time = 0.0
+        self._is_emitted = True    # True if the latest update has been passed on
+
+    def __call__(self, done, total=None, message=None):
+        self.done = done
+        self.total = total
+        self.message = message
+        now = time.monotonic()
+        if now >= self._next_emit_time:
+            self._next_emit_time = now + self.interval
+            self._is_emitted = True
+            self.n_emitted += 1
+            self.emit(done, total, message)
+        else:
+            self._is_emitted = False
+
+    def emit(self, done, total, message):
+        """
+        Show or send one update.
+        """
+
+    def write(self, text):
+        """
+        Show a message without disturbing the progress display.
+        """
+
+        if sys.stdout is not None:
+            print(text)
+
+    def finish(self):
+        """
+        Pass on the latest update if it was held back, and close the display.
+        """
+
+        if not self._is_emitted:
+            self._is_emitted = True
+            self.n_emitted += 1
+            self.emit(self.done, self.total, self.message)
+        self.close()
+
+    def close(self):
+        """
+        Release the display (e.g. end the progress bar).
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.finish()
+
+
+class NullProgress(ProgressReporter):
+    """
+    Ignores all updates (e.g. with no console window).
+    """
+
+    def __call__(self, done, total=None, message=None):
+        pass
+
+    def finish(self):
+        pass
+
+
+class TqdmProgress(ProgressReporter):
+    """
+    Shows progress with a tqdm progress bar.
+    """
+
+    def __init__(self, desc="", unit="it", rate_hz=DEFAULT_RATE_HZ, file=None):
+        from tqdm import tqdm
+        super().__init__(rate_hz)
+        self.bar = tqdm(desc=desc, unit=unit, mininterval=0, file=file)   # (this class does the rate limiting)
+
+    def emit(self, done, total, message):
+        if total != self.bar.total:
+            self.bar.total = total
+        self.bar.update(done - self.bar.n)
+
+    def write(self, text):
+        self.bar.write(text)
+
+    def close(self):
+        self.bar.close()
+
+
+class JsonLinesProgress(ProgressReporter):
+    """
+    Writes each update as a JSON object on its own line, e.g.
+        {"event": "progress", "done": 120, "total": 900, "fraction": 0.1333, "message": null, "elapsed": 0.52}
+    and {"event": "finish", ...} at the end, or {"event": "message", "text": ...} for write().
+    """
+
+    def __init__(self, stream=None, rate_hz=DEFAULT_RATE_HZ):
+        super().__init__(rate_hz)
+        self.stream = stream if stream is not None else sys.stderr
+        self.start_time = time.monotonic()
+
+    def _write_json(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def emit(self, done, total, message, event="progress"):
+        self._write_json({
+            'event': event, 'done': done, 'total': total,
+            'fraction': round(done / total, 4) if total else None,
+            'message': message, 'elapsed': round(time.monotonic() - self.start_time, 3),
+        })
+
+    def write(self, text):
+        self._write_json({'event': 'message', 'text': text})
+
+    def finish(self):
+        self.n_emitted += 1
+        self.emit(self.done, self.total, self.message, event="finish")
+
+
+class QueueProgress(ProgressReporter):
+    """
+    Puts updates on a queue, as ('progress', done, total, message) and ('message', text) tuples,
+    and ('finish', done, total, message) at the end. For work in a background thread, with the
+    GUI thread polling the queue (e.g. with tkinter's after()).
+    """
+
+    def __init__(self, queue, rate_hz=DEFAULT_RATE_HZ):
+        super().__init__(rate_hz)
+        self.queue = queue
+
+    def emit(self, done, total, message):
+        self.queue.put(('progress', done, total, message))
+
+    def write(self, text):
+        self.queue.put(('message', text))
+
+    def close(self):
+        self.queue.put(('finish', self.done, self.total, self.message))
+
+
+class CallbackProgress(ProgressReporter):
+    """
+    Calls function(done, total, message) with the coalesced updates.
+    """
+
+    def __init__(self, function, rate_hz=DEFAULT_RATE_HZ):
+        super().__init__(rate_hz)
+        self.function = function
+
+    def emit(self, done, total, message):
+        self.function(done, total, message)
+
+
+def make_progress(kind='auto', desc="", unit="it", rate_hz=DEFAULT_RATE_HZ):
+    """
+    Returns a progress reporter of one of PROGRESS_KINDS.
+
+    'auto' is a tqdm bar if there is a console and tqdm is installed, else NullProgress.
+    """
+
+    if kind == 'null':
+        return NullProgress()
+    if kind == 'json':
+        return JsonLinesProgress(rate_hz=rate_hz)
+    if kind == 'auto':
+        if sys.stdin is None or sys.stderr is None:     # no console window (pyinstaller -w)
+            return NullProgress()
+        try:
+            return TqdmProgress(desc, unit, rate_hz)
+        except ImportError:
+            return NullProgress()
+    return TqdmProgress(desc, unit, rate_hz)
@@ -0,0 +1,173 @@
+"""
+Limits on the resources a workbook may use while it is loaded, for files from untrusted sources.
+
+A workbook with a huge dimension, millions of styled empty cells or a zip bomb could
+otherwise use up all memory before the first interlinear block is read. Two kinds of checks:
+
+    check_workbook(path, limits)    pre-flight, before the workbook is opened: the uncompressed
+                                    size (and compression ratio) of each zip part, the sheet's
+                                    <dimension> tag, and the number of shared strings
+    limits.check_rows(), ...        while loading and parsing: rows and cells read, shared
+                                    strings read, and the time since loading started
+
+Both raise ResourceLimitExceeded, whose message says which limit was reached.
+The loaders in InterlinearLoaders.py check the default limits below unless given others
+(loader.limits = ResourceLimits(...), or None for no checks); a limit of None is not checked.
+
+Uncompressed sizes are those in the zip directory. Python's zipfile never inflates a part
+beyond its recorded size, so they bound what any backend can decompress.
+"""
+import time
+import zipfile
+
+from engine_selection import format_memory_size, parse_memory_size
+from row_sources import dimension_size, inspect_xlsx
+
+MAX_ROWS = 500_000                  # sheet rows (4 per interlinear line)
+MAX_CELLS = 5_000_000               # cell positions, including empty ones
+MAX_UNCOMPRESSED_BYTES = 1024 ** 3  # all parts of the zip, inflated
+MAX_SHARED_STRINGS = 2_000_000
+MAX_COMPRESSION_RATIO = 200         # of any part over RATIO_MIN_BYTES; spreadsheet XML is usually 5-30
+RATIO_MIN_BYTES = 1024 ** 2
+MIN_CELL_XML_BYTES = len('<c/>')    # the shortest cell in sheet XML (openpyxl accepts cells without r="...")
+
+
+class ResourceLimitExceeded(Exception):
+    """
+    Raised when a file exceeds one of the ResourceLimits. The message says which, and by how much.
+    """
+
+
+class ResourceLimits:
+    """
+    Limits on the rows, cells, decompressed bytes, shared strings and wall time of one load.
+
+    Call start() when loading starts (the loaders do), for max_seconds.
+    """
+
+    def __init__(self, max_rows=MAX_ROWS, max_cells=MAX_CELLS, max_bytes=MAX_UNCOMPRESSED_BYTES,
+                 max_shared_strings=MAX_SHARED_STRINGS, max_seconds=None,
+                 max_compression_ratio=MAX_COMPRESSION_RATIO):
+        self.max_rows = max_rows
+        self.max_cells = max_cells
+        self.max_bytes = max_bytes
+        self.max_shared_strings = max_shared_strings
+        self.max_seconds = max_seconds
+        self.max_compression_ratio = max_compression_ratio
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.monotonic()
+
+    def check_rows(self, n_rows):
+        if self.max_rows is not None and n_rows > self.max_rows:
+            raise ResourceLimitExceeded(
+                f"The sheet has more than {self.max_rows:,} rows (the limit); it may be corrupt or not a text.")
+
+    def check_cells(self, n_cells):
+        if self.max_cells is not None and n_cells > self.max_cells:
+            raise ResourceLimitExceeded(
+                f"The sheet has more than {self.max_cells:,} cells (the limit), counting empty formatted cells.")
+
+    def check_bytes(self, n_bytes, what="The workbook decompresses to"):
+        if self.max_bytes is not None and n_bytes > self.max_bytes:
+            raise ResourceLimitExceeded(
+                f"{what} {format_memory_size(n_bytes)}, more than the limit of "
+                f"{format_memory_size(self.max_bytes)}.")
+
+    def check_shared_strings(self, n_strings):
+        if self.max_shared_strings is not None and n_strings > self.max_shared_strings:
+            raise ResourceLimitExceeded(
+                f"The workbook has more than {self.max_shared_strings:,} distinct texts (the limit).")
+
+    def check_time(self):
+        if self.max_seconds is not None and self.start_time is not None:
+            elapsed = time.monotonic() - self.start_time
+            if elapsed > self.max_seconds:
+                raise ResourceLimitExceeded(
+                    f"Loading took more than {self.max_seconds:g} s (the limit), after {elapsed:.3g} s.")
+
+    def check_compression_ratio(self, info):
+        """
+        Check one zipfile.ZipInfo for a suspicious compression ratio (a zip bomb).
+        """
+
+        if self.max_compression_ratio is None or info.file_size < RATIO_MIN_BYTES:
+            return
+        ratio = info.file_size / max(info.compress_size, 1)
+        if ratio > self.max_compression_ratio:
+            raise ResourceLimitExceeded(
+                f"The workbook part '{info.filename}' is compressed {ratio:.0f} times "
+                f"(limit {self.max_compression_ratio}); it looks like a zip bomb.")
+
+
+def check_workbook(path, limits, dense=False, loads_all_cells=False):
+    """
+    Pre-flight check of an .xlsx file against limits, reading only the zip directory
+    and the start of the sheet and shared strings parts.
+
+    dense: the backend creates every row and cell position of the sheet's dimension (e.g.
+    openpyxl's read-only rows without reset_dimensions()), so the dimension is checked
+    against max_rows and max_cells.
+    Otherwise a wrong dimension costs little, and rows and cells are counted as they are read.
+
+    loads_all_cells: the backend builds every cell of the sheet XML before the first row is
+    read (openpyxl's full load), so the most cells the sheet XML could hold (its size over
+    MIN_CELL_XML_BYTES, whatever its dimension tag says) is checked against max_cells.
+
+    Returns:
+        dict: the inspect_xlsx() information, plus 'uncompressed_size' (all parts).
+
+    Raises:
+        ResourceLimitExceeded: if a limit would be exceeded by loading the file.
+    """
+
+    with zipfile.ZipFile(path) as archive:
+        infos = archive.infolist()
+    total = 0
+    for info in infos:
+        limits.check_compression_ratio(info)
+        total += info.file_size
+    limits.check_bytes(total)
+
+    info = inspect_xlsx(path)
+    info['uncompressed_size'] = total
+    n_rows, n_cols = dimension_size(info['dimension'])
+    if dense and n_rows is not None:
+        limits.check_rows(n_rows)
+        limits.check_cells(n_rows * n_cols)
+    if loads_all_cells and limits.max_cells is not None:
+        max_cells = info['sheet_size'] // MIN_CELL_XML_BYTES
+        if max_cells > limits.max_cells:
+            raise ResourceLimitExceeded(
+                f"The sheet is {format_memory_size(info['sheet_size'])} of XML, which could hold more than "
+                f"{limits.max_cells:,} cells (the limit) for the 'full' backend, which loads every cell at once. "
+                f"Use another backend (e.g. --backend raw).")
+    if info['shared_strings_count'] is not None:
+        limits.check_shared_strings(info['shared_strings_count'])
+    return info
+
+
+def add_limit_arguments(parser):
+    """
+    Add --max-rows, --max-cells, --max-bytes and --max-seconds options to an argparse parser.
+    """
+
+    group = parser.add_argument_group("resource limits (0: no limit)")
+    group.add_argument("--max-rows", type=int, default=MAX_ROWS,
+                       help=f"Refuse sheets with more rows than this (default: {MAX_ROWS:,}).")
+    group.add_argument("--max-cells", type=int, default=MAX_CELLS,
+                       help=f"Refuse sheets with more cells than this (default: {MAX_CELLS:,}).")
+    group.add_argument("--max-bytes", type=parse_memory_size, default=MAX_UNCOMPRESSED_BYTES,
+                       help="Refuse workbooks that decompress to more than this, e.g. 500M (default: 1G).")
+    group.add_argument("--max-seconds", type=float, default=0,
+                       help="Give up loading after this many seconds (default: no limit).")
+
+
+def limits_from_args(args):
+    """
+    Returns the ResourceLimits of options added by add_limit_arguments.
+    """
+
+    return ResourceLimits(max_rows=args.max_rows or None, max_cells=args.max_cells or None,
+                          max_bytes=args.max_bytes or None, max_seconds=args.max_seconds or None)
@@ -0,0 +1,532 @@
+from abc import ABC, abstractmethod
+import csv
+import os
+import posixpath
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+
+class RowSource(ABC):
+    """
+    Abstract class for a source of spreadsheet rows (a "backend" for the interlinear loaders).
+
+    A row source streams the rows of one sheet as tuples of cell values, starting at row 1,
+    with None (or '') for empty cells. Rows may have different lengths.
+
+    Usage:
+        source = ReadOnlyWorkbookRows(path)
+        source.open()               # sets source.max_row (None if unknown)
+        for row_values in source.iter_rows():
+            ...
+        source.close()
+
+    Concrete child classes set OPEN_PROGRESS_WEIGHT: the share of the total loading
+    work that open() takes, for progress bars, and max_row_is_exact: True if max_row is
+    the real number of rows, False if it is only an estimate for progress (e.g. from the
+    sheet's <dimension> tag, which can be wrong), so the rows must be read to find the end.
+
+    To refuse files that would use too many resources, call check_limits(limits)
+    (a resource_limits.ResourceLimits) before open().
+    """
+
+    OPEN_PROGRESS_WEIGHT = 0.1
+    max_row_is_exact = False
+
+    def __init__(self, path):
+        self.path = path
+        self.max_row = None
+        self.limits = None
+
+    def check_limits(self, limits):
+        """
+        Check the file against limits before opening it, and keep them for use while reading.
+
+        Raises resource_limits.ResourceLimitExceeded.
+        """
+
+        self.limits = limits
+
+    @abstractmethod
+    def open(self):
+        """
+        Open the file and get ready to stream rows. Sets self.max_row if the source knows it.
+        """
+
+    @abstractmethod
+    def iter_rows(self):
+        """
+        Returns an iterator of row value tuples, starting at row 1.
+        """
+
+    def close(self):
+        """
+        Release any open files. Safe to call more than once.
+        """
+
+    def read_fraction(self, n_rows_read):
+        """
+        Returns the fraction (0.0 - 1.0) of the sheet read, given the number of rows read so far.
+        """
+
+        if self.max_row:
+            return min(n_rows_read / self.max_row, 1.0)     # (max_row may be an underestimate)
+        return 0.0
+
+
+class FullWorkbookRows(RowSource):
+    """
+    Rows of the first sheet from openpyxl's normal (full, in-memory) workbook load.
+
+    Slowest, but reads sheets whose dimension information is missing or wrong.
+
+    Rows are built from the cells present in the worksheet's cell store (sparse, the default):
+    openpyxl's iter_rows() would create an empty Cell for every position of the sheet's
+    dimension, so a mostly empty 1000-line template would grow to ~100,000 cells while being read.
+    Set sparse = False for iter_rows() (same values, with every row the full sheet width).
+    The cell store is private to openpyxl, so if a version of it has none, iter_rows() is used.
+    """
+
+    OPEN_PROGRESS_WEIGHT = 0.5
+    max_row_is_exact = True     # openpyxl computes it from the cells loaded
+    sparse = True
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.workbook = None
+
+    def check_limits(self, limits):
+        from resource_limits import check_workbook
+        super().check_limits(limits)
+        # openpyxl builds every cell in the sheet XML before any row is read, so this must be checked first
+        check_workbook(self.path, limits, dense=not self.sparse, loads_all_cells=True)
+
+    def open(self):
+        import openpyxl
+        try:
+            self.workbook = openpyxl.load_workbook(self.path, data_only=True)
+        except Exception as e:
+            raise Exception(f"Error loading Excel file '{self.path}'") from e
+        try:
+            self.sheet = self.workbook.worksheets[0]
+        except Exception as e:
+            raise Exception(f"Error loading first sheet of Excel file '{self.path}'") from e
+        self.max_row = self.sheet.max_row
+        if self.sparse and not isinstance(getattr(self.sheet, '_cells', None), dict):
+            self.sparse = False     # (no cell store to read)
+            if self.limits is not None:
+                self.limits.check_cells(self.sheet.max_row * self.sheet.max_column)   # (iter_rows() creates them all)
+
+    def iter_rows(self):
+        if not self.sparse:
+            return self.sheet.iter_rows(values_only=True)
+        return self.iter_sparse_rows()
+
+    def iter_sparse_rows(self):
+        """
+        Yield row value tuples up to max_row from the cells present in the sheet, without creating any.
+
+        Each row ends at its last non-empty cell; rows without values are empty tuples.
+        """
+
+        values_by_row = {}
+        for (row, col), cell in self.sheet._cells.items():   # (openpyxl's cell store)
+            value = cell.value
+            if value is not None:
+                values_by_row.setdefault(row, []).append((col, value))
+        for row in range(1, max(self.max_row or 0, max(values_by_row, default=0)) + 1):
+            cells = values_by_row.pop(row, None)
+            if not cells:
+                yield ()
+                continue
+            row_values = [None] * max(col for col, _ in cells)
+            for col, value in cells:
+                row_values[col - 1] = value
+            yield tuple(row_values)
+
+
+class ReadOnlyWorkbookRows(FullWorkbookRows):
+    """
+    Rows of the first sheet streamed by openpyxl's read-only mode.
+
+    Opening reads only the workbook structure, shared strings and styles; sheet rows
+    are parsed as they are iterated, until they run out (the sheet's <dimension> tag
+    only gives max_row, for progress).
+    """
+
+    OPEN_PROGRESS_WEIGHT = 0.1
+    max_row_is_exact = False    # from the sheet's <dimension> tag
+
+    def check_limits(self, limits):
+        from resource_limits import check_workbook
+        RowSource.check_limits(self, limits)
+        check_workbook(self.path, limits)
+
+    def open(self):
+        import openpyxl
+        try:
+            self.workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        except Exception as e:
+            raise Exception(f"Error loading Excel file '{self.path}'") from e
+        try:
+            self.sheet = self.workbook.worksheets[0]
+        except Exception as e:
+            raise Exception(f"Error loading first sheet of Excel file '{self.path}'") from e
+        self.max_row = self.sheet.max_row
+        # read-only rows are otherwise cut off (and padded) at the <dimension> tag's last row and column
+        self.sheet.reset_dimensions()
+
+    def iter_rows(self):
+        return self.sheet.iter_rows(values_only=True)   # (read-only sheets stream rows; there is no cell store)
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+
+
+def _local_name(tag):
+    """
+    Returns an XML tag without its namespace, e.g. 'row' for '{http://...}row'.
+    """
+
+    return tag.rpartition('}')[2]
+
+
+def dimension_max_row(dimension):
+    """
+    Returns the last row of a sheet dimension such as 'A1:Z4005' (None if there is no row number).
+    """
+
+    last_cell = (dimension or '').rpartition(':')[2]
+    digits = ''.join(c for c in last_cell if c.isdigit())
+    return int(digits) if digits else None
+
+
+def dimension_size(dimension):
+    """
+    Returns (rows, columns) of a sheet dimension such as 'A1:Z4005', or (None, None) if there is none.
+    """
+
+    first_cell, _, last_cell = (dimension or '').partition(':')
+    last_cell = last_cell or first_cell
+    max_row = dimension_max_row(dimension)
+    if max_row is None:
+        return None, None
+    first_row = dimension_max_row(first_cell) or 1
+    return max_row - first_row + 1, max(_column_index(last_cell) - _column_index(first_cell) + 1, 1)
+
+
+def _column_index(cell_ref):
+    """
+    Returns the 1-based column number of a cell reference such as 'AB12'.
+    """
+
+    col = 0
+    for char in cell_ref:
+        if char.isdigit():
+            break
+        col = col * 26 + ord(char.upper()) - 64
+    return col
+
+
+class _CountingReader:
+    """
+    File wrapper counting the bytes read, for progress from bytes decompressed.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.n_bytes = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.n_bytes += len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+class RawXlsxRows(RowSource):
+    """
+    Rows of the first sheet read straight from the .xlsx zip with the standard library.
+
+    Shared strings are read when opening, then the sheet XML is streamed with iterparse,
+    clearing each row after use. Cell values are converted as openpyxl does with
+    data_only=True (cached formula results, numbers as int or float, booleans),
+    except that date-formatted numbers are left as numbers (styles are not read).
+    """
+
+    OPEN_PROGRESS_WEIGHT = 0.05
+    REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.dimension = None
+        self.archive = None
+        self._sheet_file = None
+
+    def check_limits(self, limits):
+        from resource_limits import check_workbook
+        super().check_limits(limits)
+        check_workbook(self.path, limits)
+
+    def open(self):
+        try:
+            self.archive = zipfile.ZipFile(self.path)
+            sheet_path, shared_strings_path = self.find_parts()
+            self.shared_strings = self.read_shared_strings(shared_strings_path) if shared_strings_path else []
+            self.sheet_size = self.archive.getinfo(sheet_path).file_size
+            self._sheet_file = _CountingReader(self.archive.open(sheet_path))
+        except Exception as e:
+            raise Exception(f"Error loading Excel file '{self.path}'") from e
+
+        # the <dimension> element comes before <sheetData>; stop there to start streaming rows
+        self._events = iterparse(self._sheet_file, events=('start', 'end'))
+        self._sheet_data = None
+        for event, elem in self._events:
+            name = _local_name(elem.tag)
+            if event == 'end' and name == 'dimension':
+                self.dimension = elem.get('ref')
+                self.max_row = dimension_max_row(self.dimension)
+            elif event == 'start' and name == 'sheetData':
+                self._sheet_data = elem
+                break
+
+    def find_parts(self):
+        """
+        Returns the zip paths of the first worksheet and of the shared strings (or None).
+        """
+
+        def read_rels(rels_path):
+            rels = {}
+            for _, elem in iterparse(self.archive.open(rels_path)):
+                if _local_name(elem.tag) == 'Relationship':
+                    target = elem.get('Target')
+                    if target.startswith('/'):
+                        target = target[1:]
+                    else:
+                        target = posixpath.normpath(posixpath.join('xl', target))
+                    rels[elem.get('Id')] = (elem.get('Type', ''), target)
+            return rels
+
+        rels = read_rels('xl/_rels/workbook.xml.rels')
+        sheet_path = None
+        for _, elem in iterparse(self.archive.open('xl/workbook.xml')):
+            if _local_name(elem.tag) == 'sheet':
+                rel_type, target = rels[elem.get(self.REL_NS + 'id')]
+                if rel_type.endswith('/worksheet'):
+                    sheet_path = target
+                    break
+        if sheet_path is None:
+            raise ValueError("No worksheet found")
+        shared_strings_path = None
+        for rel_type, target in rels.values():
+            if rel_type.endswith('/sharedStrings'):
+                shared_strings_path = target
+        return sheet_path, shared_strings_path
+
+    def read_shared_strings(self, shared_strings_path):
+        """
+        Returns the list of shared strings, as plain text (rich text runs joined, phonetic runs skipped).
+        """
+
+        strings = []
+        for _, elem in iterparse(self.archive.open(shared_strings_path)):
+            if _local_name(elem.tag) == 'si':
+                strings.append(self.element_text(elem))
+                elem.clear()
+                if self.limits is not None and not len(strings) % 10000:
+                    self.limits.check_shared_strings(len(strings))  # (the count in <sst> may be wrong)
+                    self.limits.check_time()
+        return strings
+
+    @staticmethod
+    def element_text(elem):
+        """
+        Returns the text of an <si> or <is> element: its <t>, or the <t> of each <r> run.
+        """
+
+        parts = []
+        for child in elem:
+            name = _local_name(child.tag)
+            if name == 't':
+                parts.append(child.text or '')
+            elif name == 'r':
+                for t in child:
+                    if _local_name(t.tag) == 't':
+                        parts.append(t.text or '')
+        return ''.join(parts)
+
+    def cell_value(self, cell):
+        """
+        Returns the (cached) value of a <c> element, converted like openpyxl's data_only mode.
+        """
+
+        cell_type = cell.get('t', 'n')
+        if cell_type == 'inlineStr':
+            for child in cell:
+                if _local_name(child.tag) == 'is':
+                    return self.element_text(child)
+            return None
+        value = None
+        for child in cell:
+            if _local_name(child.tag) == 'v':
+                value = child.text
+                break
+        if value is None:
+            return None
+        if cell_type == 's':
+            return self.shared_strings[int(value)]
+        elif cell_type == 'b':
+            return bool(int(value))
+        elif cell_type == 'n':
+            if '.' in value or 'E' in value or 'e' in value:
+                return float(value)
+            return int(value)
+        else:   # 'str' (formula result), 'e' (error), 'd' (ISO date)
+            return value
+
+    def iter_rows(self):
+        n_rows = 0
+        for event, elem in self._events:
+            if event != 'end' or _local_name(elem.tag) != 'row':
+                continue
+            row_num = int(elem.get('r', n_rows + 1))
+            while n_rows < row_num - 1:  # rows missing from the file are empty
+                n_rows += 1
+                yield ()
+            values = []
+            for cell in elem:
+                if _local_name(cell.tag) != 'c':
+                    continue
+                col = _column_index(cell.get('r')) if cell.get('r') else len(values) + 1
+                values.extend([None] * (col - 1 - len(values)))
+                values.append(self.cell_value(cell))
+            n_rows += 1
+            yield tuple(values)
+            self._sheet_data.remove(elem)   # keep memory bounded
+
+    def close(self):
+        if self._sheet_file is not None:
+            self._sheet_file.close()
+        if self.archive is not None:
+            self.archive.close()
+
+    def read_fraction(self, n_rows_read):
+        return self._sheet_file.n_bytes / max(self.sheet_size, 1)
+
+
+def inspect_xlsx(path):
+    """
+    Cheaply inspect the first sheet of an .xlsx file, without reading its rows.
+
+    Returns a dict with 'sheet_size' and 'shared_strings_size' (uncompressed bytes),
+    'dimension' (the sheet's <dimension> ref, e.g. 'A1:Z4005', or None if missing)
+    and 'shared_strings_count' (the unique count in the shared strings part, or None if not given).
+    """
+
+    source = RawXlsxRows(path)
+    try:
+        source.archive = zipfile.ZipFile(path)
+        sheet_path, shared_strings_path = source.find_parts()
+        info = {
+            'sheet_size': source.archive.getinfo(sheet_path).file_size,
+            'shared_strings_size': source.archive.getinfo(shared_strings_path).file_size if shared_strings_path else 0,
+            'dimension': None,
+            'shared_strings_count': None,
+        }
+        with source.archive.open(sheet_path) as f:
+            for event, elem in iterparse(f, events=('start', 'end')):
+                name = _local_name(elem.tag)
+                if event == 'end' and name == 'dimension':
+                    info['dimension'] = elem.get('ref')
+                elif event == 'start' and name == 'sheetData':
+                    break
+        if shared_strings_path:
+            with source.archive.open(shared_strings_path) as f:
+                for _, elem in iterparse(f, events=('start',)):
+                    count = elem.get('uniqueCount') or elem.get('count')   # attributes of the <sst> root
+                    info['shared_strings_count'] = int(count) if count and count.isdigit() else None
+                    break
+    except Exception as e:
+        raise Exception(f"Error inspecting Excel file '{path}'") from e
+    finally:
+        if getattr(source, 'archive', None) is not None:
+            source.archive.close()
+    return info
+
+
+class DelimitedRows(RowSource):
+    """
+    Rows of a CSV/TSV file (e.g. a CSV export of the Excel template), streamed with csv.reader.
+
+    delimiter: None to guess from the file extension (.tsv/.tab) or contents,
+        or a single character such as ',', ';' or '\\t'.
+    """
+
+    OPEN_PROGRESS_WEIGHT = 0.0
+    TAB_EXTENSIONS = ('.tsv', '.tab')
+    SNIFF_DELIMITERS = ',;\t'
+    SNIFF_SIZE = 4096
+
+    def __init__(self, path, delimiter=None):
+        super().__init__(path)
+        self.delimiter = delimiter
+        self._file = None
+        self._file_size = 0
+        self._chars_read = 0
+
+    def guess_delimiter(self, sample):
+        """
+        Return the delimiter to use, from self.delimiter, the file extension or a sample of the file.
+        """
+
+        if self.delimiter:
+            return self.delimiter
+        if os.path.splitext(self.path)[1].lower() in self.TAB_EXTENSIONS:
+            return '\t'
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=self.SNIFF_DELIMITERS).delimiter
+        except csv.Error:
+            return ','
+
+    def _count_lines(self, f):
+        """
+        Yield the lines of file f, counting characters read for progress.
+        """
+
+        for line in f:
+            self._chars_read += len(line)
+            yield line
+
+    def check_limits(self, limits):
+        super().check_limits(limits)
+        limits.check_bytes(os.path.getsize(self.path), "The file is")
+
+    def open(self):
+        try:
+            self._file_size = os.path.getsize(self.path)
+            self._file = open(self.path, 'r', encoding='utf-8-sig', newline='')
+            self.delimiter = self.guess_delimiter(self._file.read(self.SNIFF_SIZE))
+            self._file.seek(0)
+        except Exception as e:
+            raise Exception(f"Error loading delimited file '{self.path}'") from e
+
+    def iter_rows(self):
+        return csv.reader(self._count_lines(self._file), delimiter=self.delimiter)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def read_fraction(self, n_rows_read):
+        return self._chars_read / max(self._file_size, 1)
+
+
+# Backends for Excel files, by name (e.g. for a --backend command-line option)
+EXCEL_ROW_SOURCES = {
+    'read-only': ReadOnlyWorkbookRows,
+    'full': FullWorkbookRows,
+    'raw': RawXlsxRows,
+}
+DEFAULT_EXCEL_ROW_SOURCE = 'read-only'
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for loading and converting interlinear workbooks.
+
+Builds realistic, mostly sparse workbooks from the Excel template (6-10 words per line,
+occasional paragraph breaks, the rest of the template left empty) in a temporary
+directory, then times each registered benchmark on them.
+
+Usage:
+    python scripts/benchmark.py                 # all benchmarks, default sizes
+    python scripts/benchmark.py --lines 200 1000 --repeat 5
+    python scripts/benchmark.py --only loader   # benchmarks whose name contains 'loader'
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+TEMPLATE_PATH = os.path.join(
+    PROJECT_ROOT, "Excel Templates", "English", "Interlinear Text Excel Template (ENG 1000 lines).xltx")
+
+BENCHMARKS = []  # (name, function(workbook_path), unit) tuples
+
+
+def benchmark(name, unit='ms'):
+    """
+    Decorator registering a function, taking the path of a generated workbook, as a benchmark.
+
+    If the function returns a number, it is used as the time in seconds (for benchmarks
+    that time only part of their work); otherwise the whole call is timed.
+    With unit='MiB', the function returns a number of bytes (e.g. memory used) instead.
+    """
+
+    def register(function):
+        BENCHMARKS.append((name, function, unit))
+        return function
+    return register
+
+
+def make_workbook(path, n_lines, seed=0):
+    """
+    Fill the 1000-line template with n_lines of synthetic interlinear text and save it to path.
+    """
+
+    import openpyxl
+    rng = random.Random(seed)
+    workbook = openpyxl.load_workbook(TEMPLATE_PATH)
+    workbook.template = False
+    sheet = workbook.worksheets[0]
+    for coord, value in (('C2', 'Benchmark text'), ('C3', 'Author'), ('C4', 'Transcriber'),
+                         ('N2', 'xku'), ('N3', 'en'), ('N4', 'en')):
+        sheet[coord] = value
+    # clear the template's example lines
+    for row in sheet.iter_rows(min_row=6, min_col=3, max_col=26):
+        for cell in row:
+            if cell.value is not None and cell.coordinate not in sheet.merged_cells:
+                cell.value = None
+    row = 6
+    for line in range(n_lines):
+        if line and rng.random() < 0.05:
+            row += 4    # paragraph break
+        for i in range(rng.randint(6, 10)):
+            sheet.cell(row=row, column=3 + i).value = f"wrd{line}_{i}"
+            sheet.cell(row=row + 1, column=3 + i).value = rng.choice(("1SG", "and", "then", "go", "house", "PST"))
+        sheet.cell(row=row + 2, column=3).value = f"Free translation of line {line}."
+        row += 4
+    workbook.save(path)
+
+
+def time_it(function, repeat):
+    """
+    Returns the best wall time in seconds of calling function() repeat times.
+    """
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        seconds = function()
+        if seconds is None:
+            seconds = time.perf_counter() - start
+        best = min(best, seconds)
+    return best
+
+
+# ======================================================================
+# --- Benchmarks ---
+# ======================================================================
+
+def run_loader(path, backend='read-only', **attributes):
+    from InterlinearLoaders import ExcelInterlinearLoader
+    loader = ExcelInterlinearLoader(path, backend=backend)
+    for name, value in attributes.items():
+        setattr(loader, name, value)
+    loader.run()
+    return loader
+
+
+def parse_preloaded(path, **attributes):
+    """
+    Time only the block parsing of the loader, with all sheet rows already read into memory.
+    """
+
+    from InterlinearLoaders import ExcelInterlinearLoader
+    loader = ExcelInterlinearLoader(path)
+    for name, value in attributes.items():
+        setattr(loader, name, value)
+    loader.step()   # open the workbook
+    loader._row_iter = iter(list(loader._row_iter))
+    start = time.perf_counter()
+    loader.run()
+    return time.perf_counter() - start
+
+
+@benchmark("loader: openpyxl read-only backend")
+def bench_loader_read_only(path):
+    run_loader(path, backend='read-only')
+
+
+@benchmark("loader: openpyxl full backend")
+def bench_loader_full(path):
+    run_loader(path, backend='full')
+
+
+@benchmark("loader: raw xlsx backend")
+def bench_loader_raw(path):
+    run_loader(path, backend='raw')
+
+
+def run_full_loader(path, sparse):
+    from InterlinearLoaders import ExcelInterlinearLoader
+    from row_sources import FullWorkbookRows
+    rows = FullWorkbookRows(path)
+    rows.sparse = sparse
+    loader = ExcelInterlinearLoader(path, row_source=rows)
+    loader.run()
+    return rows
+
+
+def full_loader_peak_memory(path, sparse):
+    """
+    Returns the peak bytes allocated while loading with the openpyxl full backend.
+    """
+
+    import gc
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    run_full_loader(path, sparse)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+@benchmark("loader: openpyxl full backend, dense iter_rows")
+def bench_loader_full_dense(path):
+    run_full_loader(path, sparse=False)
+
+
+@benchmark("full backend peak memory: dense iter_rows", unit='MiB')
+def bench_full_memory_dense(path):
+    return full_loader_peak_memory(path, sparse=False)
+
+
+@benchmark("full backend peak memory: sparse cell store", unit='MiB')
+def bench_full_memory_sparse(path):
+    return full_loader_peak_memory(path, sparse=True)
+
+
+@benchmark("validate only: raw backend, no XML")
+def bench_validate(path):
+    from validator import validate_file
+    validate_file(path, backend='raw')
+
+
+def run_loader_with_progress(path, make_reporter):
+    """
+    Run the raw-backend loader (the cheapest, so reporting overhead shows most) with a progress reporter
+    writing to the null device.
+    """
+
+    from InterlinearLoaders import ExcelInterlinearLoader
+    with open(os.devnull, 'w') as devnull:
+        progress = make_reporter(devnull)
+        ExcelInterlinearLoader(path, backend='raw').run(progress)
+        if hasattr(progress, 'finish'):
+            progress.finish()
+
+
+@benchmark("progress: none")
+def bench_progress_none(path):
+    run_loader_with_progress(path, lambda devnull: None)
+
+
+@benchmark("progress: tqdm bar updated every block")
+def bench_progress_tqdm_every_block(path):
+    from tqdm import tqdm
+
+    def make_reporter(devnull):
+        bar = tqdm(desc="Processing Blocks", unit="block", mininterval=0, file=devnull)
+
+        def progress(done, total=None, message=None):
+            bar.total = total
+            bar.update(done - bar.n)
+        progress.finish = bar.close
+        return progress
+    run_loader_with_progress(path, make_reporter)
+
+
+@benchmark("progress: tqdm bar at 20 Hz")
+def bench_progress_tqdm(path):
+    from progress import TqdmProgress
+    run_loader_with_progress(path, lambda devnull: TqdmProgress("Processing Blocks", "block", file=devnull))
+
+
+@benchmark("progress: JSON lines every block")
+def bench_progress_json_every_block(path):
+    from progress import JsonLinesProgress
+    run_loader_with_progress(path, lambda devnull: JsonLinesProgress(devnull, rate_hz=0))
+
+
+@benchmark("progress: JSON lines at 20 Hz")
+def bench_progress_json(path):
+    from progress import JsonLinesProgress
+    run_loader_with_progress(path, lambda devnull: JsonLinesProgress(devnull))
+
+
+CORPUS_SIZE = 10   # texts loaded for the corpus benchmarks (copies of the workbook)
+
+
+def str_strip(value):
+    """
+    Cell value cleaning without the cell_text cache: a new stripped string for every cell.
+    """
+
+    return None if value is None else str(value).strip()
+
+
+def load_corpus(path, clean_cell_value=None):
+    """
+    Load CORPUS_SIZE texts, keeping all of their XML (as the GUI queue or a batch of conversions would).
+    """
+
+    from InterlinearLoaders import ExcelInterlinearLoader
+    roots = []
+    for _ in range(CORPUS_SIZE):
+        loader = ExcelInterlinearLoader(path, backend='raw')
+        if clean_cell_value is not None:
+            loader.clean_cell_value = clean_cell_value
+        loader.run()
+        roots.append(loader.xml_root)
+    return roots
+
+
+def corpus_memory(path, clean_cell_value=None):
+    """
+    Returns the bytes still allocated for the loaded corpus XML.
+    """
+
+    import gc
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    roots = load_corpus(path, clean_cell_value)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del roots
+    return size
+
+
+@benchmark(f"corpus of {CORPUS_SIZE}: str().strip() per cell")
+def bench_corpus_str_strip(path):
+    load_corpus(path, str_strip)
+
+
+@benchmark(f"corpus of {CORPUS_SIZE}: interned NFC cell text")
+def bench_corpus_interned(path):
+    load_corpus(path)
+
+
+@benchmark(f"corpus of {CORPUS_SIZE} memory: str().strip() per cell", unit='MiB')
+def bench_corpus_memory_str_strip(path):
+    return corpus_memory(path, str_strip)
+
+
+@benchmark(f"corpus of {CORPUS_SIZE} memory: interned NFC cell text", unit='MiB')
+def bench_corpus_memory_interned(path):
+    return corpus_memory(path)
+
+
+def convert_sequential(path, output_path):
+    """
+    Workbook to .flextext one stage after another: load the XML, transform it, then write it.
+    """
+
+    from InterlinearLoaders import ExcelInterlinearLoader
+    from xml_to_flextext import transform_to_flextext_dom
+    from xml_writer import write_pretty_xml
+    loader = ExcelInterlinearLoader(path, backend='raw')
+    loader.run()
+    document_root, _ = transform_to_flextext_dom(loader.xml_root, 'xku', 'en', 'en')
+    with open(output_path, 'w', encoding='utf-8') as f:
+        write_pretty_xml(document_root, f, encoding='utf-8')
+
+
+def convert_pipelined(path, output_path):
+    from excel_to_flextext import convert_pipelined
+    convert_pipelined(path, output_path, 'xku', 'en', 'en')
+
+
+def flextext_peak_memory(convert, path):
+    import gc
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    convert(path, path + '.flextext')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+@benchmark("to FlexText: sequential stages")
+def bench_flextext_sequential(path):
+    convert_sequential(path, path + '.flextext')
+
+
+@benchmark("to FlexText: pipelined stages (excel_to_flextext)")
+def bench_flextext_pipelined(path):
+    convert_pipelined(path, path + '.flextext')
+
+
+@benchmark("to FlexText peak memory: sequential stages", unit='MiB')
+def bench_flextext_memory_sequential(path):
+    return flextext_peak_memory(convert_sequential, path)
+
+
+@benchmark("to FlexText peak memory: pipelined stages", unit='MiB')
+def bench_flextext_memory_pipelined(path):
+    return flextext_peak_memory(convert_pipelined, path)
+
+
+def two_stage_via_xml(path):
+    """
+    excel_to_xml.py then xml_to_flextext.py: write the intermediate XML, parse it back, convert it.
+    """
+
+    from xml.etree.ElementTree import parse
+    from InterlinearLoaders import ExcelInterlinearLoader
+    from xml_to_flextext import transform_to_flextext_dom
+    from xml_writer import write_pretty_xml
+    loader = ExcelInterlinearLoader(path, backend='raw')
+    loader.run()
+    with open(path + '.xml', 'w', encoding='utf-8') as f:
+        write_pretty_xml(loader.xml_root, f)
+    document_root, _ = transform_to_flextext_dom(parse(path + '.xml').getroot(), 'xku', 'en', 'en')
+    with open(path + '.flextext', 'w', encoding='utf-8') as f:
+        write_pretty_xml(document_root, f, encoding='utf-8')
+
+
+def two_stage_via_jsonl(path):
+    """
+    excel_to_xml.py --format jsonl then xml_to_flextext.py: both stages stream the JSON Lines file.
+    """
+
+    from InterlinearLoaders import LineStreamingInterlinearLoader
+    from intermediate_jsonl import JsonlWriter, iter_records
+    from xml_to_flextext import write_flextext_from_records
+    with open(path + '.jsonl', 'w', encoding='utf-8') as f:
+        LineStreamingInterlinearLoader(path, JsonlWriter(f).emit, backend='raw').run()
+    with open(path + '.jsonl', 'r', encoding='utf-8') as f_in, \
+            open(path + '.flextext', 'w', encoding='utf-8') as f_out:
+        write_flextext_from_records(iter_records(f_in), f_out, 'xku', 'en', 'en')
+
+
+@benchmark("two stages via intermediate XML")
+def bench_two_stage_xml(path):
+    two_stage_via_xml(path)
+
+
+@benchmark("two stages via intermediate JSON Lines")
+def bench_two_stage_jsonl(path):
+    two_stage_via_jsonl(path)
+
+
+@benchmark("loader parse only: scan all columns C:Z")
+def bench_parse_full_width(path):
+    return parse_preloaded(path, DATA_END_COLUMN=26)
+
+
+@benchmark("loader parse only: scan used columns")
+def bench_parse_used_width(path):
+    return parse_preloaded(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time loading and converting synthetic interlinear workbooks.")
+    parser.add_argument("--lines", type=int, nargs='+', default=[200, 900],
+                        help="Numbers of interlinear lines in the generated workbooks (max. about 950).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats per benchmark (best time is shown).")
+    parser.add_argument("--only", default="", help="Only run benchmarks whose name contains this text.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_lines in args.lines:
+            path = os.path.join(tmp_dir, f"bench_{n_lines}.xlsx")
+            make_workbook(path, n_lines)
+            print(f"\n{n_lines} lines ({os.path.getsize(path) / 1024:.0f} KiB):")
+            for name, function, unit in BENCHMARKS:
+                if args.only in name:
+                    if unit == 'MiB':
+                        print(f"  {name:<50} {function(path) / 2**20:9.1f} MiB")
+                        continue
+                    seconds = time_it(lambda: function(path), args.repeat)
+                    print(f"  {name:<50} {seconds * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
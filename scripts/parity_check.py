@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Differential check of the interlinear loader's backends.
+
+Runs ExcelInterlinearLoader with every Excel backend (row_sources.EXCEL_ROW_SOURCES),
+and DelimitedInterlinearLoader on CSV exports (full-width, and trimmed), over the Excel templates and a set of
+synthetic workbooks with known edge cases, and checks that all of them give identical
+XML and warnings (and that validate-only checks give the same warnings).
+
+The XML is also compared with golden files in scripts/golden/ (<workbook name>.xml),
+written by the original excel_to_xml.py, so that a mistake shared by every backend is
+caught too. (The golden of 'wide' has all its words: the original stopped at column Z.)
+--write-golden writes the goldens that are missing, from the current output; check them
+by hand before committing them.
+
+Each workbook is also converted to FlexText, exported back to Excel with flextext_to_excel.py
+and loaded again, which must give the same lines and paragraphs (unless a phrase had to be
+wrapped onto more than one block).
+
+Exits with status 1 if any output differs.
+
+Usage:
+    python scripts/parity_check.py [--write-golden] [extra_workbook.xlsx ...]
+"""
+import csv
+import glob
+import os
+import re
+import sys
+import tempfile
+import zipfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_DIR = os.path.join(PROJECT_ROOT, "scripts", "golden")
+sys.path.insert(0, PROJECT_ROOT)
+
+from InterlinearLoaders import ExcelInterlinearLoader, DelimitedInterlinearLoader, ValidatingInterlinearLoader
+from row_sources import EXCEL_ROW_SOURCES, FullWorkbookRows
+from flextext_to_excel import DATA_START_ROW, WORDS_PER_ROW, export_flextext_to_excel
+from xml_to_flextext import transform_to_flextext_dom
+from xml_writer import write_pretty_xml
+
+
+def synthetic_workbooks(tmp_dir):
+    """
+    Write small workbooks covering edge cases of the template layout, and return their paths.
+    """
+
+    import openpyxl
+    from openpyxl.cell.rich_text import CellRichText, TextBlock
+    from openpyxl.cell.text import InlineFont
+
+    def new_sheet():
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        for coord, value in (('C2', 'Title'), ('C3', 'Author'), ('C4', 'Transcriber'),
+                             ('N2', 'xku'), ('N3', 'en'), ('N4', 'en')):
+            sheet[coord] = value
+        return workbook, sheet
+
+    def add_line(sheet, block, words, glosses, free):
+        row = 6 + (block - 1) * 4
+        for i, word in enumerate(words):
+            sheet.cell(row=row, column=3 + i).value = word
+        for i, gloss in enumerate(glosses):
+            sheet.cell(row=row + 1, column=3 + i).value = gloss
+        sheet.cell(row=row + 2, column=3).value = free
+
+    cases = {}
+
+    workbook, sheet = new_sheet()
+    for block in range(1, 30):
+        if block % 7:
+            add_line(sheet, block, [f"w{block}a", f"w{block}b", f"w{block}c"], ["1SG", "go", "PST"], f"Line {block}.")
+    cases['paragraphs'] = workbook
+
+    workbook, sheet = new_sheet()
+    add_line(sheet, 2, ["leading", "empty", "block"], ["a", "b", "c"], "After an empty first block.")
+    add_line(sheet, 3, ["missing", "gloss", "here"], ["a", None, "c"], "Alignment error.")
+    add_line(sheet, 4, ["extra", None], ["a", "gloss only"], "Another alignment error.")
+    sheet.cell(row=6 + 3 * 4 + 3, column=5).value = "not a separator"
+    sheet.cell(row=6 + 5 * 4 + 1, column=3).value = "partial block"
+    cases['warnings'] = workbook
+
+    workbook, sheet = new_sheet()
+    add_line(sheet, 1, [1, 2.5, True, "  padded  "], ["one", "two", "three", "four"], 12345)
+    add_line(sheet, 2, ["formula"], ["=1+1"], "=CONCATENATE(\"a\",\"b\")")  # no cached values
+    add_line(sheet, 3, [CellRichText("rich ", TextBlock(InlineFont(b=True), "text"))], ["gloss"], "Rich text.")
+    cases['cell_types'] = workbook
+
+    workbook, sheet = new_sheet()
+    add_line(sheet, 1, [f"w{i}" for i in range(30)], [f"g{i}" for i in range(30)], "Wider than Z.")
+    add_line(sheet, 2, ["short"], ["line"], "After a wide line.")
+    cases['wide'] = workbook
+
+    workbook, sheet = new_sheet()
+    cases['empty'] = workbook
+
+    # sheets that end right after the last line, without its blank separator row
+    workbook, sheet = new_sheet()
+    add_line(sheet, 1, ["first", "line"], ["a", "b"], "First.")
+    add_line(sheet, 2, ["last", "line"], ["c", "d"], "No blank row after this.")
+    cases['no_blank_row'] = workbook
+
+    workbook, sheet = new_sheet()
+    add_line(sheet, 1, ["first", "line"], ["a", "b"], "First.")
+    add_line(sheet, 2, ["no", "free", "translation"], ["c", "d", "e"], None)
+    cases['no_free_row'] = workbook
+
+    paths = []
+    for name, workbook in cases.items():
+        path = os.path.join(tmp_dir, f"{name}.xlsx")
+        workbook.save(path)
+        paths.append(path)
+
+    # a <dimension> tag that covers only the first data row (as written by some other programs)
+    path = os.path.join(tmp_dir, "small_dimension.xlsx")
+    set_dimension(os.path.join(tmp_dir, "no_blank_row.xlsx"), path, 'A1:N6')
+    paths.append(path)
+    return paths
+
+
+def set_dimension(excel_path, new_path, ref):
+    """
+    Copy a workbook written by openpyxl, with ref in its sheet's <dimension> tag.
+    """
+
+    with zipfile.ZipFile(excel_path) as source, zipfile.ZipFile(new_path, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename == 'xl/worksheets/sheet1.xml':
+                data = re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="' + ref.encode() + b'"', data)
+            target.writestr(info, data)
+
+
+def export_csv(excel_path, csv_path, trim=False):
+    """
+    Write the first sheet's values to a CSV file, as a spreadsheet program's CSV export would.
+
+    trim: leave out the empty cells at the end of each row and the empty rows at the end of
+    the sheet, as some programs (and hand edits) do.
+    """
+
+    source = FullWorkbookRows(excel_path)
+    source.sparse = False   # full-width rows
+    source.open()
+    rows = [['' if value is None else value for value in row_values] for row_values in source.iter_rows()]
+    if trim:
+        for row in rows:
+            while row and row[-1] == '':
+                row.pop()
+        while rows and not rows[-1]:
+            rows.pop()
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+
+def load(loader):
+    loader.run()
+    return loader.get_pretty_xml(), loader.warning_list
+
+
+def check_round_trip(path, tmp_dir):
+    """
+    Convert path to FlexText and back to Excel, and return a list of differences (empty if none).
+    """
+
+    from xml.etree.ElementTree import tostring
+
+    loader = ExcelInterlinearLoader(path)
+    loader.run()
+    if any(len(line) > WORDS_PER_ROW for line in loader.xml_body.iter('vernacular-line')):
+        return []   # wrapped onto more blocks
+    document, _ = transform_to_flextext_dom(loader.xml_root, 'xku', 'en', 'en')
+    base_path = os.path.join(tmp_dir, os.path.splitext(os.path.basename(path))[0] + '_round_trip')
+    with open(base_path + '.flextext', 'w', encoding='utf-8') as f:
+        write_pretty_xml(document, f, encoding='utf-8')
+    export_flextext_to_excel(base_path + '.flextext', base_path + '.xlsx')
+
+    problems = []
+    source = FullWorkbookRows(base_path + '.xlsx')
+    source.open()
+    if source.max_row >= DATA_START_ROW and (source.max_row - DATA_START_ROW + 1) % 4:
+        problems.append(f"The exported workbook ends without a blank row (at row {source.max_row})")
+    reloaded = ExcelInterlinearLoader(base_path + '.xlsx')
+    reloaded.run()
+    if tostring(reloaded.xml_body) != tostring(loader.xml_body):
+        problems.append("Lines differ after a round trip through FlexText and flextext_to_excel.py")
+    return problems
+
+
+def check(path, tmp_dir, write_golden=False):
+    """
+    Load path with every backend and return a list of differences (empty if all agree).
+    """
+
+    results = {backend: load(ExcelInterlinearLoader(path, backend=backend)) for backend in EXCEL_ROW_SOURCES}
+    dense_rows = FullWorkbookRows(path)
+    dense_rows.sparse = False
+    results['full (dense)'] = load(ExcelInterlinearLoader(path, row_source=dense_rows))
+    csv_path = os.path.join(tmp_dir, os.path.splitext(os.path.basename(path))[0] + '.csv')
+    export_csv(path, csv_path)
+    results['csv'] = load(DelimitedInterlinearLoader(csv_path))
+    export_csv(path, csv_path, trim=True)
+    results['csv (trimmed)'] = load(DelimitedInterlinearLoader(csv_path))
+
+    reference_name, (reference_xml, reference_warnings) = next(iter(results.items()))
+    problems = []
+    for name, (xml, warnings) in results.items():
+        if xml != reference_xml:
+            problems.append(f"XML from '{name}' differs from '{reference_name}'")
+        if warnings != reference_warnings:
+            problems.append(f"Warnings from '{name}' differ from '{reference_name}': "
+                            f"{warnings} != {reference_warnings}")
+
+    golden_path = os.path.join(GOLDEN_DIR, os.path.splitext(os.path.basename(path))[0] + '.xml')
+    if os.path.exists(golden_path):
+        with open(golden_path, encoding='utf-8') as f:
+            if f.read() != reference_xml:
+                problems.append(f"XML from '{reference_name}' differs from {os.path.relpath(golden_path, PROJECT_ROOT)}")
+    elif write_golden:
+        with open(golden_path, 'w', encoding='utf-8') as f:
+            f.write(reference_xml)
+        print(f"        wrote {os.path.relpath(golden_path, PROJECT_ROOT)}")
+    else:
+        problems.append(f"No golden file {os.path.relpath(golden_path, PROJECT_ROOT)}")
+
+    validator = ValidatingInterlinearLoader(path, backend='raw')
+    validator.run()
+    if validator.warning_list != reference_warnings:
+        problems.append(f"Warnings from validate-only differ from '{reference_name}': "
+                        f"{validator.warning_list} != {reference_warnings}")
+    return problems + check_round_trip(path, tmp_dir)
+
+
+def main():
+    args = sys.argv[1:]
+    write_golden = '--write-golden' in args
+    extra_paths = [arg for arg in args if arg != '--write-golden']
+    templates = sorted(glob.glob(os.path.join(PROJECT_ROOT, "Excel Templates", "*", "*.xltx")))
+    n_failed = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for path in templates + synthetic_workbooks(tmp_dir) + extra_paths:
+            problems = check(path, tmp_dir, write_golden)
+            print(f"{'FAIL' if problems else 'ok  '}  {os.path.basename(path)}")
+            for problem in problems:
+                print(f"        {problem}")
+            n_failed += bool(problems)
+    print(f"\n{n_failed} of the workbooks gave different results." if n_failed else "\nAll backends agree.")
+    sys.exit(1 if n_failed else 0)
+
+
+if __name__ == "__main__":
+    main()
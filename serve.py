@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Local HTTP conversion service: convert interlinear workbooks to FlexText from a web page.
+
+Uses only the standard library (http.server's ThreadingHTTPServer, and a process pool
+for the conversions themselves, so a large workbook does not hold up other requests).
+
+Endpoints:
+    GET  /          A small upload page.
+    POST /convert   Body: the .xlsx (or CSV/TSV export) file itself.
+                    Query parameters (all optional):
+                        filename       the uploaded file's name, for messages and the download name
+                        ws_vernacular, ws_gloss, ws_free
+                                       writing system codes, overriding those in the workbook
+                        format         'flextext' (default) or 'json' (diagnostics report only)
+                    Responds with the .flextext file (warnings in the X-Warning-Count header),
+                    or a JSON report. Errors are JSON with an 'error' message.
+    GET  /metrics   JSON counters: requests, conversions, rejections, latency and throughput.
+
+Requests larger than --max-upload get 413; when --workers conversions are running and
+--queue-depth more are waiting, new ones get 503 with a Retry-After header.
+
+Usage:
+    python serve.py                      # http://127.0.0.1:8765/
+    python serve.py --port 0             # any free port (printed at startup)
+    curl --data-binary @text.xlsx "http://127.0.0.1:8765/convert?filename=text.xlsx" -o text.flextext
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from engine_selection import parse_memory_size
+
+STREAM_CHUNK_BYTES = 64 * 1024
+LATENCY_WINDOW = 1000   # conversions kept for the latency percentiles
+DRAIN_LIMIT_FACTOR = 4  # rejected bodies up to this many times the upload limit are read and dropped
+
+
+# ======================================================================
+# --- Conversion (runs in the worker processes) ---
+# ======================================================================
+
+def convert_upload(data, filename, ws_overrides, output_format):
+    """
+    Convert one uploaded file. Runs in a worker process.
+
+    Args:
+        data (bytes): The uploaded file.
+        filename (str): Its name (the extension decides between Excel and CSV/TSV, if not a zip).
+        ws_overrides (dict): 'vernacular', 'gloss' and/or 'free' writing system codes to use
+            instead of those in the file.
+        output_format (str): 'flextext' or 'json'.
+
+    Returns:
+        tuple: (HTTP status, content type, body bytes, number of warnings)
+    """
+
+    from InterlinearLoaders import ExcelInterlinearLoader, DelimitedInterlinearLoader
+    from xml_to_flextext import transform_to_flextext_dom
+    from xml_writer import write_pretty_xml
+
+    def json_response(status, report):
+        return status, 'application/json', json.dumps(report, ensure_ascii=False, indent=2).encode('utf-8'), \
+            len(report.get('warnings', []))
+
+    extension = os.path.splitext(filename)[1].lower()
+    is_excel = data[:4] == b'PK\x03\x04' or extension in ('.xlsx', '.xlsm')
+    if is_excel:
+        extension = '.xlsx'
+    elif not extension:
+        extension = '.csv'
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'upload' + extension)
+        with open(path, 'wb') as f:
+            f.write(data)
+        loader = ExcelInterlinearLoader(path) if is_excel else DelimitedInterlinearLoader(path)
+        try:
+            loader.run()
+        except Exception as e:
+            cause = f" ({e.__cause__})" if e.__cause__ is not None else ""
+            message = f"Could not load the file. {e}{cause}".replace(path, filename)
+            return json_response(422, {'error': message, 'filename': filename})
+
+    metadata = {element.tag: element.text or "" for element in loader.xml_metadata}
+    writing_systems = {kind: ws_overrides.get(kind) or str(metadata.get(f'writing_system_{kind}', "")).strip()
+                       for kind in ('vernacular', 'gloss', 'free')}
+    report = {
+        'filename': filename,
+        'metadata': metadata,
+        'writing_systems': writing_systems,
+        'warnings': loader.warning_list,
+    }
+    missing = [kind for kind, code in writing_systems.items() if not code]
+    if missing:
+        report['error'] = (f"Missing writing system code(s): {', '.join(missing)}. "
+                           f"Fill them in the workbook or pass ws_{missing[0]}=... in the URL.")
+        return json_response(422, report)
+
+    document_root, missing_freetrans_count = transform_to_flextext_dom(
+        loader.xml_root, writing_systems['vernacular'], writing_systems['gloss'], writing_systems['free'])
+    report['missing_free_translations'] = missing_freetrans_count
+    if output_format == 'json':
+        return json_response(200, report)
+
+    f = io.StringIO()
+    write_pretty_xml(document_root, f, encoding='utf-8')
+    return 200, 'application/xml; charset=utf-8', f.getvalue().encode('utf-8'), len(loader.warning_list)
+
+
+# ======================================================================
+# --- Server ---
+# ======================================================================
+
+class ServiceMetrics:
+    """
+    Thread-safe counters for the /metrics endpoint.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.requests = {}      # status code -> count
+        self.conversions = 0
+        self.conversion_failures = 0
+        self.rejected_too_large = 0
+        self.rejected_busy = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)   # seconds, of recent conversions
+
+    def count_request(self, status, n_bytes_out=0):
+        with self.lock:
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self.bytes_out += n_bytes_out
+
+    def count_conversion(self, seconds, n_bytes_in, ok):
+        with self.lock:
+            self.conversions += 1
+            self.conversion_failures += not ok
+            self.bytes_in += n_bytes_in
+            self.latencies.append(seconds)
+
+    def snapshot(self, running, waiting):
+        """
+        Returns the metrics as a dict (for JSON).
+        """
+
+        with self.lock:
+            uptime = time.time() - self.start_time
+            latencies = sorted(self.latencies)
+
+            def percentile(p):
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4) if latencies else None
+
+            return {
+                'uptime_seconds': round(uptime, 3),
+                'requests_by_status': {str(status): n for status, n in sorted(self.requests.items())},
+                'conversions_total': self.conversions,
+                'conversion_failures_total': self.conversion_failures,
+                'rejected_too_large_total': self.rejected_too_large,
+                'rejected_busy_total': self.rejected_busy,
+                'bytes_in_total': self.bytes_in,
+                'bytes_out_total': self.bytes_out,
+                'conversions_running': running,
+                'conversions_waiting': waiting,
+                'throughput_conversions_per_second': round(self.conversions / uptime, 4) if uptime else 0.0,
+                'latency_seconds': {
+                    'window': len(latencies),
+                    'mean': round(sum(latencies) / len(latencies), 4) if latencies else None,
+                    'p50': percentile(0.50),
+                    'p95': percentile(0.95),
+                    'max': round(latencies[-1], 4) if latencies else None,
+                },
+            }
+
+
+class ConversionServer(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer with a bounded process pool for conversions, and an admission limit.
+
+    At most `workers` conversions run at once, and at most `queue_depth` more wait for a worker;
+    requests beyond that are rejected at once instead of piling up.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, workers=2, queue_depth=4, max_upload_bytes=50 * 1024 * 1024, timeout=300):
+        super().__init__(address, ConversionRequestHandler)
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.max_upload_bytes = max_upload_bytes
+        self.conversion_timeout = timeout
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.metrics = ServiceMetrics()
+        self.quiet = False      # True: do not log each request
+        self._admission_lock = threading.Lock()
+        self.n_admitted = 0     # conversions running or waiting
+
+    def try_admit(self):
+        """
+        Reserve a place for one conversion. Returns False if the server is full.
+        """
+
+        with self._admission_lock:
+            if self.n_admitted >= self.workers + self.queue_depth:
+                return False
+            self.n_admitted += 1
+            return True
+
+    def release(self):
+        with self._admission_lock:
+            self.n_admitted -= 1
+
+    def load(self):
+        """
+        Returns (running, waiting) numbers of conversions.
+        """
+
+        with self._admission_lock:
+            running = min(self.n_admitted, self.workers)
+            return running, self.n_admitted - running
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+UPLOAD_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Interlinear Converter</title></head>
+<body>
+<h1>Interlinear Converter</h1>
+<p>Convert an interlinear Excel workbook (.xlsx, or a CSV/TSV export of it) to FlexText.</p>
+<p><input type="file" id="file" accept=".xlsx,.csv,.tsv,.tab,.txt"></p>
+<p>Writing system codes (leave empty to use those in the workbook):<br>
+Vernacular <input id="ws_vernacular" size="8"> Gloss <input id="ws_gloss" size="8">
+Free translation <input id="ws_free" size="8"></p>
+<p><button onclick="convert('flextext')">Convert to FlexText</button>
+<button onclick="convert('json')">Check only</button></p>
+<pre id="report"></pre>
+<script>
+async function convert(format) {
+  const file = document.getElementById('file').files[0];
+  if (!file) { return; }
+  const params = new URLSearchParams({filename: file.name, format: format});
+  for (const kind of ['ws_vernacular', 'ws_gloss', 'ws_free']) {
+    const value = document.getElementById(kind).value.trim();
+    if (value) { params.set(kind, value); }
+  }
+  const report = document.getElementById('report');
+  report.textContent = 'Converting...';
+  const response = await fetch('/convert?' + params, {method: 'POST', body: file});
+  if (format === 'flextext' && response.ok) {
+    const link = document.createElement('a');
+    link.href = URL.createObjectURL(await response.blob());
+    link.download = file.name.replace(/\\.[^.]*$/, '') + '.flextext';
+    link.click();
+    report.textContent = 'Done. ' + response.headers.get('X-Warning-Count') + ' warning(s); use "Check only" to list them.';
+  } else {
+    report.textContent = await response.text();
+  }
+}
+</script>
+</body></html>
+"""
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for ConversionServer. See the module docstring for the endpoints.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_body(self, status, content_type, body, headers=None):
+        """
+        Send a complete response, streaming the body in chunks.
+        """
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        view = memoryview(body)
+        for start in range(0, len(body), STREAM_CHUNK_BYTES):
+            self.wfile.write(view[start:start + STREAM_CHUNK_BYTES])
+        self.server.metrics.count_request(status, len(body))
+
+    def send_json(self, status, report, headers=None):
+        self.send_body(status, 'application/json', json.dumps(report, indent=2).encode('utf-8'), headers)
+
+    def send_too_large(self, length):
+        with self.server.metrics.lock:
+            self.server.metrics.rejected_too_large += 1
+        self.send_json(413, {'error': f"Upload of {length} bytes is larger than the limit of "
+                                      f"{self.server.max_upload_bytes} bytes."})
+
+    def discard_body(self, length):
+        """
+        Read and drop the body of a rejected request, so that the client gets to read the response.
+
+        Bodies much larger than the upload limit are not read; the connection is closed instead.
+        """
+
+        if length > DRAIN_LIMIT_FACTOR * self.server.max_upload_bytes:
+            self.close_connection = True
+            return
+        while length > 0:
+            chunk = self.rfile.read(min(length, STREAM_CHUNK_BYTES))
+            if not chunk:
+                break
+            length -= len(chunk)
+
+    def handle_expect_100(self):
+        """
+        Refuse too-large uploads before the client sends them, if it asked first (Expect: 100-continue).
+        """
+
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            length = 0
+        if length > self.server.max_upload_bytes:
+            self.close_connection = True
+            self.send_too_large(length)
+            return False
+        return super().handle_expect_100()
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/':
+            self.send_body(200, 'text/html; charset=utf-8', UPLOAD_PAGE.encode('utf-8'))
+        elif path == '/metrics':
+            self.send_json(200, self.server.metrics.snapshot(*self.server.load()))
+        else:
+            self.send_json(404, {'error': f"Not found: {path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/convert':
+            self.send_json(404, {'error': f"Not found: {url.path}"})
+            return
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        output_format = query.get('format', 'flextext')
+        if output_format not in ('flextext', 'json'):
+            self.send_json(400, {'error': "format must be 'flextext' or 'json'"})
+            return
+
+        # Size limit, checked before reading the body
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.close_connection = True
+            self.send_json(411, {'error': "Content-Length is required."})
+            return
+        if length > self.server.max_upload_bytes:
+            self.discard_body(length)
+            self.send_too_large(length)
+            return
+        if length == 0:
+            self.send_json(400, {'error': "Empty upload."})
+            return
+
+        # Backpressure: reject at once if all workers are busy and the queue is full
+        if not self.server.try_admit():
+            self.discard_body(length)
+            with self.server.metrics.lock:
+                self.server.metrics.rejected_busy += 1
+            self.send_json(503, {'error': "The server is busy. Try again shortly."}, {'Retry-After': '5'})
+            return
+
+        start = time.perf_counter()
+        status = None
+        future = None
+        try:
+            data = self.rfile.read(length)
+            filename = os.path.basename(query.get('filename', 'upload.xlsx'))
+            ws_overrides = {kind: query[f'ws_{kind}'].strip() for kind in ('vernacular', 'gloss', 'free')
+                            if query.get(f'ws_{kind}', '').strip()}
+            future = self.server.pool.submit(convert_upload, data, filename, ws_overrides, output_format)
+            # the place is given back when the conversion ends, not when this request does:
+            # a conversion that is already running carries on after a timeout (cancel() cannot stop it)
+            future.add_done_callback(lambda f, server=self.server: server.release())
+            try:
+                status, content_type, body, n_warnings = future.result(timeout=self.server.conversion_timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                self.send_json(504, {'error': "The conversion took too long."})
+                return
+            except Exception as e:
+                self.send_json(500, {'error': f"Conversion failed: {e}"})
+                return
+        finally:
+            if future is None:
+                self.server.release()
+            # latency includes any wait for a worker
+            self.server.metrics.count_conversion(time.perf_counter() - start, length, status == 200)
+
+        headers = {'X-Warning-Count': str(n_warnings)}
+        if status == 200 and output_format == 'flextext':
+            base_name = os.path.splitext(filename)[0] or 'converted'
+            headers['Content-Disposition'] = f'attachment; filename="{base_name}.flextext"'
+        self.send_body(status, content_type, body, headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve interlinear-workbook-to-FlexText conversions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on (default: 127.0.0.1, this computer only; "
+                             "use 0.0.0.0 to serve the local network).")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (0: any free port).")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)),
+                        help="Conversion worker processes.")
+    parser.add_argument("--queue-depth", type=int, default=8,
+                        help="Conversions allowed to wait for a worker before new ones are refused (503).")
+    parser.add_argument("--max-upload", type=parse_memory_size, default="50M",
+                        help="Largest upload accepted, e.g. 50M (default).")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds before a conversion is given up (504).")
+    parser.add_argument("--quiet", action="store_true", help="Do not log each request.")
+    args = parser.parse_args()
+
+    server = ConversionServer((args.host, args.port), args.workers, args.queue_depth, args.max_upload, args.timeout)
+    server.quiet = args.quiet
+    host, port = server.server_address[:2]
+    print(f"Serving conversions on http://{host}:{port}/ "
+          f"({args.workers} worker(s), queue depth {args.queue_depth}). Press Ctrl-C to stop.", flush=True)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)     # also shut down the worker processes when terminated
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+
+def default_cache_dir():
+    """
+    Return the per-user cache directory for this application, following platform conventions.
+    """
+
+    if sys.platform.startswith('win'):
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(r'~\AppData\Local')
+        return os.path.join(base, 'InterlinearConverter', 'Cache')
+    elif sys.platform == 'darwin':
+        return os.path.expanduser('~/Library/Caches/InterlinearConverter')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        return os.path.join(base, 'interlinear-converter')
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Return the SHA-256 hex digest of a file's contents.
+    """
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SnapshotCache:
+    """
+    On-disk cache of parsed interlinear data, so reloading an unchanged input file is instant.
+
+    Entries are keyed by the absolute path of the input file and the loader kind
+    (e.g. 'excel' or 'delimited'), and are only valid while the file's size, mtime
+    and content hash match. Each entry is a pickle of plain tuples:
+        (format version, size, mtime_ns, content hash, snapshot, warnings)
+    where snapshot comes from InterlinearXML.to_snapshot().
+
+    The cache is best-effort: any problem reading or writing it counts as a miss.
+    When the total size exceeds max_bytes, the least recently used entries are removed.
+
+    Usage:
+        cache = SnapshotCache()
+        hit = cache.get(path, 'excel')  # None, or (snapshot, warnings)
+        ...
+        cache.put(path, 'excel', loader.to_snapshot(), loader.warning_list)
+    """
+
+    FORMAT_VERSION = 3   # 2: cell text is NFC-normalized (cell_text.py); 3: snapshots have line_rows
+    EXTENSION = '.snapshot'
+
+    def __init__(self, cache_dir=None, max_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def entry_path(self, path, kind):
+        """
+        Return the cache file name for an input file path and loader kind.
+        """
+
+        key = f'{kind}\0{os.path.normcase(os.path.abspath(path))}'
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + self.EXTENSION)
+
+    def get(self, path, kind):
+        """
+        Return (snapshot, warnings) for an unchanged input file, or None on a cache miss.
+
+        If only the mtime changed but the contents are the same, the entry is still used
+        (and updated with the new mtime).
+        """
+
+        entry_path = self.entry_path(path, kind)
+        try:
+            stat = os.stat(path)
+            with open(entry_path, 'rb') as f:
+                version, size, mtime_ns, content_hash, snapshot, warnings = pickle.load(f)
+        except Exception:
+            return None
+        if version != self.FORMAT_VERSION or size != stat.st_size:
+            return None
+        if mtime_ns != stat.st_mtime_ns:
+            try:
+                if file_hash(path) != content_hash:
+                    return None
+            except OSError:
+                return None
+            self._write(entry_path, (version, size, stat.st_mtime_ns, content_hash, snapshot, warnings))
+        else:
+            try:
+                os.utime(entry_path)  # mark as recently used
+            except OSError:
+                pass
+        return snapshot, warnings
+
+    def put(self, path, kind, snapshot, warnings):
+        """
+        Store the parsed snapshot and warnings for an input file, then evict old entries if needed.
+        """
+
+        try:
+            stat = os.stat(path)
+            content_hash = file_hash(path)
+        except OSError:
+            return
+        entry = (self.FORMAT_VERSION, stat.st_size, stat.st_mtime_ns, content_hash, snapshot, tuple(warnings))
+        if self._write(self.entry_path(path, kind), entry):
+            self.evict()
+
+    def _write(self, entry_path, entry):
+        """
+        Atomically write one pickled entry. Returns True on success.
+        """
+
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except Exception:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+        """
+
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(self.EXTENSION):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+
+        max_bytes, self.max_bytes = self.max_bytes, -1
+        self.evict()
+        self.max_bytes = max_bytes
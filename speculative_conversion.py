@@ -0,0 +1,114 @@
+"""
+Convert the loaded text in the background, before the user asks for it.
+
+Once a text is loaded and its writing system codes are valid, the GUI starts a
+SpeculativeConversion: a thread that runs the selected exporter (see exporters.py)
+on the loaded text, writing to a temporary file. When the user then picks an output
+path, only the prepared file is copied there. If the input is reloaded, or the output
+format or writing systems change, the conversion is discarded (cancelled if still
+running, and its temporary file removed).
+
+Usage:
+    conversion = SpeculativeConversion(key, xml_root, 'flextext', 'xku', 'en', 'en')
+    conversion.start()
+    ...
+    if conversion.key == key and conversion.is_done and conversion.error is None:
+        conversion.commit(output_path)
+    else:
+        conversion.discard()
+"""
+import os
+import shutil
+import tempfile
+import threading
+
+from cancellation import CancelToken, OperationCancelled
+from exporters import EXPORTERS, export
+from intermediate_jsonl import xml_to_records
+
+
+class SpeculativeConversion:
+    """
+    A conversion of an intermediate XML <text> with an exporter, running in a background thread.
+
+    key: anything identifying the inputs of the conversion (format, writing systems, ...),
+    for the caller to check that the prepared output is still the one wanted.
+    exporter_name: a key of exporters.EXPORTERS.
+    """
+
+    def __init__(self, key, xml_root, exporter_name, ws_vernacular, ws_gloss, ws_freetrans):
+        self.key = key
+        self.xml_root = xml_root
+        self.exporter_class = EXPORTERS[exporter_name]
+        self.ws_codes = (ws_vernacular, ws_gloss, ws_freetrans)
+        self.cancel_token = CancelToken()
+        self.progress = 0.0     # fraction of paragraphs exported
+        self.error = None       # the exception, if the conversion failed
+        self.exporter = None    # the exporter, once done (for its summary)
+        self.temp_path = None
+        self._done = False
+        self._lock = threading.Lock()   # so discard() and the end of run() agree on who removes the temp file
+        self._thread = threading.Thread(target=self._run, name="speculative conversion", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    @property
+    def is_done(self):
+        return self._done
+
+    def _set_progress(self, done, total=None, message=None):
+        self.progress = done / total if total else 0.0
+
+    def _run(self):
+        try:
+            fd, self.temp_path = tempfile.mkstemp(prefix='interlinear-', suffix=self.exporter_class.EXTENSION)
+            with open(fd, 'w', encoding='utf-8') as f:
+                exporter = self.exporter_class(f, *self.ws_codes)
+                export(xml_to_records(self.xml_root), [exporter], self.cancel_token, self._set_progress,
+                       len(self.xml_root.findall('body/paragraph')))
+            self.exporter = exporter
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.xml_root = None
+            with self._lock:
+                self._done = True
+                if self.cancel_token.is_cancelled or self.error is not None:
+                    self._remove_temp_file()
+
+    def _remove_temp_file(self):
+        if self.temp_path is not None:
+            try:
+                os.remove(self.temp_path)
+            except OSError:
+                pass
+            self.temp_path = None
+
+    def commit(self, output_path):
+        """
+        Write the prepared output to output_path. Only call once is_done, and error is None.
+
+        Returns:
+            exporters.Exporter: the exporter that wrote it (e.g. for its summary()).
+        """
+
+        if not self._done or self.temp_path is None:
+            raise RuntimeError('No prepared conversion output to write')
+        # a copy rather than a rename: the temporary directory may be on another drive,
+        # and the output gets the usual permissions of a new file
+        shutil.copyfile(self.temp_path, output_path)
+        self._remove_temp_file()
+        return self.exporter
+
+    def discard(self):
+        """
+        Stop the conversion if it is running, and remove its output.
+        """
+
+        with self._lock:
+            self.cancel_token.cancel()
+            if self._done:
+                self._remove_temp_file()
@@ -0,0 +1,185 @@
+"""
+Validate-only checks of interlinear workbooks: diagnostics without building any XML.
+
+Reports the same load warnings as a conversion (alignment errors, separator rows,
+partial blocks), plus checks of the writing system codes, reading the sheet with the
+cheapest reader (the raw .xlsx backend) and building no interlinear XML.
+
+Usage:
+    result = validate_file('text.xlsx')
+    if not result.is_ok:
+        print(result.problems())
+
+    for result in validate_files(paths, jobs=4):   # in parallel, in the order given
+        ...
+
+The command-line interface is excel_to_xml.py --check.
+"""
+import os
+import re
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cancellation import OperationCancelled
+
+# Exit codes for scripts (excel_to_xml.py --check)
+EXIT_OK = 0             # no problems found
+EXIT_PROBLEMS = 1       # diagnostics found
+EXIT_FATAL = 2          # a file could not be read
+EXIT_CANCELLED = 130
+
+DELIMITED_EXTENSIONS = ('.csv', '.tsv', '.tab', '.txt')
+WRITING_SYSTEM_PATTERN = re.compile(r'^[A-Za-z0-9]+(-[A-Za-z0-9]+)*$')   # e.g. 'en', 'xku', 'qaa-x-abc'
+WRITING_SYSTEM_LABELS = {
+    'writing_system_vernacular': 'Vernacular',
+    'writing_system_gloss': 'Gloss',
+    'writing_system_free': 'Free translation',
+}
+
+
+class ValidationResult:
+    """
+    The result of validating one file.
+
+    Attributes:
+        path: the file checked
+        warnings: load warnings, as from a conversion
+        writing_system_errors: problems with the writing system codes
+        fatal_error: None, or why the file could not be read
+        cancelled: True if the check was cancelled
+        n_lines: number of interlinear lines read
+        seconds: time taken
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.warnings = []
+        self.writing_system_errors = []
+        self.fatal_error = None
+        self.cancelled = False
+        self.n_lines = 0
+        self.seconds = 0.0
+
+    @property
+    def is_ok(self):
+        return not (self.fatal_error or self.cancelled or self.warnings or self.writing_system_errors)
+
+    @property
+    def exit_code(self):
+        if self.cancelled:
+            return EXIT_CANCELLED
+        if self.fatal_error:
+            return EXIT_FATAL
+        return EXIT_OK if self.is_ok else EXIT_PROBLEMS
+
+    def problems(self):
+        """
+        Returns all problems found, as a list of messages.
+        """
+
+        if self.fatal_error:
+            return [f"FATAL ERROR: {self.fatal_error}"]
+        return self.writing_system_errors + self.warnings
+
+
+def check_writing_systems(metadata):
+    """
+    Returns a list of problems with the writing system codes in a loader's metadata element.
+    """
+
+    errors = []
+    for tag, label in WRITING_SYSTEM_LABELS.items():
+        element = metadata.find(tag)
+        code = element.text if element is not None and element.text else ""
+        if not code:
+            errors.append(f"Writing System Error: {label} writing system code is missing.")
+        elif not WRITING_SYSTEM_PATTERN.match(code):
+            errors.append(f"Writing System Error: {label} writing system code '{code}' is not a valid code "
+                          f"(use the Code from FLEx, e.g. 'en' or 'qaa-x-abc').")
+    return errors
+
+
+def validate_file(path, backend='raw', delimiter=None, cancel_token=None, input_format='auto'):
+    """
+    Check one workbook (or CSV/TSV export of the template), without building any XML.
+
+    Args:
+        path (str): The file to check.
+        backend (str): The Excel reader (see row_sources.EXCEL_ROW_SOURCES); 'raw' is the fastest.
+        delimiter (str): Optional. The delimiter of delimited files (guessed by default).
+        cancel_token (cancellation.CancelToken): Optional. Cancels the check before the next block.
+        input_format (str): 'excel', 'delimited', or 'auto' (default) to read files ending in
+            .csv/.tsv/.tab/.txt as delimited text.
+
+    Returns:
+        ValidationResult
+    """
+
+    from InterlinearLoaders import ValidatingInterlinearLoader
+    from row_sources import DelimitedRows
+
+    result = ValidationResult(path)
+    start = time.perf_counter()
+    if not os.path.exists(path):
+        result.fatal_error = f"Input file not found at path: {path}"
+        return result
+    if input_format == 'delimited' or (
+            input_format == 'auto' and os.path.splitext(path)[1].lower() in DELIMITED_EXTENSIONS):
+        loader = ValidatingInterlinearLoader(path, cancel_token, row_source=DelimitedRows(path, delimiter))
+    else:
+        loader = ValidatingInterlinearLoader(path, cancel_token, backend=backend)
+    try:
+        loader.run()
+    except OperationCancelled:
+        result.cancelled = True
+    except Exception as e:
+        cause = f" ({e.__cause__})" if e.__cause__ is not None else ""
+        result.fatal_error = f"Could not load the file. {e}{cause}"
+    else:
+        result.writing_system_errors = check_writing_systems(loader.xml_metadata)
+    result.warnings = loader.warning_list
+    result.n_lines = loader.n_lines
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _ignore_sigint():
+    """
+    Worker process initializer: leave Ctrl-C to the main process, which stops starting new files.
+    """
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def validate_files(paths, jobs=None, backend='raw', delimiter=None, cancel_token=None, input_format='auto'):
+    """
+    Check many files, in parallel worker processes if jobs > 1.
+
+    Args:
+        paths (list): The files to check.
+        jobs (int): Optional. Number of worker processes (default: the number of CPUs, at most len(paths)).
+        cancel_token (cancellation.CancelToken): Optional. If cancelled, no more files are started
+            (with one job, the current file stops before its next block).
+        backend, delimiter, input_format: as for validate_file.
+
+    Yields:
+        ValidationResult for each file, in the order of paths.
+    """
+
+    paths = list(paths)
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    if jobs <= 1:
+        for path in paths:
+            if cancel_token is not None and cancel_token.is_cancelled:
+                return
+            yield validate_file(path, backend, delimiter, cancel_token, input_format)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_ignore_sigint) as pool:
+        futures = [pool.submit(validate_file, path, backend, delimiter, None, input_format) for path in paths]
+        for future in futures:
+            if cancel_token is not None and cancel_token.is_cancelled:
+                for pending in futures:
+                    pending.cancel()
+                return
+            yield future.result()
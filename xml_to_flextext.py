@@ -6,7 +6,12 @@ import traceback
 from xml.etree.ElementTree import Element, SubElement, tostring, parse
 from xml.dom import minidom 
 
-def transform_to_flextext_dom(xml_root_in, ws_vernacular, ws_gloss, ws_freetrans):
+from cancellation import CancelToken, OperationCancelled, install_sigint_handler
+from intermediate_jsonl import is_jsonl_file, iter_records, read_jsonl_to_xml
+from xml_writer import iter_pretty_element, write_pretty_xml, xml_declaration
+
+def transform_to_flextext_dom(xml_root_in, ws_vernacular, ws_gloss, ws_freetrans, cancel_token=None,
+                              paragraphs=None, title=None, progress=None):
     """
     [MAIN CONVERSION FUNCTION]
     Transforms the custom interlinear XML DOM object into the FLExText XML format, 
@@ -17,32 +22,19 @@ def transform_to_flextext_dom(xml_root_in, ws_vernacular, ws_gloss, ws_freetrans
         ws_vernacular (str): Writing system code for the vernacular text (e.g., 'xku').
         ws_gloss (str): Writing system code for the word glosses (e.g., 'gls').
         ws_freetrans (str): Writing system code for the free translation (e.g., 'en').
+        cancel_token (cancellation.CancelToken): Optional. If cancelled, raises
+            cancellation.OperationCancelled before the next paragraph.
+        paragraphs (list): Optional. The <paragraph> elements to convert, instead of all of them
+            (used by iter_flextext_parts).
+        title (str): Optional. The title to use instead of the one in the metadata.
+        progress (callable): Optional. Called as progress(paragraphs done, total paragraphs)
+            after each paragraph (see progress.py).
 
     Returns:
         tuple: (xml.etree.ElementTree.Element, int) The root <document> element (FLExText object) 
                and the count of missing free translations.
     """
     
-    # Nested Helper Function (Now scoped locally)
-    def create_languages_block():
-        """
-        Creates the essential <languages> element for the FLExText file, 
-        using the writing system codes from the parent function's scope.
-        """
-        languages = Element('languages')
-        
-        # 1. Vernacular Language (The language of the text, marked as vernacular)
-        SubElement(languages, 'language', lang=ws_vernacular, font="Charis SIL", vernacular="true")
-        
-        # 2. Analysis/Gloss Language (Used for word glosses and often for the title)
-        SubElement(languages, 'language', lang=ws_gloss, font="Times New Roman")
-        
-        # 3. Free Translation/Title Language (If different from the gloss language)
-        if ws_freetrans != ws_gloss:
-            SubElement(languages, 'language', lang=ws_freetrans, font="Times New Roman")
-        
-        return languages
-
     # Initialize counter for debugging output
     missing_freetrans_count = 0
     
@@ -54,8 +46,7 @@ def transform_to_flextext_dom(xml_root_in, ws_vernacular, ws_gloss, ws_freetrans
     flextext_root = SubElement(document_root, 'interlinear-text')
     
     # 3. Extract and create the Title
-    title_element = xml_root_in.find('.//title')
-    title_text = title_element.text if title_element is not None and title_element.text else "Untitled Text"
+    title_text = title if title is not None else get_title(xml_root_in)
     
     title_item = SubElement(flextext_root, 'item')
     title_item.set('type', 'title')
@@ -65,7 +56,11 @@ def transform_to_flextext_dom(xml_root_in, ws_vernacular, ws_gloss, ws_freetrans
     # 4. Process the Body (Paragraphs and Phrases)
     paragraphs_container = SubElement(flextext_root, 'paragraphs')
     
-    for paragraph_in in xml_root_in.findall('.//paragraph'):
+    paragraphs_in = paragraphs if paragraphs is not None else xml_root_in.findall('.//paragraph')
+    for paragraph_num, paragraph_in in enumerate(paragraphs_in):
+
+        if cancel_token is not None:
+            cancel_token.check(f"at paragraph {paragraph_num + 1} of {len(paragraphs_in)}")
         
         # Create a new <paragraph>
         paragraph_out = SubElement(paragraphs_container, 'paragraph')
@@ -86,63 +81,18 @@ def transform_to_flextext_dom(xml_root_in, ws_vernacular, ws_gloss, ws_freetrans
 
             vern_words = vern_line.findall('./wrd')
             glosses = gloss_line.findall('./gls')
-            
-            
-            # --- STEP 4.1: Add Vernacular Sentence (type="txt") - SHOULD BE FIRST ---
-            # Reconstruct the full sentence by joining the text of all vernacular words.
-            full_vernacular_text = " ".join(
-                wrd.text for wrd in vern_words if wrd.text is not None and wrd.text.strip() != ""
-            )
-            
-            if full_vernacular_text:
-                vern_item = SubElement(phrase_element, 'item')
-                vern_item.set('type', 'txt')
-                vern_item.set('lang', ws_vernacular)
-                vern_item.text = full_vernacular_text
-            
-            
-            # --- STEP 4.2: Add Free Translation (<item type="gls">) - SHOULD BE SECOND ---
             free_element = line.find('./free')
-            
-            if free_element is not None and free_element.text is not None:
-                free_translation_text = free_element.text.strip()
-            else:
-                free_translation_text = ""
-            
-            if free_translation_text:
-                free_item = SubElement(phrase_element, 'item')
-                free_item.set('type', 'gls')
-                free_item.set('lang', ws_freetrans) # Use Free Translation WS code
-                free_item.text = free_translation_text
-            else:
-                # Increment counter if no meaningful free translation text was found
+            is_free_missing = add_phrase_items(
+                phrase_element, [wrd.text for wrd in vern_words], [gls.text for gls in glosses],
+                free_element.text if free_element is not None else None, ws_vernacular, ws_gloss, ws_freetrans)
+            if is_free_missing:
                 missing_freetrans_count += 1
 
+        if progress is not None:
+            progress(paragraph_num + 1, len(paragraphs_in))
 
-            # --- STEP 4.3: Prepare and fill the <words> container (The interlinear data) - SHOULD BE LAST ---
-            words_container = SubElement(phrase_element, 'words')
-            
-            # Process words and glosses 1:1
-            for i in range(min(len(vern_words), len(glosses))):
-                vern_word = vern_words[i]
-                word_gloss = glosses[i]
-                
-                word_element = SubElement(words_container, 'word')
-                
-                # Add Vernacular Word (<item type="txt">)
-                txt_item = SubElement(word_element, 'item')
-                txt_item.set('type', 'txt')
-                txt_item.set('lang', ws_vernacular) # Use Vernacular WS code
-                txt_item.text = vern_word.text if vern_word.text else ""
-
-                # Add Word Gloss (<item type="gls">)
-                gls_item = SubElement(word_element, 'item')
-                gls_item.set('type', 'gls')
-                gls_item.set('lang', ws_gloss) # Use Gloss WS code
-                gls_item.text = word_gloss.text if word_gloss.text else ""
-                
     # 5. Add the mandatory <languages> block
-    languages_block = create_languages_block() # Called without arguments
+    languages_block = create_languages_block(ws_vernacular, ws_gloss, ws_freetrans)
     flextext_root.append(languages_block)
     
     return document_root, missing_freetrans_count 
@@ -151,6 +101,317 @@ def transform_to_flextext_dom(xml_root_in, ws_vernacular, ws_gloss, ws_freetrans
 # --- HELPER FUNCTIONS (Outside main conversion) ---
 # ======================================================================
 
+def create_languages_block(ws_vernacular, ws_gloss, ws_freetrans):
+    """
+    Creates the essential <languages> element for the FLExText file,
+    using the writing system codes.
+    """
+    languages = Element('languages')
+
+    # 1. Vernacular Language (The language of the text, marked as vernacular)
+    SubElement(languages, 'language', lang=ws_vernacular, font="Charis SIL", vernacular="true")
+
+    # 2. Analysis/Gloss Language (Used for word glosses and often for the title)
+    SubElement(languages, 'language', lang=ws_gloss, font="Times New Roman")
+
+    # 3. Free Translation/Title Language (If different from the gloss language)
+    if ws_freetrans != ws_gloss:
+        SubElement(languages, 'language', lang=ws_freetrans, font="Times New Roman")
+
+    return languages
+
+
+def add_phrase_items(phrase_element, vern_texts, gloss_texts, free_text, ws_vernacular, ws_gloss, ws_freetrans):
+    """
+    Fill a FlexText <phrase> element from one interlinear line: its vernacular words and
+    glosses (lists of text, or None for empty words) and free translation (text or None).
+
+    Used by transform_to_flextext_dom, and by the pipelined conversion (excel_to_flextext.py).
+
+    Returns:
+        bool: True if the line has no free translation.
+    """
+
+    # --- STEP 4.1: Add Vernacular Sentence (type="txt") - SHOULD BE FIRST ---
+    # Reconstruct the full sentence by joining the text of all vernacular words.
+    full_vernacular_text = " ".join(
+        text for text in vern_texts if text is not None and text.strip() != ""
+    )
+
+    if full_vernacular_text:
+        vern_item = SubElement(phrase_element, 'item')
+        vern_item.set('type', 'txt')
+        vern_item.set('lang', ws_vernacular)
+        vern_item.text = full_vernacular_text
+
+
+    # --- STEP 4.2: Add Free Translation (<item type="gls">) - SHOULD BE SECOND ---
+    free_translation_text = free_text.strip() if free_text is not None else ""
+
+    if free_translation_text:
+        free_item = SubElement(phrase_element, 'item')
+        free_item.set('type', 'gls')
+        free_item.set('lang', ws_freetrans) # Use Free Translation WS code
+        free_item.text = free_translation_text
+
+
+    # --- STEP 4.3: Prepare and fill the <words> container (The interlinear data) - SHOULD BE LAST ---
+    words_container = SubElement(phrase_element, 'words')
+
+    # Process words and glosses 1:1
+    for vern_text, gloss_text in zip(vern_texts, gloss_texts):
+        word_element = SubElement(words_container, 'word')
+
+        # Add Vernacular Word (<item type="txt">)
+        txt_item = SubElement(word_element, 'item')
+        txt_item.set('type', 'txt')
+        txt_item.set('lang', ws_vernacular) # Use Vernacular WS code
+        txt_item.text = vern_text if vern_text else ""
+
+        # Add Word Gloss (<item type="gls">)
+        gls_item = SubElement(word_element, 'item')
+        gls_item.set('type', 'gls')
+        gls_item.set('lang', ws_gloss) # Use Gloss WS code
+        gls_item.text = gloss_text if gloss_text else ""
+
+    # Flag the line if no meaningful free translation text was found
+    return not free_translation_text
+
+class FlexTextStreamWriter:
+    """
+    Writes a .flextext document to the text file f one phrase at a time, with the same text
+    as write_pretty_xml of the transform_to_flextext_dom tree.
+
+    Usage:
+        writer = FlexTextStreamWriter(f, title, ws_vernacular, ws_gloss, ws_freetrans)
+        writer.paragraph()          # starts a paragraph
+        writer.phrase(phrase)       # a <phrase> element (see add_phrase_items)
+        ...
+        writer.close()
+
+    Used by write_flextext_stream and the FlexText exporter (exporters.py).
+    """
+
+    def __init__(self, f, title, ws_vernacular, ws_gloss, ws_freetrans, indent="  "):
+        self.f = f
+        self.ws_codes = (ws_vernacular, ws_gloss, ws_freetrans)
+        self.indent = indent
+        self.n_paragraphs = 0
+        self.n_paragraph_phrases = 0
+        f.write(xml_declaration('utf-8'))
+        f.write('<document version="2">\n')
+        f.write(f'{indent}<interlinear-text>\n')
+        title_item = Element('item', type='title', lang=ws_freetrans)
+        title_item.text = title
+        f.writelines(iter_pretty_element(title_item, indent * 2, indent))
+
+    def close_paragraph(self):
+        indent = self.indent
+        if self.n_paragraph_phrases:
+            self.f.write(f'{indent * 4}</phrases>\n{indent * 3}</paragraph>\n')
+        else:
+            self.f.write(f'{indent * 4}<phrases/>\n{indent * 3}</paragraph>\n')
+
+    def paragraph(self):
+        if self.n_paragraphs:
+            self.close_paragraph()
+        else:
+            self.f.write(f'{self.indent * 2}<paragraphs>\n')
+        self.f.write(f'{self.indent * 3}<paragraph>\n')
+        self.n_paragraphs += 1
+        self.n_paragraph_phrases = 0
+
+    def phrase(self, phrase):
+        if not self.n_paragraphs:
+            self.paragraph()
+        if not self.n_paragraph_phrases:
+            self.f.write(f'{self.indent * 4}<phrases>\n')
+        self.n_paragraph_phrases += 1
+        self.f.writelines(iter_pretty_element(phrase, self.indent * 5, self.indent))
+
+    def close(self):
+        indent = self.indent
+        if not self.n_paragraphs:
+            self.f.write(f'{indent * 2}<paragraphs/>\n')
+        else:
+            self.close_paragraph()
+            self.f.write(f'{indent * 2}</paragraphs>\n')
+        self.f.writelines(iter_pretty_element(create_languages_block(*self.ws_codes), indent * 2, indent))
+        self.f.write(f'{indent}</interlinear-text>\n')
+        self.f.write('</document>\n')
+
+
+def write_flextext_stream(f, phrases, title, ws_vernacular, ws_gloss, ws_freetrans, indent="  "):
+    """
+    Write a .flextext document to the text file f from a stream of (paragraph number, <phrase>) pairs,
+    with the same text as write_pretty_xml of the transform_to_flextext_dom tree.
+
+    A new paragraph number starts a new paragraph; a phrase of None starts a paragraph without adding a phrase.
+    Used by the pipelined conversion (excel_to_flextext.py) and for JSON Lines input.
+    """
+
+    writer = FlexTextStreamWriter(f, title, ws_vernacular, ws_gloss, ws_freetrans, indent)
+    paragraph_num = None
+    for phrase_paragraph_num, phrase in phrases:
+        if phrase_paragraph_num != paragraph_num:
+            writer.paragraph()
+            paragraph_num = phrase_paragraph_num
+        if phrase is not None:
+            writer.phrase(phrase)
+    writer.close()
+
+
+def write_flextext_from_records(records, f, ws_vernacular, ws_gloss, ws_freetrans, cancel_token=None):
+    """
+    Convert the records of a JSON Lines intermediate file (see intermediate_jsonl.py) to FlexText,
+    writing it to the text file f one phrase at a time, with the same output as
+    transform_to_flextext_dom of the equivalent XML.
+
+    Returns:
+        tuple: (int, int) The number of phrases and the count of missing free translations.
+    """
+
+    header = next(records)     # the metadata record (checked by intermediate_jsonl.iter_records)
+    title = header.get('fields', {}).get('title') or "Untitled Text"
+    counts = {'phrases': 0, 'missing_free': 0}
+
+    def iter_phrases():
+        paragraph_num = 0
+        for record in records:
+            if record['type'] == 'paragraph':
+                paragraph_num += 1
+                if cancel_token is not None:
+                    cancel_token.check(f"at paragraph {paragraph_num}")
+                yield paragraph_num, None
+                continue
+            if record['type'] != 'line':
+                continue
+            phrase = Element('phrase')
+            counts['phrases'] += 1
+            if 'vernacular' in record and 'gloss' in record:
+                if add_phrase_items(phrase, record['vernacular'], record['gloss'], record.get('free'),
+                                    ws_vernacular, ws_gloss, ws_freetrans):
+                    counts['missing_free'] += 1
+            paragraph_num = max(paragraph_num, 1)    # (lines before any paragraph record)
+            yield paragraph_num, phrase
+
+    write_flextext_stream(f, iter_phrases(), title, ws_vernacular, ws_gloss, ws_freetrans)
+    return counts['phrases'], counts['missing_free']
+
+
+def get_title(xml_root_in):
+    """Return the title of the intermediate XML text, or "Untitled Text"."""
+    title_element = xml_root_in.find('.//title')
+    return title_element.text if title_element is not None and title_element.text else "Untitled Text"
+
+
+def plan_split(paragraphs, max_phrases=None, max_words=None):
+    """
+    Group paragraphs into parts of at most max_phrases lines and/or max_words vernacular words.
+
+    Parts only end at paragraph boundaries, so a single paragraph over the limits is a part by itself.
+
+    Args:
+        paragraphs (list): The intermediate <paragraph> elements.
+        max_phrases (int): Optional. The number of lines (phrases) at which a part is full.
+        max_words (int): Optional. The number of vernacular words at which a part is full.
+
+    Returns:
+        list: (start, end) index ranges into paragraphs, one per part (a single part if no limit is given).
+    """
+    parts = []
+    start = 0
+    n_phrases = n_words = 0
+    for i, paragraph in enumerate(paragraphs):
+        lines = paragraph.findall('./line')
+        paragraph_phrases = len(lines)
+        paragraph_words = sum(len(line.findall('./il-lines/vernacular-line/wrd')) for line in lines) if max_words else 0
+        is_full = ((max_phrases and n_phrases + paragraph_phrases > max_phrases)
+                   or (max_words and n_words + paragraph_words > max_words))
+        if i > start and is_full:
+            parts.append((start, i))
+            start = i
+            n_phrases = n_words = 0
+        n_phrases += paragraph_phrases
+        n_words += paragraph_words
+    if start < len(paragraphs) or not parts:
+        parts.append((start, len(paragraphs)))
+    return parts
+
+
+def iter_flextext_parts(xml_root_in, ws_vernacular, ws_gloss, ws_freetrans, max_phrases=None, max_words=None,
+                        cancel_token=None):
+    """
+    Convert the intermediate XML to FlexText in size-bounded parts, one part at a time.
+
+    The text is split at paragraph boundaries (see plan_split), and each part is a complete
+    FlexText <document> with its own <languages> block and a numbered title such as
+    "Title (part 2/5)". Only one part's FlexText tree exists at a time.
+
+    Yields:
+        tuple: (part number, number of parts, <document> element, count of missing free translations)
+    """
+    paragraphs = xml_root_in.findall('.//paragraph')
+    parts = plan_split(paragraphs, max_phrases, max_words)
+    title = get_title(xml_root_in)
+    for part_num, (start, end) in enumerate(parts, 1):
+        part_title = f"{title} (part {part_num}/{len(parts)})" if len(parts) > 1 else title
+        document_root, missing_freetrans_count = transform_to_flextext_dom(
+            xml_root_in, ws_vernacular, ws_gloss, ws_freetrans, cancel_token,
+            paragraphs=paragraphs[start:end], title=part_title)
+        yield part_num, len(parts), document_root, missing_freetrans_count
+
+
+def write_flextext_parts(parts, output_path, split_output='texts'):
+    """
+    Write the parts from iter_flextext_parts, streaming each one as it is made.
+
+    Each file is written to a ".partial" file first, and they are all renamed to their final
+    names only once every part is written; if a part fails (or is cancelled), the partial files
+    are removed and any earlier output is left as it was.
+
+    Args:
+        parts: The iter_flextext_parts generator.
+        output_path (str): The .flextext file, or for split_output='files', the name
+            the part files are based on ("name (part 1 of 5).flextext", ...).
+        split_output (str): 'texts' to write all parts to one file, as separate
+            <interlinear-text> elements of one <document>; 'files' for one file per part.
+
+    Returns:
+        tuple: (list of paths written, total count of missing free translations)
+    """
+    paths = []
+    missing_freetrans_total = 0
+    try:
+        if split_output == 'files':
+            base_name, extension = os.path.splitext(output_path)
+            for part_num, n_parts, document_root, missing_freetrans_count in parts:
+                path = f"{base_name} (part {part_num} of {n_parts}){extension}" if n_parts > 1 else output_path
+                paths.append(path)
+                with open(path + ".partial", 'w', encoding='utf-8') as f:
+                    write_pretty_xml(document_root, f, encoding='utf-8')
+                missing_freetrans_total += missing_freetrans_count
+        else:
+            paths.append(output_path)
+            with open(output_path + ".partial", 'w', encoding='utf-8') as f:
+                f.write(xml_declaration('utf-8'))
+                f.write('<document version="2">\n')
+                for part_num, n_parts, document_root, missing_freetrans_count in parts:
+                    for text in document_root:
+                        for chunk in iter_pretty_element(text, "  "):
+                            f.write(chunk)
+                    missing_freetrans_total += missing_freetrans_count
+                f.write('</document>\n')
+    except BaseException:
+        for path in paths:
+            if os.path.exists(path + ".partial"):
+                os.remove(path + ".partial")
+        raise
+    for path in paths:
+        os.replace(path + ".partial", path)
+    return paths, missing_freetrans_total
+
+
 def prettify_xml(element):
     """Return a pretty-printed XML string for the given element."""
     rough_string = tostring(element, encoding='utf-8')
@@ -169,9 +430,27 @@ def cli_wrapper():
     )
     parser.add_argument(
         "input_xml_file", 
-        help="The path to the input XML document (e.g., output_text.xml)."
+        help="The path to the input XML document (e.g., output_text.xml), or its JSON Lines form "
+             "(.jsonl, from excel_to_xml.py --format jsonl; detected automatically)."
+    )
+    parser.add_argument(
+        "--max-phrases", type=int, default=None,
+        help="Split the text into parts of about this many phrases (at paragraph boundaries), "
+             "for texts too large for FLEx to import comfortably."
+    )
+    parser.add_argument(
+        "--max-words", type=int, default=None,
+        help="Split the text into parts of about this many words (at paragraph boundaries)."
+    )
+    parser.add_argument(
+        "--split-output", choices=["texts", "files"], default="texts",
+        help="With --max-phrases/--max-words: write the parts as separate texts in one .flextext file "
+             "(default), or as one file per part."
     )
     args = parser.parse_args()
+    for option, value in (("--max-phrases", args.max_phrases), ("--max-words", args.max_words)):
+        if value is not None and value <= 0:
+            parser.error(f"{option} must be at least 1 (got {value}); leave it out to write the text in one part")
     
     input_path = os.path.abspath(args.input_xml_file)
     base_name, _ = os.path.splitext(input_path)
@@ -204,11 +483,52 @@ def cli_wrapper():
 
     input_root = None # XML object placeholder
 
-    # 2. Parse Input XML
+    # From here on, Ctrl-C cancels cleanly instead of showing a traceback
+    cancel_token = CancelToken()
+    install_sigint_handler(cancel_token)
+
+    # 2. JSON Lines input (without splitting) is converted and written as it is read
+    try:
+        is_jsonl = is_jsonl_file(input_path)
+    except OSError as e:
+        print(f"FATAL ERROR: Could not read the input file. {e}")
+        sys.exit(1)
+    if is_jsonl and not (args.max_phrases or args.max_words):
+        temp_path = output_flextext_path + ".partial"
+        try:
+            print("\n1. Converting JSON Lines input to FLExText...")
+            with open(input_path, 'r', encoding='utf-8') as f_in, open(temp_path, 'w', encoding='utf-8') as f_out:
+                n_phrases, missing_freetrans_count = write_flextext_from_records(
+                    iter_records(f_in), f_out, ws_vernacular, ws_gloss, ws_freetrans, cancel_token)
+            os.replace(temp_path, output_flextext_path)
+        except OperationCancelled as e:
+            os.remove(temp_path)
+            print(f"\nCANCELLED: Stopped {e}. No output was written.")
+            sys.exit(130)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            error_message = f"\nFATAL ERROR during JSON Lines conversion:\n{traceback.format_exc()}"
+            with open(error_log_path, 'w', encoding='utf-8') as f:
+                f.write(error_message)
+            print(f"\nFATAL ERROR: Conversion failed. Details logged to {os.path.basename(error_log_path)}")
+            sys.exit(1)
+        print(f"\nCOMPLETED SUCCESSFULLY.")
+        print(f"   - FlexText output saved to: '{os.path.basename(output_flextext_path)}' ({n_phrases} phrases)")
+        if missing_freetrans_count > 0:
+            print(f"\n*** WARNING ***")
+            print(f"The script skipped adding the Free Translation for {missing_freetrans_count} line(s).")
+        if os.path.exists(error_log_path):
+            os.remove(error_log_path)
+        return
+
+    # 2. Parse Input XML (or JSON Lines, to split it)
     try:
         print("\n1. Parsing Input XML...")
-        xml_tree = parse(input_path)
-        input_root = xml_tree.getroot()
+        if is_jsonl:
+            input_root = read_jsonl_to_xml(input_path)
+        else:
+            input_root = parse(input_path).getroot()
         if input_root.tag != 'text':
              raise ValueError(f"Root tag expected to be 'text', found '{input_root.tag}'")
         print("   - Input XML successfully parsed.")
@@ -219,14 +539,43 @@ def cli_wrapper():
         print(f"\nFATAL ERROR: Could not parse XML file. Details logged to {os.path.basename(error_log_path)}")
         sys.exit(1)
         
+    # 3. Split into parts, if requested: each part is converted and written in turn (step 4)
+    if args.max_phrases or args.max_words:
+        try:
+            print("2. Transforming XML to FLExText and writing parts...")
+            parts = iter_flextext_parts(input_root, ws_vernacular, ws_gloss, ws_freetrans,
+                                        args.max_phrases, args.max_words, cancel_token)
+            paths, missing_freetrans_count = write_flextext_parts(parts, output_flextext_path, args.split_output)
+        except OperationCancelled as e:
+            print(f"\nCANCELLED: Stopped {e}. No output was written.")
+            sys.exit(130)
+        except Exception:
+            error_message = f"\nFATAL ERROR during XML Transformation:\n{traceback.format_exc()}"
+            with open(error_log_path, 'w', encoding='utf-8') as f:
+                f.write(error_message)
+            print(f"\nFATAL ERROR: Conversion failed. Details logged to {os.path.basename(error_log_path)}")
+            sys.exit(1)
+        print(f"\nCOMPLETED SUCCESSFULLY.")
+        for path in paths:
+            print(f"   - FlexText output saved to: '{os.path.basename(path)}'")
+        if missing_freetrans_count > 0:
+            print(f"\n*** WARNING ***")
+            print(f"The script skipped adding the Free Translation for {missing_freetrans_count} line(s).")
+        if os.path.exists(error_log_path):
+            os.remove(error_log_path)
+        return
+
     # 3. Perform Conversion (Calls the main modular function)
     try:
         print("2. Transforming XML to FLExText object...")
         # Capture both the XML document root and the missing free translations count
         document_root, missing_freetrans_count = transform_to_flextext_dom(
-            input_root, ws_vernacular, ws_gloss, ws_freetrans
+            input_root, ws_vernacular, ws_gloss, ws_freetrans, cancel_token=cancel_token
         )
         print("   - Transformation successful.")
+    except OperationCancelled as e:
+        print(f"\nCANCELLED: Stopped {e}. No output was written.")
+        sys.exit(130)
     except Exception:
         error_message = f"\nFATAL ERROR during XML Transformation:\n{traceback.format_exc()}"
         with open(error_log_path, 'w', encoding='utf-8') as f:
@@ -234,6 +583,10 @@ def cli_wrapper():
         print(f"\nFATAL ERROR: Conversion failed. Details logged to {os.path.basename(error_log_path)}")
         sys.exit(1)
         
+    if cancel_token.is_cancelled:
+        print("\nCANCELLED before writing. No output was written.")
+        sys.exit(130)
+
     # 4. Write Output XML (FlexText)
     try:
         print("3. Writing output FlexText file...")
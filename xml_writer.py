@@ -0,0 +1,88 @@
+"""
+Streaming pretty-printer for ElementTree elements.
+
+Produces exactly the same text as the minidom round trip used elsewhere in this project:
+    minidom.parseString(tostring(element)).toprettyxml(indent="  ", encoding=...)
+but writes it piece by piece, without building a second (minidom) copy of the document
+or the whole output string in memory.
+"""
+
+
+def _escape(data):
+    """
+    Escape text as minidom does (including double quotes).
+    """
+
+    return data.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def _normalize_newlines(data):
+    """
+    Normalize line endings as an XML parser does when text is read back.
+    """
+
+    return data.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def xml_declaration(encoding=None):
+    """
+    Returns the XML declaration line written by minidom's toprettyxml.
+    """
+
+    if encoding:
+        return f'<?xml version="1.0" encoding="{encoding}"?>\n'
+    return '<?xml version="1.0" ?>\n'
+
+
+def iter_pretty_element(element, indent="", addindent="  "):
+    """
+    Yield the pretty-printed text of one element (and its children), piece by piece.
+
+    indent: indentation of this element; addindent: extra indentation per level.
+    The element's tail is not included (see iter_pretty_xml).
+    """
+
+    attributes = "".join(f' {name}="{_escape(value)}"' for name, value in element.attrib.items())
+
+    # the child nodes, as minidom would see them: text, then each child element and its tail
+    nodes = []
+    if element.text:
+        nodes.append(_normalize_newlines(element.text))
+    for child in element:
+        nodes.append(child)
+        if child.tail:
+            nodes.append(_normalize_newlines(child.tail))
+
+    if not nodes:
+        yield f"{indent}<{element.tag}{attributes}/>\n"
+    elif len(nodes) == 1 and isinstance(nodes[0], str):
+        yield f"{indent}<{element.tag}{attributes}>{_escape(nodes[0])}</{element.tag}>\n"
+    else:
+        yield f"{indent}<{element.tag}{attributes}>\n"
+        child_indent = indent + addindent
+        for node in nodes:
+            if isinstance(node, str):
+                yield f"{child_indent}{_escape(node)}\n"
+            else:
+                yield from iter_pretty_element(node, child_indent, addindent)
+        yield f"{indent}</{element.tag}>\n"
+
+
+def iter_pretty_xml(element, indent="  ", encoding=None):
+    """
+    Yield the pretty-printed XML document for an element, starting with the XML declaration.
+    """
+
+    yield xml_declaration(encoding)
+    yield from iter_pretty_element(element, "", indent)
+
+
+def write_pretty_xml(element, f, indent="  ", encoding=None):
+    """
+    Write the pretty-printed XML document for an element to the text file f.
+
+    encoding: only used for the XML declaration (e.g. 'utf-8'), as in minidom's toprettyxml.
+    """
+
+    for chunk in iter_pretty_xml(element, indent, encoding):
+        f.write(chunk)